@@ -0,0 +1,243 @@
+"""Serving of uploaded media.
+
+Upload filenames are unique and never rewritten, so every response is
+cacheable forever. Resized and re-encoded derivatives (``?w=`` and
+``Accept: image/avif, image/webp``) are generated once with Pillow and kept
+under ``UPLOAD_DIR/.derivatives``.
+"""
+from email.utils import formatdate
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.purge import DERIVATIVE_DIR
+import anyio
+import asyncio
+import mimetypes
+import os
+import tempfile
+
+router = APIRouter()
+
+DERIVATIVE_WIDTHS = (160, 320, 640, 960, 1280, 1920)
+# Formats Pillow may re-encode to, in order of preference, with their Pillow writer
+NEGOTIABLE_FORMATS = {"image/avif": "AVIF", "image/webp": "WEBP"}
+RESIZABLE_TYPES = {"image/jpeg", "image/png", "image/webp"}
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/avif": ".avif"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 256 * 1024
+
+_derivative_slots: Optional[asyncio.Semaphore] = None
+_building: Dict[str, "asyncio.Future[bool]"] = {}  # Derivative path -> build in progress
+
+def _slots() -> asyncio.Semaphore:
+    global _derivative_slots
+    if _derivative_slots is None:
+        _derivative_slots = asyncio.Semaphore(settings.MEDIA_DERIVATIVE_CONCURRENCY)
+    return _derivative_slots
+
+def _pillow_can_save(pillow_format: str) -> bool:
+    from PIL import Image
+
+    Image.init()
+    return pillow_format in Image.SAVE
+
+def _accept_qualities(accept: str) -> Dict[str, float]:
+    """Media types listed in an Accept header with their q-values."""
+    qualities = {}
+    for part in accept.split(","):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+def _accepted_format(accept: Optional[str], source_type: str) -> Optional[str]:
+    """Best re-encoding the client accepts, or None to keep the source format.
+
+    Only formats named outright count: every browser sends ``*/*``.
+    """
+    if not accept:
+        return None
+    qualities = _accept_qualities(accept)
+    for media_type, pillow_format in NEGOTIABLE_FORMATS.items():
+        if media_type == source_type:
+            return None
+        if qualities.get(media_type, 0) > 0 and _pillow_can_save(pillow_format):
+            return media_type
+    return None
+
+def _snap_width(width: int) -> int:
+    """Round a requested width up to a fixed size to bound derivative count."""
+    for candidate in DERIVATIVE_WIDTHS:
+        if candidate >= width:
+            return candidate
+    return DERIVATIVE_WIDTHS[-1]
+
+def _build_derivative(source: str, target: str, width: Optional[int], media_type: str):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        if width and image.width > width:
+            image.thumbnail((width, width * 10))
+        pillow_format = NEGOTIABLE_FORMATS.get(media_type) or image.format
+        if pillow_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Named after the target so purges and the orphan GC match it by stem
+        fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(target)}.", suffix=".tmp", dir=os.path.dirname(target))
+        try:
+            # mkstemp's 0600 would hide the file from anything else serving UPLOAD_DIR
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=pillow_format, quality=80)
+            os.replace(tmp, target)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+async def _build(source: str, target: str, width: Optional[int], media_type: str) -> bool:
+    async with _slots():
+        if os.path.exists(target):
+            return True
+        try:
+            await run_in_threadpool(_build_derivative, source, target, width, media_type)
+        except Exception:
+            return False
+    return True
+
+async def _ensure_derivative(source: str, target: str, width: Optional[int], media_type: str) -> bool:
+    """Build a derivative once per worker however many requests wait; False if the source won't decode."""
+    task = _building.get(target)
+    if task is None:
+        task = _building[target] = asyncio.ensure_future(_build(source, target, width, media_type))
+        task.add_done_callback(lambda _: _building.pop(target, None))
+    return await asyncio.shield(task)
+
+async def _variant(path: str, source_type: str, accept: Optional[str], width: Optional[int]) -> tuple[str, str]:
+    """Path and media type of the best representation, building it if needed."""
+    if source_type not in RESIZABLE_TYPES:
+        return path, source_type
+    target_type = _accepted_format(accept, source_type) or source_type
+    width = _snap_width(width) if width else None
+    if target_type == source_type and width is None:
+        return path, source_type
+
+    stem = os.path.basename(path).rsplit(".", 1)[0]
+    extension = EXTENSIONS[target_type]
+    target = os.path.join(settings.UPLOAD_DIR, DERIVATIVE_DIR, f"{stem}.w{width or 0}{extension}")
+    if not os.path.exists(target) and not await _ensure_derivative(path, target, width, target_type):
+        # Undecodable upload: serve the original bytes
+        return path, source_type
+    return target, target_type
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """Parse a single-range ``bytes=`` header into an inclusive (start, end).
+
+    Returns None for anything but one range (served as a full 200 response)
+    and raises 416 when the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            start = size - int(end_text)
+            end = size - 1
+    except ValueError:
+        return None
+    start, end = max(start, 0), min(end, size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+class MediaResponse(Response):
+    """File response with byte ranges and zero-copy send when the server offers it."""
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int, headers: dict, media_type: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.headers["Content-Length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                })
+            return
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_media(filename: str, request: Request, w: Optional[int] = None):
+    """Serve an uploaded file with immutable caching, ETags and Range support."""
+    if filename.startswith(".") or "/" in filename or "\\" in filename:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    path = os.path.join(settings.UPLOAD_DIR, filename)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    extension = os.path.splitext(filename)[1].lower()
+    source_type = next(
+        (media_type for media_type, ext in EXTENSIONS.items() if ext == extension),
+        mimetypes.guess_type(filename)[0] or "application/octet-stream",
+    )
+    path, media_type = await _variant(path, source_type, request.headers.get("accept"), w)
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+    if source_type in RESIZABLE_TYPES:
+        headers["Vary"] = "Accept"
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, stat.st_size)
+    if byte_range is None:
+        return MediaResponse(path, 0, stat.st_size, status.HTTP_200_OK, headers, media_type)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return MediaResponse(path, start, end - start + 1, status.HTTP_206_PARTIAL_CONTENT, headers, media_type)
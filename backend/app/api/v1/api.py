@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, walls, contributors, content
+from app.api.v1.endpoints import admin, auth, walls, contributors, content, uploads
 
 api_router = APIRouter()
 
@@ -7,4 +7,6 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(walls.router, prefix="/walls", tags=["walls"])
 api_router.include_router(contributors.router, prefix="/contributors", tags=["contributors"])
 api_router.include_router(content.router, prefix="/content", tags=["content"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from app.core import profiling
+from app.core.config import settings
+import os
+import tracemalloc
+
+router = APIRouter()
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Operator endpoints: require the X-Admin-Token header; hidden when no token is configured."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not profiling.is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+@router.get("/profiles", dependencies=[Depends(require_admin_token)])
+async def list_profiles():
+    """List stored request profiles, newest first."""
+    return {"profiles": sorted(profiling.list_profiles(), reverse=True)}
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_admin_token)])
+async def get_profile(name: str):
+    """Download a speedscope profile."""
+    if name not in profiling.list_profiles():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(os.path.join(settings.PROFILE_DIR, name), media_type="application/json", filename=name)
+
+@router.post("/tracemalloc/start", dependencies=[Depends(require_admin_token)])
+async def start_tracemalloc(frames: int = Query(1, ge=1, le=profiling.MAX_TRACE_FRAMES)):
+    """Start tracing allocations in this worker (adds overhead until stopped)."""
+    return {"started": profiling.start_tracing(frames), "pid": os.getpid()}
+
+@router.post("/tracemalloc/stop", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin_token)])
+async def stop_tracemalloc():
+    """Stop tracing and drop kept snapshots."""
+    profiling.stop_tracing()
+    return None
+
+@router.post("/tracemalloc/snapshots", dependencies=[Depends(require_admin_token)])
+async def take_tracemalloc_snapshot(limit: int = 25):
+    """Take a snapshot; diff two of them to find what keeps growing."""
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not running")
+    return await run_in_threadpool(profiling.take_snapshot, limit)
+
+@router.get("/tracemalloc/snapshots", dependencies=[Depends(require_admin_token)])
+async def list_tracemalloc_snapshots():
+    """List snapshots kept by this worker."""
+    return {"snapshots": profiling.snapshot_ids(), "pid": os.getpid()}
+
+@router.get("/tracemalloc/diff", dependencies=[Depends(require_admin_token)])
+async def diff_tracemalloc_snapshots(older: str, newer: str, limit: int = 25):
+    """Allocation growth from ``older`` to ``newer``, largest first."""
+    diff = await run_in_threadpool(profiling.diff_snapshots, older, newer, limit)
+    if diff is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found in this worker"
+        )
+    return diff
@@ -82,7 +82,7 @@ async def register(user_data: UserCreate, request: Request, db: Session = Depend
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user)
+        "user": user
     }
 
 @router.post("/login", response_model=Token)
@@ -116,11 +116,11 @@ async def login(user_data: UserLogin, request: Request, db: Session = Depends(ge
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user)
+        "user": user
     }
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information."""
-    return UserResponse.model_validate(current_user)
+    return current_user
 
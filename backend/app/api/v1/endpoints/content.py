@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.archive import archived_contents, restore_wall
+from app.core.credential_cache import lookup_invite, lookup_wall
+from app.core.database import get_db, get_read_db
 from app.models.wall import Wall
 from app.models.contributor import Contributor
 from app.models.content import Content, ContentType
-from app.schemas.content import ContentCreate, ContentResponse
+from app.schemas.content import ContentCreate, ContentCreateResponse, ContentResponse
 from app.core.config import settings
-from typing import Optional, List
+from app.core.ingest import ingest_buffer, post_record, queued_content
+from app.core.metrics import UPLOAD_BYTES
+from app.core.partitioning import wall_contents_criteria
+from app.core.purge import content_file_urls, remove_upload_files
+from app.core.resumable import claim_upload, get_upload, release_upload
+from app.core.security import create_guest_token, verify_guest_token
+from app.core.previews import schedule_preview
+from app.core.snapshots import schedule_snapshot
+from app.core.transcode import transcode_content
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, FrozenSet, Iterable, Optional, List, Tuple
 import os
 import aiofiles
 import secrets
@@ -48,22 +61,86 @@ async def save_upload_file(file: UploadFile) -> str:
                 detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
             )
         await f.write(content)
+    UPLOAD_BYTES.inc(len(content))
     
     # Return relative URL (in production, this would be a full URL)
     return f"/uploads/{filename}"
 
-@router.post("", response_model=ContentResponse, status_code=status.HTTP_201_CREATED)
+def excluded_content_fields(fields: Optional[str] = None) -> Optional[FrozenSet[str]]:
+    """Turn a ``fields=id,image_url,...`` selector into the content fields to leave out.
+    
+    ``id`` is always included. No selector means every field.
+    """
+    if not fields:
+        return None
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - set(ContentResponse.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return frozenset(set(ContentResponse.model_fields) - selected - {"id"})
+
+def content_columns(excluded: FrozenSet[str]) -> list:
+    """Content columns backing the selected fields, so skipped ones aren't even read.
+    
+    ``provisional_id`` is always read to match rows against queued posts;
+    sparse_contents leaves it out of the response.
+    """
+    columns = [getattr(Content, name) for name in ContentResponse.model_fields if name not in excluded]
+    return [*columns, Content.provisional_id]
+
+def sparse_contents(rows: Iterable[dict], excluded: FrozenSet[str]) -> ORJSONResponse:
+    """Serialize content rows (column mappings or archived rows) with just the selected fields."""
+    names = [name for name in ContentResponse.model_fields if name not in excluded]
+    return ORJSONResponse([{name: row[name] for name in names} for row in rows])
+
+def resumable_upload(upload_id: str, wall_id: int) -> dict:
+    """A finished resumable upload for ``wall_id``; 400 if it's missing, incomplete or for another wall."""
+    upload = get_upload(upload_id)
+    if not upload or upload["offset"] != upload["length"] or upload.get("wall_id") != wall_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Upload {upload_id} is missing or incomplete"
+        )
+    return upload
+
+def release_resumable_uploads(claimed: List[Tuple[str, dict, str]]):
+    """Put claimed uploads back so the same ids can be posted again."""
+    for upload_id, upload, path in claimed:
+        release_upload(upload_id, upload, path)
+
+async def claim_resumable_uploads(uploads: Dict[str, dict]) -> List[Tuple[str, dict, str]]:
+    """Move finished uploads into place, all or none; returns (id, upload, path) for each."""
+    claimed = []
+    for upload_id, upload in uploads.items():
+        path = os.path.join(settings.UPLOAD_DIR, generate_filename(upload["filename"]))
+        if not await run_in_threadpool(claim_upload, upload_id, path):
+            await run_in_threadpool(release_resumable_uploads, claimed)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Upload {upload_id} is missing or incomplete"
+            )
+        claimed.append((upload_id, upload, path))
+    return claimed
+
+@router.post("", response_model=ContentCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_content(
+    background_tasks: BackgroundTasks,
+    response: Response,
     wall_id: int = Form(...),
     content_type: ContentType = Form(...),
     text: Optional[str] = Form(None),
     author_name: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
     images: List[UploadFile] = File(default=[]),
+    upload_ids: List[str] = Form(default=[]),
     invite_token: Optional[str] = Form(None),
     wall_url: Optional[str] = Form(None),
     wall_passcode: Optional[str] = Form(None),
     contributor_email: Optional[str] = Form(None),
+    guest_token: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     """Create content on a wall (contributor endpoint).
@@ -71,13 +148,23 @@ async def create_content(
     Supports two authentication methods:
     1. Invite token (existing method)
     2. Wall URL + passcode (new direct access method)
+    
+    Images can be sent inline (image/images) or as the ids of finished
+    resumable uploads (upload_ids, see /uploads).
+    
+    Anonymous posts (no contributor_email) get a guest token in the
+    response; passing it back as guest_token reuses the same contributor.
     """
     contributor = None
     wall = None
+    new_guest_token = None
     
     # Method 1: Using invite token (existing flow)
     if invite_token:
-        contributor = db.query(Contributor).filter(Contributor.invite_token == invite_token).first()
+        invite = lookup_invite(db, invite_token)
+        if invite:
+            restore_wall(db, invite.wall_id)
+        contributor = db.get(Contributor, invite.contributor_id) if invite else None
         if not contributor:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -88,36 +175,47 @@ async def create_content(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Contributor access revoked"
             )
-        wall = db.query(Wall).filter(Wall.id == contributor.wall_id).first()
+        wall = db.get(Wall, contributor.wall_id)
     
     # Method 2: Using wall URL + passcode (new direct access flow)
     elif wall_url and wall_passcode:
-        wall = db.query(Wall).filter(Wall.unique_url == wall_url).first()
-        if not wall:
+        credentials = lookup_wall(db, wall_url)
+        if not credentials:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Wall not found"
             )
-        if wall.passcode != wall_passcode:
+        if credentials.passcode != wall_passcode:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid passcode"
             )
+        wall = db.get(Wall, credentials.id)
+        if not wall:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Wall not found"
+            )
+        restore_wall(db, wall.id)
         
         # Create or get contributor automatically
-        # Use email if provided, otherwise use a placeholder
-        email = contributor_email or f"guest_{datetime.utcnow().timestamp()}@wishingwall.local"
-        
-        # Check if contributor already exists for this email and wall
-        contributor = db.query(Contributor).filter(
-            Contributor.email == email,
-            Contributor.wall_id == wall.id
-        ).first()
+        # Use email if provided, otherwise the guest the token was issued to
+        if contributor_email:
+            contributor = db.query(Contributor).filter(
+                Contributor.email == contributor_email,
+                Contributor.wall_id == wall.id
+            ).first()
+        elif guest_token:
+            guest_id = verify_guest_token(guest_token, wall.id)
+            if guest_id is not None:
+                contributor = db.query(Contributor).filter(
+                    Contributor.id == guest_id,
+                    Contributor.wall_id == wall.id
+                ).first()
         
         if not contributor:
+            email = contributor_email or f"guest_{secrets.token_hex(8)}@wishingwall.local"
             # Create new contributor automatically
-            import secrets
-            import string
             invite_token_new = secrets.token_urlsafe(32)
             contributor = Contributor(
                 email=email,
@@ -128,6 +226,10 @@ async def create_content(
             db.add(contributor)
             db.commit()
             db.refresh(contributor)
+            if not contributor_email:
+                new_guest_token = create_guest_token(contributor.id, wall.id)
+                # Carries a fresh credential: not for caches or idempotent replays
+                response.headers["Cache-Control"] = "no-store"
         elif not contributor.is_active:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -161,35 +263,36 @@ async def create_content(
             detail="Not authorized to post to this wall"
         )
     
-    # Validate content type and required fields
-    image_url = None
-    image_urls = None
+    # Validate content type and required fields before storing any image,
+    # so a rejected post leaves its resumable uploads in place for a retry
+    single_image = content_type == ContentType.IMAGE or content_type == ContentType.TEXT_IMAGE
+    multiple_images = content_type == ContentType.IMAGES or content_type == ContentType.IMAGES_TEXT
     
     # Handle single image types (backward compatibility)
-    if content_type == ContentType.IMAGE or content_type == ContentType.TEXT_IMAGE:
-        if not image:
+    if single_image:
+        if len(upload_ids) + (1 if image else 0) > 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only one image is allowed for this content type"
+            )
+        if not image and not upload_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Image is required for this content type"
             )
-        image_url = await save_upload_file(image)
     
     # Handle multiple images types
-    elif content_type == ContentType.IMAGES or content_type == ContentType.IMAGES_TEXT:
-        if not images or len(images) == 0:
+    elif multiple_images:
+        if len(images) + len(upload_ids) == 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="At least one image is required for this content type"
             )
-        if len(images) > 20:  # Limit to 20 images max
+        if len(images) + len(upload_ids) > 20:  # Limit to 20 images max
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Maximum 20 images allowed"
             )
-        image_urls = []
-        for img in images:
-            url = await save_upload_file(img)
-            image_urls.append(url)
     
     # Validate text requirements
     if content_type == ContentType.TEXT or content_type == ContentType.TEXT_IMAGE:
@@ -205,33 +308,77 @@ async def create_content(
                 detail="Text is required for images with text content type"
             )
     
+    uploads = {}
+    if single_image or multiple_images:
+        if len(set(upload_ids)) != len(upload_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Duplicate upload ids"
+            )
+        uploads = {upload_id: resumable_upload(upload_id, wall.id) for upload_id in upload_ids}
+    
     # Mark contributor as accepted if not already (for invite token flow)
     if not contributor.accepted_at:
         contributor.accepted_at = datetime.utcnow()
         db.commit()
     
-    # Create content
-    content = Content(
-        wall_id=wall_id,
-        contributor_id=contributor.id,
-        content_type=content_type,
-        text=text,
-        image_url=image_url,
-        image_urls=image_urls,
-        author_name=author_name
-    )
-    db.add(content)
-    db.commit()
+    image_urls = []
+    for img in images if multiple_images else [image] if single_image and image else []:
+        image_urls.append(await save_upload_file(img))
+    claimed = await claim_resumable_uploads(uploads)
+    image_urls.extend(f"/uploads/{os.path.basename(path)}" for _, _, path in claimed)
+    image_url = image_urls[0] if single_image else None
+    image_urls = image_urls if multiple_images else None
+    
+    buffered = ingest_buffer.running
+    try:
+        if buffered:
+            # Acknowledged once journaled; the flusher inserts it along with others
+            record = post_record(wall, contributor.id, content_type, text, image_url, image_urls, author_name)
+            # Hand the connection back rather than holding it while the journal syncs
+            db.close()
+            await ingest_buffer.enqueue(record)
+        else:
+            # Create content
+            content = Content(
+                wall_id=wall_id,
+                contributor_id=contributor.id,
+                content_type=content_type,
+                text=text,
+                image_url=image_url,
+                image_urls=image_urls,
+                author_name=author_name
+            )
+            db.add(content)
+            db.commit()
+    except BaseException:
+        # Not posted after all: the same upload ids can be retried
+        await run_in_threadpool(release_resumable_uploads, claimed)
+        raise
+    
+    if buffered:
+        return {**queued_content(record), "guest_token": new_guest_token}
+    
     db.refresh(content)
+    schedule_snapshot(wall.id, wall.unique_url)
+    schedule_preview(wall.id)
+    
+    # Animated GIFs get video variants after the response has gone out
+    uploaded = [image_url] if image_url else (image_urls or [])
+    if any(url.lower().endswith(".gif") for url in uploaded):
+        background_tasks.add_task(transcode_content, content.id)
     
-    return ContentResponse.model_validate(content)
+    # Not a column: response_model reads it along with the rest
+    content.guest_token = new_guest_token
+    return content
 
 @router.get("/wall/{wall_id}", response_model=list[ContentResponse])
 async def get_wall_contents(
     wall_id: int,
-    db: Session = Depends(get_db)
+    excluded: Optional[FrozenSet[str]] = Depends(excluded_content_fields),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all contents for a wall."""
+    """Get all contents for a wall; ``fields`` limits each item to the listed fields."""
     wall = db.query(Wall).filter(Wall.id == wall_id).first()
     if not wall:
         raise HTTPException(
@@ -239,27 +386,53 @@ async def get_wall_contents(
             detail="Wall not found"
         )
     
-    contents = db.query(Content).filter(Content.wall_id == wall_id).order_by(Content.created_at.desc()).all()
-    return [ContentResponse.model_validate(content) for content in contents]
+    if wall.archive_key:
+        contents = sorted(archived_contents(wall), key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        return sparse_contents(contents, excluded) if excluded else contents
+    query = (
+        db.query(*(content_columns(excluded) if excluded else [Content]))
+        .filter(*wall_contents_criteria(wall))
+        # Buffered posts inserted together share a created_at
+        .order_by(Content.created_at.desc(), Content.id.desc())
+    )
+    if excluded:
+        rows = [row._asdict() for row in query]
+        queued = ingest_buffer.queued_contents(wall.id, inserted=(row["provisional_id"] for row in rows))
+        return sparse_contents([*reversed(queued), *rows], excluded)
+    contents = query.all()
+    # Posts this worker hasn't inserted yet are the newest
+    queued = ingest_buffer.queued_contents(wall.id, inserted=(content.provisional_id for content in contents))
+    return [*reversed(queued), *contents]
 
 @router.delete("/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_content(
     content_id: int,
+    background_tasks: BackgroundTasks,
     invite_token: Optional[str] = None,
     wall_url: Optional[str] = None,
     wall_passcode: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Delete content (contributor can delete their own content)."""
+    """Delete content (contributor can delete their own content).
+    
+    Provisional ids from buffered ingestion are accepted too.
+    """
     contributor = None
+    if content_id < 0 and ingest_buffer.is_queued(content_id):
+        await ingest_buffer.flush()
+    selected = Content.provisional_id == content_id if content_id < 0 else Content.id == content_id
     
     if invite_token:
-        contributor = db.query(Contributor).filter(Contributor.invite_token == invite_token).first()
+        invite = lookup_invite(db, invite_token)
+        if invite:
+            restore_wall(db, invite.wall_id)
+            contributor = db.get(Contributor, invite.contributor_id)
     elif wall_url and wall_passcode:
-        wall = db.query(Wall).filter(Wall.unique_url == wall_url).first()
-        if wall and wall.passcode == wall_passcode:
+        credentials = lookup_wall(db, wall_url)
+        if credentials and credentials.passcode == wall_passcode:
+            restore_wall(db, credentials.id)
             # Find contributor by content
-            content = db.query(Content).filter(Content.id == content_id).first()
+            content = db.query(Content).filter(selected).execution_options(include_hidden=True).first()
             if content:
                 contributor = db.query(Contributor).filter(Contributor.id == content.contributor_id).first()
     
@@ -269,7 +442,7 @@ async def delete_content(
             detail="Invalid authentication"
         )
     
-    content = db.query(Content).filter(Content.id == content_id).first()
+    content = db.query(Content).filter(selected).execution_options(include_hidden=True).first()
     if not content:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -283,19 +456,13 @@ async def delete_content(
             detail="Not authorized to delete this content"
         )
     
-    # Delete image files if exist
-    if content.image_url:
-        file_path = content.image_url.lstrip('/')
-        if os.path.exists(file_path):
-            os.remove(file_path)
-    
-    if content.image_urls:
-        for url in content.image_urls:
-            file_path = url.lstrip('/')
-            if os.path.exists(file_path):
-                os.remove(file_path)
-    
+    # Files go after the response, once the row is gone
+    file_urls = content_file_urls(content.image_url, content.image_urls, content.media_variants)
+    wall = content.wall
     db.delete(content)
     db.commit()
+    background_tasks.add_task(remove_upload_files, file_urls)
+    schedule_snapshot(wall.id, wall.unique_url)
+    schedule_preview(wall.id)
     return None
 
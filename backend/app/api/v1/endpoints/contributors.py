@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, joinedload
+from typing import FrozenSet, Optional
+from app.core.archive import archived_contents, archived_contributor, archived_counts, archived_rows, restore_wall
+from app.core.credential_cache import invalidate_invite, lookup_invite, lookup_wall
+from app.core.database import get_db, get_read_db
+from app.core.ingest import ingest_buffer
+from app.core.previews import schedule_preview
+from app.core.snapshots import schedule_snapshot
 from app.api.v1.endpoints.auth import get_current_user
 from app.models.user import User
 from app.models.wall import Wall
-from app.models.contributor import Contributor
+from app.models.contributor import ArchivedContributor, Contributor
+from app.models.content import Content
+from app.core.purge import content_file_urls, remove_upload_files
+from app.core.security import verify_guest_token
+from app.core.wall_counts import content_count, contributor_count
+from app.api.v1.endpoints.content import excluded_content_fields
 from app.schemas.contributor import ContributorCreate, ContributorResponse, ContributorInvite
+from app.schemas.wall import ContributeBootstrap
 import secrets
 import string
 from app.core.email import send_contributor_invite
@@ -35,6 +49,7 @@ async def invite_contributor(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to invite contributors to this wall"
         )
+    restore_wall(db, wall.id)
     
     # Check if contributor already exists
     existing = db.query(Contributor).filter(
@@ -71,7 +86,7 @@ async def invite_contributor(
         # Log error but don't fail the request
         print(f"Failed to send invite email: {e}")
     
-    return ContributorResponse.model_validate(contributor)
+    return contributor
 
 @router.get("/wall/{wall_id}", response_model=list[ContributorResponse])
 async def get_wall_contributors(
@@ -92,16 +107,21 @@ async def get_wall_contributors(
             detail="Not authorized to view contributors for this wall"
         )
     
-    contributors = db.query(Contributor).filter(Contributor.wall_id == wall_id).all()
-    return [ContributorResponse.model_validate(c) for c in contributors]
+    if wall.archive_key:
+        return archived_rows(wall)["contributors"]
+    return db.query(Contributor).filter(Contributor.wall_id == wall_id).all()
 
 @router.delete("/{contributor_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_contributor(
     contributor_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Remove a contributor from a wall."""
+    archived = db.get(ArchivedContributor, contributor_id)
+    if archived and db.query(Wall.admin_id).filter(Wall.id == archived.wall_id).scalar() == current_user.id:
+        restore_wall(db, archived.wall_id)
     contributor = db.query(Contributor).filter(Contributor.id == contributor_id).first()
     if not contributor:
         raise HTTPException(
@@ -116,21 +136,128 @@ async def remove_contributor(
             detail="Not authorized to remove this contributor"
         )
     
-    db.delete(contributor)
+    # Read before the delete expires the instance
+    invite_token = contributor.invite_token
+    # Set-based delete: contents are never loaded as objects, only their file URLs
+    file_urls = [
+        url
+        for image_url, image_urls, media_variants in db.query(
+            Content.image_url, Content.image_urls, Content.media_variants
+        ).filter(Content.contributor_id == contributor_id).execution_options(include_hidden=True)
+        for url in content_file_urls(image_url, image_urls, media_variants)
+    ]
+    db.query(Content).filter(Content.contributor_id == contributor_id).delete(synchronize_session=False)
+    db.query(Contributor).filter(Contributor.id == contributor_id).delete(synchronize_session=False)
     db.commit()
+    invalidate_invite(invite_token)
+    background_tasks.add_task(remove_upload_files, file_urls)
+    schedule_snapshot(wall.id, wall.unique_url)
+    schedule_preview(wall.id)
     return None
 
 @router.get("/verify/{invite_token}", response_model=ContributorResponse)
 async def verify_invite_token(
     invite_token: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Verify an invite token and get contributor info."""
-    contributor = db.query(Contributor).filter(Contributor.invite_token == invite_token).first()
+    invite = lookup_invite(db, invite_token)
+    contributor = db.get(Contributor, invite.contributor_id) if invite else None
+    if invite and not contributor:
+        contributor = archived_contributor(db, invite.wall_id, invite.contributor_id)
     if not contributor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Invalid invite token"
         )
-    return ContributorResponse.model_validate(contributor)
+    return contributor
 
+@router.get("/bootstrap", response_model=ContributeBootstrap)
+async def get_contribute_bootstrap(
+    invite_token: Optional[str] = None,
+    wall_url: Optional[str] = None,
+    passcode: Optional[str] = None,
+    guest_token: Optional[str] = None,
+    excluded: Optional[FrozenSet[str]] = Depends(excluded_content_fields),
+    db: Session = Depends(get_read_db)
+):
+    """The wall, the caller's contributor, counts and own posts for the contribute page, in one query.
+    
+    Authenticates like create_content: an invite token, or the wall URL and
+    passcode plus the guest token from earlier anonymous posts, if any.
+    """
+    if invite_token:
+        invite = lookup_invite(db, invite_token)
+        if not invite:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invalid invite token"
+            )
+        wall_id, contributor_id = invite.wall_id, invite.contributor_id
+    elif wall_url and passcode:
+        credentials = lookup_wall(db, wall_url)
+        if not credentials:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Wall not found"
+            )
+        if credentials.passcode != passcode:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid passcode"
+            )
+        wall_id = credentials.id
+        contributor_id = verify_guest_token(guest_token, wall_id) if guest_token else None
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either invite_token or (wall_url + passcode) must be provided"
+        )
+    
+    row = (
+        db.query(Wall, Contributor, content_count(), contributor_count())
+        .outerjoin(Contributor, and_(Contributor.wall_id == Wall.id, Contributor.id == contributor_id))
+        .options(joinedload(Contributor.contents))
+        .filter(Wall.id == wall_id)
+        .execution_options(include_hidden=True)
+        .first()
+    )
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wall not found"
+        )
+    wall, contributor, contents, contributors = row
+    if wall.archive_key:
+        contributor = next(
+            (row for row in archived_rows(wall)["contributors"] if row["id"] == contributor_id), None
+        )
+        own_posts = sorted(
+            (row for row in archived_contents(wall) if row["contributor_id"] == contributor_id),
+            key=lambda row: (row["created_at"], row["id"]),
+            reverse=True,
+        )
+        counts = archived_counts(wall)
+    else:
+        own_posts = sorted(
+            (content for content in contributor.contents if not content.is_hidden) if contributor else [],
+            key=lambda content: (content.created_at, content.id),
+            reverse=True,
+        )
+        # Posts this worker hasn't inserted yet
+        queued = ingest_buffer.queued_contents(wall.id, inserted=(content.provisional_id for content in own_posts))
+        if contributor:
+            own_posts[:0] = reversed([content for content in queued if content["contributor_id"] == contributor.id])
+        counts = {"contents": contents + len(queued), "contributors": contributors}
+    if invite_token and contributor is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid invite token"
+        )
+    
+    bootstrap = ContributeBootstrap.model_validate(
+        {"wall": wall, "contributor": contributor, "counts": counts, "own_posts": own_posts}, from_attributes=True
+    )
+    if excluded:
+        return ORJSONResponse(bootstrap.model_dump(mode="json", exclude={"own_posts": {"__all__": set(excluded)}}))
+    return bootstrap
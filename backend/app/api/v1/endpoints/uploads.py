@@ -0,0 +1,187 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from email.utils import formatdate
+from typing import Optional
+from app.core.config import settings
+from app.core.credential_cache import lookup_invite, lookup_wall
+from app.core.database import get_db
+from app.core.metrics import UPLOAD_BYTES
+from app.core.security import verify_guest_token
+from app.core import resumable
+import base64
+import binascii
+
+router = APIRouter()
+
+TUS_VERSION = "1.0.0"
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def _parse_metadata(header: Optional[str]) -> dict:
+    """Decode a tus ``Upload-Metadata`` header (``key base64value,...``)."""
+    metadata = {}
+    for pair in (header or "").split(","):
+        key, _, value = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value).decode() if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Upload-Metadata")
+    return metadata
+
+def _upload_headers(upload: dict) -> dict:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(upload["offset"]),
+        "Upload-Length": str(upload["length"]),
+        "Upload-Expires": formatdate(upload["expires_at"], usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+def _authorized_wall_id(db: Session, metadata: dict) -> int:
+    """Wall the uploader may post to, from the same credentials create_content takes."""
+    if metadata.get("invite_token"):
+        invite = lookup_invite(db, metadata["invite_token"])
+        if not invite or not invite.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid invite token"
+            )
+        return invite.wall_id
+    credentials = lookup_wall(db, metadata["wall_url"]) if metadata.get("wall_url") else None
+    if credentials and (
+        (metadata.get("wall_passcode") and metadata["wall_passcode"] == credentials.passcode)
+        or (metadata.get("guest_token") and verify_guest_token(metadata["guest_token"], credentials.id) is not None)
+    ):
+        return credentials.id
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Upload-Metadata must carry invite_token, or wall_url with wall_passcode or guest_token"
+    )
+
+def _get_upload_or_404(upload_id: str) -> dict:
+    upload = resumable.get_upload(upload_id)
+    if not upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return upload
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    request: Request,
+    response: Response,
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Start a resumable upload; send its bytes with PATCH, then pass the id to create_content.
+
+    ``Upload-Metadata`` carries the poster's credentials, as for create_content:
+    ``invite_token``, or ``wall_url`` with ``wall_passcode`` or ``guest_token``.
+    The upload can only be attached to a post on that wall. It may also carry
+    ``filename`` and ``filetype`` (tus) or ``content_type``.
+    """
+    metadata = _parse_metadata(upload_metadata)
+    wall_id = _authorized_wall_id(db, metadata)
+    content_type = metadata.get("filetype") or metadata.get("content_type")
+    if content_type not in settings.ALLOWED_IMAGE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
+        )
+    if upload_length <= 0 or upload_length > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
+        )
+
+    client = request.client.host if request.client else "unknown"
+    # Partial bytes survive disconnects, so each client's unfinished uploads are capped
+    reserved = await run_in_threadpool(resumable.reserved_bytes, client)
+    if reserved + upload_length > settings.UPLOAD_PARTIAL_MAX_BYTES_PER_CLIENT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many unfinished uploads. Finish or delete some first."
+        )
+
+    upload_id = await run_in_threadpool(
+        resumable.create_upload, upload_length, content_type, metadata.get("filename"), wall_id, client
+    )
+    upload = _get_upload_or_404(upload_id)
+    response.headers.update(_upload_headers(upload))
+    response.headers["Location"] = f"{str(request.url).rstrip('/')}/{upload_id}"
+    return {"upload_id": upload_id, "offset": upload["offset"], "length": upload["length"]}
+
+@router.head("/{upload_id}")
+async def get_upload_offset(upload_id: str):
+    """Report how many bytes of an upload have been received."""
+    upload = _get_upload_or_404(upload_id)
+    return Response(status_code=status.HTTP_200_OK, headers=_upload_headers(upload))
+
+@router.patch("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    content_type: Optional[str] = Header(None),
+):
+    """Append a chunk at ``Upload-Offset``.
+
+    Bytes that arrive before a dropped connection are kept, so the client
+    resumes from the offset HEAD reports instead of starting over.
+    """
+    if content_type != "application/offset+octet-stream":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type must be application/offset+octet-stream"
+        )
+    upload = _get_upload_or_404(upload_id)
+    try:
+        with resumable.open_for_append(upload_id) as f:
+            offset = f.tell()
+            if upload_offset != offset:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload-Offset does not match the upload",
+                    headers={"Upload-Offset": str(offset)},
+                )
+            remaining = upload["length"] - offset
+            buffer = bytearray()
+            try:
+                async for chunk in request.stream():
+                    if len(chunk) > remaining - len(buffer):
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Chunk exceeds Upload-Length"
+                        )
+                    buffer.extend(chunk)
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        await run_in_threadpool(f.write, bytes(buffer))
+                        remaining -= len(buffer)
+                        UPLOAD_BYTES.inc(len(buffer))
+                        buffer.clear()
+            except ClientDisconnect:
+                pass
+            finally:
+                # Keep whatever was received, even when the request failed midway
+                if buffer:
+                    await run_in_threadpool(f.write, bytes(buffer))
+                    UPLOAD_BYTES.inc(len(buffer))
+    except BlockingIOError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being written by another request"
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+    upload = _get_upload_or_404(upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_upload_headers(upload))
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_upload(upload_id: str):
+    """Abandon an upload."""
+    if not await run_in_threadpool(resumable.delete_upload, upload_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return None
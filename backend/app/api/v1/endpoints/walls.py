@@ -1,16 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import func
+from datetime import datetime, timedelta, timezone
+from typing import FrozenSet, Literal, Optional
+from urllib.parse import quote
+from app.core.analytics import record_view, wall_analytics
+from app.core.archive import archived_contents, archived_counts, archived_rows, restore_wall
+from app.core.config import settings
+from app.core.credential_cache import invalidate_wall, lookup_wall
+from app.core.database import get_db, get_read_db
+from app.core.ingest import ingest_buffer
+from app.core.partitioning import wall_contents_criteria
+from app.core.previews import ensure_preview, preview_path, schedule_preview
+from app.core.purge import content_file_urls, purge_wall, remove_upload_files
+from app.core.snapshots import schedule_snapshot
+from app.core.wall_cache import public_wall_cache, serialize_public_wall, wall_version
+from app.core.wall_counts import content_count, contributor_count
+from app.api.media import IMMUTABLE_CACHE_CONTROL
 from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.content import content_columns, excluded_content_fields, sparse_contents
+from app.models.content import Content
 from app.models.user import User
 from app.models.wall import Wall
-from app.schemas.wall import WallCreate, WallUpdate, WallResponse, WallPublicResponse
-from app.schemas.content import ContentResponse
+from app.schemas.content import ContentModeration, ContentResponse, ModerationResult
+from app.schemas.wall import (
+    AdminWallBootstrap, WallAnalytics, WallCreate, WallUpdate, WallResponse, WallPublicResponse,
+)
+import os
+import re
 import secrets
 import string
 
 router = APIRouter()
 
+ANALYTICS_INTERVALS = {"hour": 3600, "day": 86400}
+WALL_VERSION_PATTERN = re.compile(r"[0-9a-f]{16}")
+
 def generate_unique_url() -> str:
     """Generate a unique URL slug for a wall."""
     alphabet = string.ascii_letters + string.digits
@@ -31,8 +57,8 @@ async def create_wall(
     unique_url = generate_unique_url()
     passcode = generate_passcode()
     
-    # Ensure URL is unique
-    while db.query(Wall).filter(Wall.unique_url == unique_url).first():
+    # Ensure URL is unique (walls still being purged keep theirs)
+    while db.query(Wall).filter(Wall.unique_url == unique_url).execution_options(include_deleted=True).first():
         unique_url = generate_unique_url()
     
     wall = Wall(
@@ -45,8 +71,9 @@ async def create_wall(
     db.add(wall)
     db.commit()
     db.refresh(wall)
+    invalidate_wall(unique_url)  # Drop any negative entry from earlier probes
     
-    return WallResponse.model_validate(wall)
+    return wall
 
 @router.get("", response_model=list[WallResponse])
 async def get_my_walls(
@@ -54,8 +81,7 @@ async def get_my_walls(
     db: Session = Depends(get_db)
 ):
     """Get all walls created by the current user."""
-    walls = db.query(Wall).filter(Wall.admin_id == current_user.id).all()
-    return [WallResponse.model_validate(wall) for wall in walls]
+    return db.query(Wall).filter(Wall.admin_id == current_user.id).all()
 
 @router.get("/{wall_id}", response_model=WallResponse)
 async def get_wall(
@@ -75,7 +101,7 @@ async def get_wall(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this wall"
         )
-    return WallResponse.model_validate(wall)
+    return wall
 
 @router.put("/{wall_id}", response_model=WallResponse)
 async def update_wall(
@@ -106,15 +132,23 @@ async def update_wall(
     
     db.commit()
     db.refresh(wall)
-    return WallResponse.model_validate(wall)
+    invalidate_wall(wall.unique_url)
+    schedule_snapshot(wall.id, wall.unique_url)
+    schedule_preview(wall.id)
+    return wall
 
 @router.delete("/{wall_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_wall(
     wall_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a wall."""
+    """Delete a wall.
+    
+    The wall disappears immediately; its contents, contributors and files are
+    purged in bounded batches after the response is sent.
+    """
     wall = db.query(Wall).filter(Wall.id == wall_id).first()
     if not wall:
         raise HTTPException(
@@ -127,54 +161,263 @@ async def delete_wall(
             detail="Not authorized to delete this wall"
         )
     
-    db.delete(wall)
+    wall.deleted_at = func.now()
     db.commit()
+    public_wall_cache.invalidate(wall_id)
+    invalidate_wall(wall.unique_url)
+    schedule_snapshot(wall_id, wall.unique_url)
+    background_tasks.add_task(purge_wall, wall_id)
     return None
 
-@router.get("/public/{unique_url}", response_model=WallPublicResponse)
-async def get_public_wall(
-    unique_url: str,
-    passcode: str,
+def get_admin_wall(db: Session, wall_id: int, user: User) -> Wall:
+    """Load a wall the user administers, or raise 404/403."""
+    wall = db.query(Wall).filter(Wall.id == wall_id).first()
+    if not wall:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wall not found"
+        )
+    if wall.admin_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to moderate this wall"
+        )
+    return wall
+
+@router.post("/{wall_id}/moderation", response_model=ModerationResult)
+async def moderate_contents(
+    wall_id: int,
+    moderation: ContentModeration,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get a public wall by unique URL and passcode."""
-    wall = db.query(Wall).filter(Wall.unique_url == unique_url).first()
-    if not wall:
+    """Delete, hide or unhide many of a wall's contents in one statement.
+    
+    Contents are selected by ids, contributor and/or creation time range;
+    all given filters must match.
+    """
+    wall = get_admin_wall(db, wall_id, current_user)
+    restore_wall(db, wall.id)
+    selectors = []
+    if moderation.content_ids is not None:
+        selectors.append(Content.id.in_(moderation.content_ids))
+    if moderation.contributor_id is not None:
+        selectors.append(Content.contributor_id == moderation.contributor_id)
+    if moderation.created_after is not None:
+        selectors.append(Content.created_at >= moderation.created_after)
+    if moderation.created_before is not None:
+        selectors.append(Content.created_at < moderation.created_before)
+    if not selectors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select contents by content_ids, contributor_id or a created_after/created_before range"
+        )
+    
+    query = db.query(Content).filter(*wall_contents_criteria(wall), *selectors).execution_options(include_hidden=True)
+    if moderation.action == "delete":
+        file_urls = [
+            url
+            for image_url, image_urls, media_variants in query.with_entities(
+                Content.image_url, Content.image_urls, Content.media_variants
+            )
+            for url in content_file_urls(image_url, image_urls, media_variants)
+        ]
+        affected = query.delete(synchronize_session=False)
+        db.commit()
+        # Rows added between the two statements lose their files to the orphan GC instead
+        background_tasks.add_task(remove_upload_files, file_urls)
+    else:
+        affected = query.update({Content.is_hidden: moderation.action == "hide"}, synchronize_session=False)
+        db.commit()
+    
+    if affected:
+        schedule_snapshot(wall.id, wall.unique_url)
+        schedule_preview(wall.id)
+    return {"action": moderation.action, "affected": affected}
+
+@router.get("/{wall_id}/hidden-contents", response_model=list[ContentResponse])
+async def get_hidden_contents(
+    wall_id: int,
+    excluded: Optional[FrozenSet[str]] = Depends(excluded_content_fields),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List contents hidden by moderation, newest first."""
+    wall = get_admin_wall(db, wall_id, current_user)
+    if wall.archive_key:
+        contents = sorted(archived_contents(wall, hidden=True), key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        return sparse_contents(contents, excluded) if excluded else contents
+    query = (
+        db.query(*(content_columns(excluded) if excluded else [Content]))
+        .filter(*wall_contents_criteria(wall), Content.is_hidden.is_(True))
+        .execution_options(include_hidden=True)
+        .order_by(Content.created_at.desc(), Content.id.desc())
+    )
+    if excluded:
+        return sparse_contents((row._asdict() for row in query), excluded)
+    return query.all()
+
+@router.get("/{wall_id}/bootstrap", response_model=AdminWallBootstrap)
+async def get_admin_wall_bootstrap(
+    wall_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The wall, its contributors and counts for the admin page, loaded in one query."""
+    row = (
+        db.query(
+            Wall,
+            content_count(),
+            content_count(hidden=True),
+            contributor_count(),
+            contributor_count(active_only=True),
+        )
+        .options(joinedload(Wall.contributors))
+        .filter(Wall.id == wall_id)
+        .execution_options(include_hidden=True)
+        .first()
+    )
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wall not found"
+        )
+    wall, contents, hidden_contents, contributors, active_contributors = row
+    if wall.admin_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this wall"
+        )
+    if wall.archive_key:
+        return {"wall": wall, "contributors": archived_rows(wall)["contributors"], "counts": archived_counts(wall)}
+    return {
+        "wall": wall,
+        "contributors": sorted(wall.contributors, key=lambda contributor: contributor.id),
+        "counts": {
+            "contents": contents,
+            "hidden_contents": hidden_contents,
+            "contributors": contributors,
+            "active_contributors": active_contributors,
+        },
+    }
+
+@router.get("/{wall_id}/analytics", response_model=WallAnalytics)
+async def get_wall_analytics(
+    wall_id: int,
+    days: int = 30,
+    interval: Literal["hour", "day"] = "day",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Public views and unique visitors over the last ``days``, per hour or day (UTC)."""
+    if not 1 <= days <= 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="days must be between 1 and 366"
+        )
+    get_admin_wall(db, wall_id, current_user)
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return wall_analytics(db, wall_id, since, ANALYTICS_INTERVALS[interval])
+
+def get_passcode_wall(db: Session, unique_url: str, passcode: str) -> Wall:
+    """Load a wall by URL and passcode, or raise 404/401."""
+    credentials = lookup_wall(db, unique_url)
+    if not credentials:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Wall not found"
         )
-    if wall.passcode != passcode:
+    if credentials.passcode != passcode:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid passcode"
         )
+    wall = db.get(Wall, credentials.id)
+    if not wall:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wall not found"
+        )
+    return wall
+
+@router.get("/public/{unique_url}", response_model=WallPublicResponse)
+async def get_public_wall(
+    unique_url: str,
+    passcode: str,
+    request: Request,
+    excluded: Optional[FrozenSet[str]] = Depends(excluded_content_fields),
+    db: Session = Depends(get_read_db)
+):
+    """Get a public wall by unique URL and passcode; ``fields`` limits each content item."""
+    wall = get_passcode_wall(db, unique_url, passcode)
+    # Buffered in memory and flushed in batches by analytics_flush_loop
+    client = request.client.host if request.client else "unknown"
+    record_view(wall.id, f"{client}|{request.headers.get('user-agent', '')}")
     
-    # Get all contents for this wall
-    contents = wall.contents
-    contents_data = [ContentResponse.model_validate(content) for content in contents]
+    queued = ingest_buffer.queued_contents(wall.id)
+    if queued:
+        # Not cacheable: the wall version doesn't cover posts that aren't inserted yet
+        return Response(
+            content=serialize_public_wall(wall, excluded, queued),
+            media_type="application/json",
+            headers={"Cache-Control": "private, no-cache"},
+        )
     
-    response = WallPublicResponse.model_validate(wall)
-    response.contents = contents_data
-    return response
+    # Serialize (and compress) once per wall version rather than once per request
+    version = wall_version(db, wall)
+    cached = public_wall_cache.get(wall.id, version, excluded)
+    if cached is None:
+        cached = public_wall_cache.put(wall.id, version, serialize_public_wall(wall, excluded), excluded)
+    return await cached.to_response(request)
 
-@router.get("/verify/{unique_url}", response_model=WallResponse)
-async def verify_wall_access(
+@router.get("/public/{unique_url}/preview.jpg")
+async def get_wall_preview(
     unique_url: str,
     passcode: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Verify wall access for contributor page (URL + passcode)."""
-    wall = db.query(Wall).filter(Wall.unique_url == unique_url).first()
-    if not wall:
+    """Redirect to the Open Graph preview image of the wall's current version."""
+    wall = get_passcode_wall(db, unique_url, passcode)
+    version = wall_version(db, wall)
+    if settings.PREVIEWS_ENABLED and not os.path.exists(preview_path(wall.id, version)):
+        # Usually rendered already by schedule_preview; otherwise once per worker
+        version = await ensure_preview(wall.id)
+    if not settings.PREVIEWS_ENABLED or version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Wall not found"
+            detail="Preview not found"
         )
-    if wall.passcode != passcode:
+    # Relative, so it resolves against whatever host and prefix the request came through
+    return RedirectResponse(
+        f"preview/{version}.jpg?passcode={quote(passcode)}",
+        status_code=status.HTTP_302_FOUND,
+        headers={"Cache-Control": "public, max-age=60"},
+    )
+
+@router.get("/public/{unique_url}/preview/{version}.jpg")
+async def get_wall_preview_image(
+    unique_url: str,
+    version: str,
+    passcode: str,
+    db: Session = Depends(get_read_db)
+):
+    """A rendered preview image; each version's image never changes."""
+    wall = get_passcode_wall(db, unique_url, passcode)
+    path = preview_path(wall.id, version)
+    if not WALL_VERSION_PATTERN.fullmatch(version) or not os.path.exists(path):
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid passcode"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Preview not found"
         )
-    return WallResponse.model_validate(wall)
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@router.get("/verify/{unique_url}", response_model=WallResponse)
+async def verify_wall_access(
+    unique_url: str,
+    passcode: str,
+    db: Session = Depends(get_read_db)
+):
+    """Verify wall access for contributor page (URL + passcode)."""
+    return get_passcode_wall(db, unique_url, passcode)
 
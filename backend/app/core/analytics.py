@@ -0,0 +1,192 @@
+"""Public wall view analytics.
+
+get_public_wall records each view in a per-worker buffer keyed by
+(wall, ANALYTICS_BUCKET_SECONDS window): a view count plus a HyperLogLog
+sketch of visitors (client address and user agent), so unique visitors
+cost a fixed 2**HLL_PRECISION bytes per bucket however many there are.
+Every ANALYTICS_FLUSH_SECONDS the buffer is written to wall_view_buckets
+in one batch; workers' sketches for the same bucket merge losslessly.
+
+Views reach the table up to one flush interval late, and views served
+from static snapshots or after a hard crash aren't counted.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.analytics import WallViewBucket
+from app.models.wall import Wall
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+class HyperLogLog:
+    """Approximate distinct counter with one-byte registers."""
+
+    def __init__(self, registers: Optional[bytes] = None):
+        self.registers = bytearray(registers or HLL_REGISTERS)
+
+    def add(self, value: str):
+        x = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = x >> (64 - HLL_PRECISION)
+        rest = x & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = 64 - HLL_PRECISION - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = HLL_REGISTERS
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while most registers are empty
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        return cls(zlib.decompress(data) if data else None)
+
+Key = Tuple[int, datetime]
+
+_pending: Dict[Key, list] = {}  # key -> [views, HyperLogLog]
+_lock = threading.Lock()
+
+def bucket_start(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts - ts % settings.ANALYTICS_BUCKET_SECONDS, timezone.utc)
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _add_pending(key: Key, views: int, visitors: HyperLogLog):
+    entry = _pending.get(key)
+    if entry is None:
+        _pending[key] = [views, visitors]
+    else:
+        entry[0] += views
+        entry[1].merge(visitors)
+
+def record_view(wall_id: int, visitor: str):
+    """Count a public wall view; no I/O."""
+    if not settings.ANALYTICS_ENABLED:
+        return
+    key = (wall_id, bucket_start(time.time()))
+    with _lock:
+        entry = _pending.get(key)
+        if entry is None:
+            entry = _pending[key] = [0, HyperLogLog()]
+        entry[0] += 1
+        entry[1].add(visitor)
+
+def _insert_missing(db: Session, keys: Iterable[Key]):
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(
+        dialect.insert(WallViewBucket).on_conflict_do_nothing(index_elements=["wall_id", "bucket_start"]),
+        [{"wall_id": wall_id, "bucket_start": start, "views": 0} for wall_id, start in keys],
+    )
+
+def flush_views() -> int:
+    """Write buffered views in one batch; returns buckets written.
+
+    On failure the views go back into the buffer for the next flush.
+    """
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+    db = SessionLocal()
+    try:
+        # Views of walls purged since are dropped rather than failing the batch
+        live = {
+            wall_id
+            for (wall_id,) in db.query(Wall.id)
+            .filter(Wall.id.in_({wall_id for wall_id, _ in pending}))
+            .execution_options(include_deleted=True)
+        }
+        # Sorted so concurrent flushes from other workers lock rows in the same order and can't deadlock
+        keys = sorted(key for key in pending if key[0] in live)
+        if keys:
+            _insert_missing(db, keys)
+            # Locked so concurrent flushes from other workers merge instead of overwriting
+            rows = (
+                db.query(WallViewBucket)
+                .filter(tuple_(WallViewBucket.wall_id, WallViewBucket.bucket_start).in_(keys))
+                .order_by(WallViewBucket.wall_id, WallViewBucket.bucket_start)
+                .with_for_update()
+                .all()
+            )
+            for row in rows:
+                views, visitors = pending[(row.wall_id, _as_utc(row.bucket_start))]
+                visitors.merge(HyperLogLog.from_bytes(row.visitors))
+                row.views += views
+                row.visitors = visitors.to_bytes()
+            db.commit()
+        return len(keys)
+    except Exception:
+        db.rollback()
+        with _lock:
+            for key, (views, visitors) in pending.items():
+                _add_pending(key, views, visitors)
+        raise
+    finally:
+        db.close()
+
+async def analytics_flush_loop():
+    """Flush buffered views every ANALYTICS_FLUSH_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.ANALYTICS_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(flush_views)
+        except Exception:
+            logger.exception("analytics_flush_failed")
+
+def wall_analytics(db: Session, wall_id: int, since: datetime, interval: int) -> dict:
+    """Views and unique visitors since ``since``, in total and per ``interval`` seconds."""
+    rows = (
+        db.query(WallViewBucket)
+        .filter(WallViewBucket.wall_id == wall_id, WallViewBucket.bucket_start >= since)
+        .order_by(WallViewBucket.bucket_start)
+        .all()
+    )
+    total = HyperLogLog()
+    buckets: List[dict] = []
+    sketches: List[HyperLogLog] = []
+    for row in rows:
+        start = _as_utc(row.bucket_start)
+        start -= timedelta(seconds=start.timestamp() % interval)
+        visitors = HyperLogLog.from_bytes(row.visitors)
+        total.merge(visitors)
+        if buckets and buckets[-1]["start"] == start:
+            buckets[-1]["views"] += row.views
+            sketches[-1].merge(visitors)
+        else:
+            buckets.append({"start": start, "views": row.views})
+            sketches.append(visitors)
+    for bucket, visitors in zip(buckets, sketches):
+        bucket["unique_visitors"] = visitors.count()
+    return {
+        "views": sum(bucket["views"] for bucket in buckets),
+        "unique_visitors": total.count(),
+        "buckets": buckets,
+    }
@@ -0,0 +1,288 @@
+"""Archival of cold walls.
+
+Walls without activity for ARCHIVE_AFTER_DAYS have their contents and
+contributors compacted into one immutable, gzip-compressed blob::
+
+    ARCHIVE_DIR/<wall_id>/<sha256 prefix>.json.gz   {"manifest", "contributors", "contents"}
+
+after which their rows are deleted. The wall row stays, pointing at the blob
+through ``archive_key``, and an ArchivedContributor per contributor keeps
+invite tokens resolvable. Read paths serve archived walls from the blob;
+writes call ``restore_wall`` first, which puts the rows back under their
+original ids. Blobs no wall points at are removed by collect_stale_archives.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import DateTime, Enum, exists, insert, or_
+from sqlalchemy.orm import Query, Session
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import record_cache_lookup
+from app.models.content import Content
+from app.models.contributor import ArchivedContributor, Contributor
+from app.models.wall import Wall
+import enum
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+ARCHIVE_SUFFIX = ".json.gz"
+
+def _dump_row(obj: Any) -> Dict[str, Any]:
+    row = {}
+    for column in obj.__table__.columns:
+        value = getattr(obj, column.name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        row[column.name] = value
+    return row
+
+def _load_row(model, row: Dict[str, Any]) -> Dict[str, Any]:
+    values = dict(row)
+    for column in model.__table__.columns:
+        value = values.get(column.name)
+        if value is None:
+            continue
+        if isinstance(column.type, DateTime):
+            values[column.name] = datetime.fromisoformat(value)
+        elif isinstance(column.type, Enum) and column.type.enum_class is not None:
+            values[column.name] = column.type.enum_class(value)
+    return values
+
+def _archive_path(key: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, key)
+
+def write_archive(wall_id: int, archive: dict) -> str:
+    """Store an archive durably and return its key; keys are derived from the bytes."""
+    data = gzip.compress(json.dumps(archive, separators=(",", ":")).encode(), compresslevel=9)
+    key = f"{wall_id}/{hashlib.sha256(data).hexdigest()[:32]}{ARCHIVE_SUFFIX}"
+    path = _archive_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return key
+
+def read_archive(key: str) -> dict:
+    """Decode an archive without going through the cache."""
+    with open(_archive_path(key), "rb") as f:
+        return json.loads(gzip.decompress(f.read()))
+
+class ArchiveCache:
+    """LRU of decoded archives; keys name immutable blobs, so entries never go stale."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict:
+        with self._lock:
+            archive = self._entries.get(key)
+            if archive is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup("wall_archive", archive is not None)
+        if archive is None:
+            archive = read_archive(key)
+            with self._lock:
+                self._entries[key] = archive
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return archive
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+archive_cache = ArchiveCache(settings.ARCHIVE_CACHE_MAX_ENTRIES)
+
+def archived_rows(wall: Wall) -> dict:
+    """Decoded archive of an archived wall."""
+    return archive_cache.get(wall.archive_key)
+
+def archived_contents(wall: Wall, hidden: bool = False) -> List[dict]:
+    """Archived content rows, visible ones by default, in id order."""
+    return [row for row in archived_rows(wall)["contents"] if row["is_hidden"] == hidden]
+
+def archived_counts(wall: Wall) -> Dict[str, int]:
+    """The AdminWallCounts of an archived wall."""
+    archive = archived_rows(wall)
+    hidden = sum(1 for row in archive["contents"] if row["is_hidden"])
+    return {
+        "contents": len(archive["contents"]) - hidden,
+        "hidden_contents": hidden,
+        "contributors": len(archive["contributors"]),
+        "active_contributors": sum(1 for row in archive["contributors"] if row["is_active"]),
+    }
+
+def archived_contributor(db: Session, wall_id: int, contributor_id: int) -> Optional[dict]:
+    """A contributor row from an archived wall, or None if the wall isn't archived."""
+    wall = db.get(Wall, wall_id)
+    if wall is None or wall.archive_key is None:
+        return None
+    return next((row for row in archived_rows(wall)["contributors"] if row["id"] == contributor_id), None)
+
+def _cold_walls(db: Session, cutoff: datetime) -> Query:
+    """Walls with rows to archive and no activity since ``cutoff``."""
+    recent_content = exists().where(
+        Content.wall_id == Wall.id,
+        or_(Content.created_at >= cutoff, Content.updated_at >= cutoff),
+    )
+    recent_contributor = exists().where(
+        Contributor.wall_id == Wall.id,
+        or_(Contributor.invited_at >= cutoff, Contributor.accepted_at >= cutoff),
+    )
+    return (
+        db.query(Wall)
+        .filter(
+            Wall.archive_key.is_(None),
+            Wall.created_at < cutoff,
+            or_(Wall.updated_at.is_(None), Wall.updated_at < cutoff),
+            exists().where(Contributor.wall_id == Wall.id),
+            ~recent_content,
+            ~recent_contributor,
+        )
+        .execution_options(include_hidden=True)
+    )
+
+def archive_wall(wall_id: int, cutoff: datetime) -> bool:
+    """Move a cold wall's contents and contributors into an archive; False if it's no longer cold."""
+    db = SessionLocal()
+    try:
+        # Locked so a write that restores or posts to the wall waits for us, then sees archive_key
+        wall = _cold_walls(db, cutoff).filter(Wall.id == wall_id).with_for_update(of=Wall).first()
+        if wall is None:
+            db.rollback()
+            return False
+        contributors = db.query(Contributor).filter(Contributor.wall_id == wall_id).order_by(Contributor.id).all()
+        contents = (
+            db.query(Content)
+            .filter(Content.wall_id == wall_id)
+            .execution_options(include_hidden=True)
+            .order_by(Content.id)
+            .all()
+        )
+        archived_at = datetime.now(timezone.utc)
+        key = write_archive(wall_id, {
+            "manifest": {
+                "format": ARCHIVE_FORMAT,
+                "wall_id": wall_id,
+                "archived_at": archived_at.isoformat(),
+                "contributors": len(contributors),
+                "contents": len(contents),
+            },
+            "contributors": [_dump_row(contributor) for contributor in contributors],
+            "contents": [_dump_row(content) for content in contents],
+        })
+        db.execute(insert(ArchivedContributor), [
+            {"id": c.id, "wall_id": wall_id, "invite_token": c.invite_token, "is_active": c.is_active}
+            for c in contributors
+        ])
+        db.query(Content).filter(Content.wall_id == wall_id).delete(synchronize_session=False)
+        db.query(Contributor).filter(Contributor.wall_id == wall_id).delete(synchronize_session=False)
+        wall.archive_key = key
+        wall.archived_at = archived_at
+        db.commit()
+        logger.info(
+            "wall_archived wall_id=%s key=%s contributors=%d contents=%d",
+            wall_id, key, len(contributors), len(contents),
+        )
+        return True
+    finally:
+        db.close()
+
+def archive_cold_walls() -> int:
+    """Archive up to ARCHIVE_BATCH_WALLS cold walls; returns walls archived."""
+    if not settings.ARCHIVE_AFTER_DAYS:
+        return 0
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    db = SessionLocal()
+    try:
+        wall_ids = [
+            wall_id
+            for (wall_id,) in _cold_walls(db, cutoff).with_entities(Wall.id).order_by(Wall.id)
+            .limit(settings.ARCHIVE_BATCH_WALLS)
+        ]
+    finally:
+        db.close()
+    archived = 0
+    for wall_id in wall_ids:
+        try:
+            archived += archive_wall(wall_id, cutoff)
+        except Exception:
+            logger.exception("wall_archive_failed wall_id=%s", wall_id)
+    return archived
+
+def restore_wall(db: Session, wall_id: int) -> bool:
+    """Put an archived wall's rows back before a write; False if it wasn't archived.
+
+    Costs one primary-key lookup (usually an identity-map hit) for live walls.
+    """
+    wall = db.get(Wall, wall_id)
+    if wall is None or wall.archive_key is None:
+        return False
+    # A concurrent restore (or the archiver) may hold the row; re-check once we have it
+    wall = db.query(Wall).filter(Wall.id == wall_id).with_for_update().populate_existing().first()
+    if wall is None or wall.archive_key is None:
+        db.commit()
+        return False
+    archive = archive_cache.get(wall.archive_key)
+    if archive["contributors"]:
+        db.execute(insert(Contributor), [_load_row(Contributor, row) for row in archive["contributors"]])
+    if archive["contents"]:
+        db.execute(insert(Content), [_load_row(Content, row) for row in archive["contents"]])
+    db.query(ArchivedContributor).filter(ArchivedContributor.wall_id == wall_id).delete(synchronize_session=False)
+    archive_cache.discard(wall.archive_key)
+    wall.archive_key = None
+    wall.archived_at = None
+    db.commit()
+    logger.info(
+        "wall_restored wall_id=%s contributors=%d contents=%d",
+        wall_id, len(archive["contributors"]), len(archive["contents"]),
+    )
+    return True
+
+def collect_stale_archives() -> tuple[int, int]:
+    """Remove blobs of restored or purged walls; returns (files, bytes) reclaimed.
+
+    Blobs younger than ORPHAN_GC_GRACE_SECONDS are kept: their archive may
+    not have committed yet, or a reader may still be on its way to them.
+    """
+    if not os.path.isdir(settings.ARCHIVE_DIR):
+        return 0, 0
+    db = SessionLocal()
+    try:
+        live = {
+            key
+            for (key,) in db.query(Wall.archive_key)
+            .filter(Wall.archive_key.isnot(None))
+            .execution_options(include_deleted=True)
+        }
+    finally:
+        db.close()
+
+    cutoff = time.time() - settings.ORPHAN_GC_GRACE_SECONDS
+    files = freed = 0
+    for wall_dir in os.scandir(settings.ARCHIVE_DIR):
+        if not wall_dir.is_dir():
+            continue
+        for entry in os.scandir(wall_dir.path):
+            if f"{wall_dir.name}/{entry.name}" in live or entry.stat().st_mtime > cutoff:
+                continue
+            freed += entry.stat().st_size
+            os.remove(entry.path)
+            files += 1
+    return files, freed
@@ -0,0 +1,100 @@
+"""In-process cache of wall URL/passcode and invite token lookups.
+
+The contribute flow checks the same credentials several times per guest,
+and floods of wrong URLs or tokens would otherwise each reach the database.
+Unknown keys are cached too, for a shorter time.
+
+Entries are invalidated locally when a wall or contributor changes; other
+workers pick the change up once CREDENTIAL_CACHE_TTL_SECONDS has passed.
+"""
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from typing import Any, Callable, NamedTuple, Optional
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.models.contributor import ArchivedContributor, Contributor
+from app.models.wall import Wall
+import threading
+import time
+
+class WallCredentials(NamedTuple):
+    id: int
+    unique_url: str
+    passcode: str
+    is_public: bool
+
+class InviteCredentials(NamedTuple):
+    contributor_id: int
+    wall_id: int
+    is_active: bool
+
+class CredentialCache:
+    """LRU with per-entry expiry; a cached None marks a key known not to exist."""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[Any]]) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] > now
+            if hit:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, hit)
+        if hit:
+            return entry[1]
+
+        value = load()
+        ttl = settings.CREDENTIAL_CACHE_TTL_SECONDS if value is not None else settings.CREDENTIAL_CACHE_NEGATIVE_TTL_SECONDS
+        with self._lock:
+            self._entries[key] = (now + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+wall_credentials = CredentialCache("wall_credentials", settings.CREDENTIAL_CACHE_MAX_ENTRIES)
+invite_credentials = CredentialCache("invite_credentials", settings.CREDENTIAL_CACHE_MAX_ENTRIES)
+
+def lookup_wall(db: Session, unique_url: str) -> Optional[WallCredentials]:
+    """Credentials of the wall at ``unique_url``, or None if there is none."""
+    def load():
+        row = (
+            db.query(Wall.id, Wall.unique_url, Wall.passcode, Wall.is_public)
+            .filter(Wall.unique_url == unique_url)
+            .first()
+        )
+        return WallCredentials(*row) if row else None
+    return wall_credentials.get_or_load(unique_url, load)
+
+def lookup_invite(db: Session, invite_token: str) -> Optional[InviteCredentials]:
+    """Contributor an invite token belongs to, or None if it's unknown."""
+    def load():
+        row = (
+            db.query(Contributor.id, Contributor.wall_id, Contributor.is_active)
+            .filter(Contributor.invite_token == invite_token)
+            .first()
+        )
+        if row is None:
+            # Tokens of archived walls keep working; writes restore the wall first
+            row = (
+                db.query(ArchivedContributor.id, ArchivedContributor.wall_id, ArchivedContributor.is_active)
+                .filter(ArchivedContributor.invite_token == invite_token)
+                .first()
+            )
+        return InviteCredentials(*row) if row else None
+    return invite_credentials.get_or_load(invite_token, load)
+
+def invalidate_wall(unique_url: str):
+    wall_credentials.invalidate(unique_url)
+
+def invalidate_invite(invite_token: str):
+    invite_credentials.invalidate(invite_token)
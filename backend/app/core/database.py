@@ -1,13 +1,178 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from typing import List, Optional
+import itertools
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
 from app.core.config import settings
+from app.core.metrics import observe_pool
+
+logger = logging.getLogger("app.db")
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+class QueryStats:
+    """Query count and timing attributed to a single request."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope or {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    @property
+    def route(self) -> str:
+        """Route template once routing has happened, raw path before that."""
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "-")
+        return f"{self.scope.get('method', '-')} {path}"
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_query_stats(scope: Optional[dict] = None) -> QueryStats:
+    """Start attributing queries issued in the current context to a new QueryStats."""
+    stats = QueryStats(scope)
+    _query_stats.set(stats)
+    return stats
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Get the QueryStats of the current request, if any."""
+    return _query_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if settings.SLOW_QUERY_THRESHOLD_MS and elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        # Statement is logged parameterized; bound values are never written to logs
+        logger.warning(
+            "slow_query route=%r duration_ms=%.2f statement=%r",
+            stats.route if stats else None,
+            elapsed_ms,
+            " ".join(statement.split()),
+        )
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+def instrument_engine(target_engine):
+    """Attach query counting, slow-query logging and pool metrics to an engine."""
+    event.listen(target_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target_engine, "handle_error", _handle_error)
+    observe_pool(target_engine)
+
+instrument_engine(engine)
+
+# Replication lag in seconds; 0 when caught up or when not a streaming standby
+_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+class Replica:
+    """A read replica engine and its last measured replication lag."""
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url)
+        self.lag: Optional[float] = None  # None while unreachable or not yet checked
+        self.checked_at = float("-inf")
+        self._checking = threading.Lock()
+        instrument_engine(self.engine)
+
+    def measure_lag(self) -> Optional[float]:
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name != "postgresql":
+                    conn.execute(text("SELECT 1"))
+                    return 0.0
+                return float(conn.execute(_LAG_QUERY).scalar())
+        except Exception as e:
+            logger.warning("replica_check_failed replica=%r error=%r", self.engine.url.host, e)
+            return None
+
+    def is_usable(self) -> bool:
+        """Whether lag is within REPLICA_MAX_LAG_SECONDS, re-measuring when stale."""
+        if time.monotonic() - self.checked_at >= settings.REPLICA_LAG_CHECK_SECONDS:
+            # One thread re-measures; the rest use the previous reading meanwhile
+            if self._checking.acquire(blocking=False):
+                try:
+                    self.lag = self.measure_lag()
+                    self.checked_at = time.monotonic()
+                finally:
+                    self._checking.release()
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+# Set after a write so the client's next reads see it; the header is for
+# cross-site frontends whose cookies to the API are blocked
+PRIMARY_UNTIL_COOKIE = "ww_primary_until"
+PRIMARY_UNTIL_HEADER = "X-Primary-Until"
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the client wrote within the read-your-writes window."""
+    value = request.cookies.get(PRIMARY_UNTIL_COOKIE) or request.headers.get(PRIMARY_UNTIL_HEADER)
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+def pin_to_primary(response: Response):
+    """Send the client's reads to the primary for REPLICA_STICKY_SECONDS."""
+    until = str(int(time.time() + settings.REPLICA_STICKY_SECONDS))
+    response.headers[PRIMARY_UNTIL_HEADER] = until
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE, until, max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="lax"
+    )
+
+replicas: List[Replica] = [Replica(url) for url in settings.DATABASE_REPLICA_URLS]
+_next_replica = itertools.count()
+
+def read_engine(prefer_primary: bool = False):
+    """Engine for a read-only request: the next usable replica, else the primary."""
+    if prefer_primary or not replicas:
+        return engine
+    start = next(_next_replica)
+    for i in range(len(replicas)):
+        replica = replicas[(start + i) % len(replicas)]
+        if replica.is_usable():
+            return replica.engine
+    return engine
+
+def warm_pool(connections: int):
+    """Open pool connections up front so the first requests don't pay for connecting."""
+    opened = []
+    try:
+        for target in [engine, *(replica.engine for replica in replicas)]:
+            for _ in range(connections):
+                opened.append(target.connect())
+    except Exception as e:
+        logger.warning("pool_warmup_failed error=%r", e)
+    finally:
+        for conn in opened:
+            conn.close()
+
 def get_db():
     """Dependency for getting database session."""
     db = SessionLocal()
@@ -16,3 +181,10 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    """Dependency for read-only endpoints: a replica session unless the client just wrote."""
+    db = SessionLocal(bind=read_engine(prefer_primary=wrote_recently(request)))
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,11 +1,13 @@
 """Database initialization script."""
 from app.core.database import engine, Base
-from app.models import User, Wall, Contributor, Content
+from app.core.migrations import run_migrations
+from app.models import User, Wall, Contributor, ArchivedContributor, Content, IdempotencyKey, WallViewBucket
 
 def init_db():
-    """Initialize database tables."""
+    """Initialize database tables and apply pending migrations."""
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully!")
+    run_migrations(engine)
 
 if __name__ == "__main__":
     init_db()
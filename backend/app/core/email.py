@@ -1,8 +1,28 @@
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from jinja2 import Template
+from functools import lru_cache
 from app.core.config import settings
+from app.core.metrics import EMAIL_QUEUE_DEPTH
+
+# aiosmtplib, jinja2 and the MIME classes are imported on first send: most
+# processes never send an email and they noticeably slow down cold starts.
+
+@lru_cache(maxsize=None)
+def _invite_template():
+    """Compile the invite email template once."""
+    from jinja2 import Template
+
+    return Template("""
+    <html>
+    <body>
+        <h2>You've been invited to contribute to {{ wall_title }}!</h2>
+        <p>You've been invited to add your wishes and greetings to a celebration wall.</p>
+        <p><strong>Wall URL:</strong> {{ unique_url }}</p>
+        <p><strong>Passcode:</strong> {{ passcode }}</p>
+        <p>Click the link below to start contributing:</p>
+        <p><a href="{{ contributor_url }}">Contribute to Wall</a></p>
+        <p>Or use this invite token: {{ invite_token }}</p>
+    </body>
+    </html>
+    """)
 
 async def send_contributor_invite(
     email: str,
@@ -17,20 +37,12 @@ async def send_contributor_invite(
         print(f"URL: {unique_url}, Passcode: {passcode}, Token: {invite_token}")
         return
     
+    import aiosmtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
     # Email template
-    template = Template("""
-    <html>
-    <body>
-        <h2>You've been invited to contribute to {{ wall_title }}!</h2>
-        <p>You've been invited to add your wishes and greetings to a celebration wall.</p>
-        <p><strong>Wall URL:</strong> {{ unique_url }}</p>
-        <p><strong>Passcode:</strong> {{ passcode }}</p>
-        <p>Click the link below to start contributing:</p>
-        <p><a href="{{ contributor_url }}">Contribute to Wall</a></p>
-        <p>Or use this invite token: {{ invite_token }}</p>
-    </body>
-    </html>
-    """)
+    template = _invite_template()
     
     # Generate contributor URL (frontend URL)
     # Use production domain from config, fallback to localhost for development
@@ -54,12 +66,13 @@ async def send_contributor_invite(
     message.attach(MIMEText(html_content, "html"))
     
     # Send email
-    await aiosmtplib.send(
-        message,
-        hostname=settings.SMTP_HOST,
-        port=settings.SMTP_PORT,
-        username=settings.SMTP_USER,
-        password=settings.SMTP_PASSWORD,
-        use_tls=True,
-    )
+    with EMAIL_QUEUE_DEPTH.track_inprogress():
+        await aiosmtplib.send(
+            message,
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            use_tls=True,
+        )
 
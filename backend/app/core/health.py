@@ -0,0 +1,137 @@
+"""Readiness checks for the database, replicas, upload storage and email backend."""
+from functools import lru_cache
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+from typing import Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.database import engine, replicas
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+import time
+
+_lock = asyncio.Lock()
+_cached_report: Optional[dict] = None
+_cached_until = 0.0
+# Checks still running when a probe timed out; the next probe waits on them
+# rather than starting another, so a hung dependency holds one thread at most
+_in_flight: Dict[str, "asyncio.Future[dict]"] = {}
+
+class CheckFailed(Exception):
+    """Raised by a check when its dependency is unusable."""
+
+@lru_cache(maxsize=None)
+def _probe_engine(url: str) -> Engine:
+    """Unpooled engine whose connect and statements give up after HEALTH_CHECK_TIMEOUT_SECONDS."""
+    timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        connect_args = {
+            "connect_timeout": max(math.ceil(timeout), 1),
+            "options": f"-c statement_timeout={int(timeout * 1000)}",
+        }
+    elif backend == "sqlite":
+        connect_args = {"timeout": timeout}
+    else:
+        connect_args = {}
+    return create_engine(url, poolclass=NullPool, connect_args=connect_args)
+
+def pool_capacity(pool) -> Optional[int]:
+    """Connections the pool can hand out at once; None when unbounded (max_overflow=-1)."""
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:
+        return None
+    return pool.size() + max_overflow
+
+def _check_database() -> dict:
+    pool = engine.pool
+    detail = {}
+    if hasattr(pool, "checkedout"):
+        capacity = pool_capacity(pool)
+        detail = {"pool_checked_out": pool.checkedout(), "pool_capacity": capacity}
+        if capacity is not None and pool.checkedout() >= capacity:
+            raise CheckFailed("connection pool exhausted")
+    # Its own connection, timed out by the driver: doesn't queue behind
+    # pool_timeout or keep a thread blocked on a hung server
+    with _probe_engine(settings.DATABASE_URL).connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return detail
+
+def _check_replicas() -> dict:
+    if not replicas:
+        return {"configured": 0}
+    lags = [replica.measure_lag() for replica in replicas]
+    usable = sum(1 for lag in lags if lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS)
+    if not usable:
+        raise CheckFailed("no replica usable; reads fall back to the primary")
+    return {"configured": len(replicas), "usable": usable, "lag_seconds": lags}
+
+def _check_storage() -> dict:
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=settings.UPLOAD_DIR, prefix=".health-") as f:
+        f.write(b"ok")
+        f.flush()
+    free_mb = shutil.disk_usage(settings.UPLOAD_DIR).free // (1024 * 1024)
+    if free_mb < settings.HEALTH_MIN_FREE_DISK_MB:
+        raise CheckFailed(f"only {free_mb}MB free in upload storage")
+    return {"free_mb": free_mb}
+
+async def _check_email() -> dict:
+    if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
+        return {"configured": False}
+    _, writer = await asyncio.open_connection(settings.SMTP_HOST, settings.SMTP_PORT)
+    writer.close()
+    await writer.wait_closed()
+    return {"configured": True}
+
+# name -> (check, critical). A failing non-critical check degrades but doesn't unready.
+CHECKS: Dict[str, tuple[Callable[[], Awaitable[dict]], bool]] = {
+    "database": (lambda: run_in_threadpool(_check_database), True),
+    "storage": (lambda: run_in_threadpool(_check_storage), True),
+    "email": (_check_email, False),
+    "replicas": (lambda: run_in_threadpool(_check_replicas), False),
+}
+
+def _discard(name: str, task: "asyncio.Future[dict]"):
+    if _in_flight.get(name) is task:
+        del _in_flight[name]
+    if not task.cancelled():
+        task.exception()  # Retrieved, so an abandoned failure isn't logged as unhandled
+
+async def _run_check(name: str, check: Callable[[], Awaitable[dict]]) -> dict:
+    started = time.perf_counter()
+    task = _in_flight.get(name)
+    if task is None:
+        task = _in_flight[name] = asyncio.ensure_future(check())
+        task.add_done_callback(lambda done: _discard(name, done))
+    try:
+        detail = await asyncio.wait_for(asyncio.shield(task), timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        result = {"status": "ok", **detail}
+    except asyncio.TimeoutError:
+        result = {"status": "fail", "error": "timed out"}
+    except Exception as e:
+        result = {"status": "fail", "error": str(e) or e.__class__.__name__}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+async def readiness_report() -> dict:
+    """Run all dependency checks, reusing a recent report so probes don't add load."""
+    global _cached_report, _cached_until
+    async with _lock:
+        if _cached_report is not None and time.monotonic() < _cached_until:
+            return _cached_report
+        results = await asyncio.gather(*(_run_check(name, check) for name, (check, _) in CHECKS.items()))
+        checks = dict(zip(CHECKS, results))
+        if any(checks[name]["status"] != "ok" for name, (_, critical) in CHECKS.items() if critical):
+            status = "unavailable"
+        elif any(result["status"] != "ok" for result in results):
+            status = "degraded"
+        else:
+            status = "ready"
+        _cached_report = {"status": status, "checks": checks}
+        _cached_until = time.monotonic() + settings.HEALTH_CACHE_SECONDS
+        return _cached_report
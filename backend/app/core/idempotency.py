@@ -0,0 +1,255 @@
+"""Idempotency-Key support for retried POSTs.
+
+The first request with a key reserves it in ``idempotency_keys`` and its
+response is stored for IDEMPOTENCY_TTL_SECONDS; repeats get that response
+back (with ``Idempotent-Replayed: true``) instead of running again.
+Duplicates that arrive while the first is still running wait for it: on
+an in-process event when it's in the same worker, by polling the row
+otherwise. 5xx responses aren't stored, so those retries run again;
+neither are ``Cache-Control: no-store`` ones, which endpoints send when
+the response carries a freshly issued credential (e.g. a guest token).
+
+Keys are scoped by method, path, Authorization header and the credential
+form fields (invite token, wall URL, passcode, guest token), so two
+posters reusing a key never see each other's responses. Clients should
+use a fresh random value (e.g. a UUID) per logical operation.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import record_cache_lookup
+from app.models.idempotency import IdempotencyKey
+import asyncio
+import hashlib
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.1
+# Regenerated per response; everything else is replayed as sent
+SKIPPED_HEADERS = {"content-length", "date", "server"}
+
+# Form fields that authenticate a request alongside (or instead of) Authorization
+CREDENTIAL_FIELDS = ("invite_token", "wall_url", "wall_passcode", "guest_token")
+FORM_TYPES = ("multipart/form-data", "application/x-www-form-urlencoded")
+SPOOL_MAX_BYTES = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_in_flight: Dict[str, asyncio.Event] = {}
+
+def _fingerprint(scope: Scope, key: str, credentials: str = "") -> str:
+    authorization = Headers(scope=scope).get("authorization", "")
+    raw = f"{scope['method']}\n{scope['path']}\n{authorization}\n{credentials}\n{key}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _replaying(body: tempfile.SpooledTemporaryFile, receive: Receive) -> Receive:
+    """A receive channel that yields the spooled body, then defers to ``receive``."""
+    size = body.seek(0, 2)
+    body.seek(0)
+    done = False
+
+    async def replay() -> Message:
+        nonlocal done
+        if done:
+            return await receive()
+        chunk = body.read(CHUNK_SIZE)
+        done = body.tell() >= size
+        return {"type": "http.request", "body": chunk, "more_body": not done}
+
+    return replay
+
+async def _form_credentials(
+    scope: Scope, receive: Receive, body: tempfile.SpooledTemporaryFile
+) -> Tuple[str, Receive]:
+    """Credential form fields of the request, plus a receive channel that replays it from ``body``."""
+    content_type = Headers(scope=scope).get("content-type", "")
+    if not content_type.startswith(FORM_TYPES):
+        return "", receive
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        body.write(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    try:
+        form = await Request(scope, _replaying(body, receive)).form()
+    except HTTPException:
+        # Malformed: unscoped, and the app rejects it once replayed
+        return "", _replaying(body, receive)
+    try:
+        credentials = "\n".join(
+            f"{name}={value}" for name in CREDENTIAL_FIELDS if isinstance(value := form.get(name), str)
+        )
+    finally:
+        await form.close()
+    return credentials, _replaying(body, receive)
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands timezone-aware columns back naive
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _reserve(fingerprint: str) -> Optional[dict]:
+    """Reserve a key for this request; returns the existing record instead if there is one."""
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        record = db.get(IdempotencyKey, fingerprint)
+        if record is not None:
+            age = (now - _as_utc(record.created_at)).total_seconds()
+            in_flight = record.status_code is None
+            if age < (settings.IDEMPOTENCY_LOCK_SECONDS if in_flight else settings.IDEMPOTENCY_TTL_SECONDS):
+                return {"status_code": record.status_code, "headers": record.headers, "body": record.body}
+            # Expired, or abandoned by a worker that died mid-request
+            db.delete(record)
+            db.commit()
+        db.add(IdempotencyKey(key=fingerprint, created_at=now))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return {"status_code": None}
+        return None
+    finally:
+        db.close()
+
+def _store(fingerprint: str, status_code: int, headers: list, body: bytes):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == fingerprint).update(
+            {"status_code": status_code, "headers": headers, "body": body}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def _release(fingerprint: str):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == fingerprint).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def purge_expired_idempotency_keys() -> int:
+    """Delete records past their TTL; returns rows removed."""
+    horizon = max(settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_LOCK_SECONDS)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=horizon)
+    db = SessionLocal()
+    try:
+        removed = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+def _storable(start_message: Message) -> bool:
+    """Whether a response may be replayed: not a server error, nor marked no-store."""
+    cache_control = Headers(raw=start_message["headers"]).get("cache-control", "")
+    return start_message["status"] < 500 and "no-store" not in cache_control.lower()
+
+class IdempotencyMiddleware:
+    """Honor ``Idempotency-Key`` on the given (method, path) routes."""
+
+    def __init__(self, app: ASGIApp, routes: Iterable[tuple[str, str]]):
+        self.app = app
+        self.routes = set(routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        key = Headers(scope=scope).get("idempotency-key") if scope["type"] == "http" else None
+        if not key or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Idempotency-Key too long"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        # Form bodies are read up front for their credentials, then replayed to the app
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as body:
+            try:
+                credentials, receive = await _form_credentials(scope, receive, body)
+            except ClientDisconnect:
+                return
+            await self._handle(scope, receive, send, _fingerprint(scope, key, credentials))
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send, fingerprint: str):
+        """Replay the stored response for ``fingerprint``, or run the request and store its response."""
+        deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            record = await run_in_threadpool(_reserve, fingerprint)
+            if record is None:
+                break
+            if record["status_code"] is not None:
+                record_cache_lookup("idempotency", True)
+                response = Response(content=record["body"], status_code=record["status_code"])
+                for name, value in record["headers"]:
+                    response.headers.append(name, value)
+                response.headers["Idempotent-Replayed"] = "true"
+                await response(scope, receive, send)
+                return
+            if not await self._wait(fingerprint, deadline):
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+
+        record_cache_lookup("idempotency", False)
+        event = _in_flight[fingerprint] = asyncio.Event()
+        start_message: Optional[Message] = None
+        chunks = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            try:
+                if start_message is not None and _storable(start_message):
+                    headers = [
+                        [name.decode("latin-1"), value.decode("latin-1")]
+                        for name, value in start_message["headers"]
+                        if name.decode("latin-1").lower() not in SKIPPED_HEADERS
+                    ]
+                    await run_in_threadpool(_store, fingerprint, start_message["status"], headers, b"".join(chunks))
+                else:
+                    await run_in_threadpool(_release, fingerprint)
+            except Exception:
+                logger.exception("idempotency_store_failed")
+            finally:
+                _in_flight.pop(fingerprint, None)
+                event.set()
+
+    async def _wait(self, fingerprint: str, deadline: float) -> bool:
+        """Wait a little for the in-flight original; False once the deadline has passed."""
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return False
+        event = _in_flight.get(fingerprint)
+        if event is None:
+            await asyncio.sleep(min(POLL_SECONDS, remaining))
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return False
+        return True
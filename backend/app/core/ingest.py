@@ -0,0 +1,414 @@
+"""Write-behind buffering of new posts (INGEST_BUFFER_ENABLED).
+
+create_content appends each validated post to a local journal and answers
+with a negative provisional id as soon as the journal is fsynced; posts
+arriving together share one fsync. A flusher inserts queued posts into
+``contents`` once INGEST_BATCH_ROWS are waiting or INGEST_BATCH_MS after
+the first one arrived, one transaction per batch, recording the
+provisional id on each row.
+
+Journal segments live in INGEST_JOURNAL_DIR as ``<time_ns>-<pid>.jsonl``,
+one post per line. A worker holds an flock on each of its segments until
+their posts are in the database and starts a new segment at every flush.
+Segments no one holds were left by a worker that died and are replayed at
+startup. Replays skip posts whose provisional id is already in
+``contents``, so a crash between inserting and removing a segment doesn't
+duplicate posts.
+
+After INGEST_FLUSH_ATTEMPTS failed flushes in a row, queued posts are
+inserted one per transaction, and posts the database rejects (constraint
+violations, bad values) are moved to DEAD_LETTER in the journal directory
+with the error, so one bad post doesn't hold back the ones behind it.
+
+Rows take ``created_at`` from the database clock when inserted, like every
+other row; the ``created_at`` of a queued post in responses is the worker's
+clock at arrival. Posts replayed after a crash are stamped at replay.
+
+Reads merge the queued posts of the worker serving them; other workers
+see them once flushed.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+from starlette.concurrency import run_in_threadpool
+from app.core.archive import restore_wall
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.previews import schedule_preview
+from app.core.snapshots import schedule_snapshot
+from app.core.transcode import transcode_content
+from app.models.content import Content, ContentType
+from app.models.contributor import Contributor
+from app.models.wall import Wall
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl"
+DEAD_LETTER = "dead-letter.jsonl"  # Posts the database rejected; never replayed
+
+Record = Dict[str, Any]
+Segment = Tuple[str, Any]  # (path, open file holding the lock)
+
+def post_record(
+    wall: Wall,
+    contributor_id: int,
+    content_type: ContentType,
+    text: Optional[str],
+    image_url: Optional[str],
+    image_urls: Optional[List[str]],
+    author_name: Optional[str],
+) -> Record:
+    """Journal entry for a validated post, with a fresh provisional id."""
+    return {
+        # Negative so it never collides with a real id; within JSON's safe integer range
+        "provisional_id": -(secrets.randbits(52) + 1),
+        "wall_id": wall.id,
+        "wall_url": wall.unique_url,
+        "contributor_id": contributor_id,
+        "content_type": content_type.value,
+        "text": text,
+        "image_url": image_url,
+        "image_urls": image_urls,
+        "author_name": author_name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def queued_content(record: Record) -> Dict[str, Any]:
+    """A queued post in ContentResponse shape, under its provisional id."""
+    return {
+        "id": record["provisional_id"],
+        "wall_id": record["wall_id"],
+        "contributor_id": record["contributor_id"],
+        "content_type": ContentType(record["content_type"]),
+        "text": record["text"],
+        "image_url": record["image_url"],
+        "image_urls": record["image_urls"],
+        "media_variants": None,
+        "author_name": record["author_name"],
+        "created_at": datetime.fromisoformat(record["created_at"]),
+    }
+
+def _content_row(record: Record) -> Dict[str, Any]:
+    row = queued_content(record)
+    # created_at comes from the database, as for every other row
+    del row["id"], row["media_variants"], row["created_at"]
+    row["provisional_id"] = record["provisional_id"]
+    return row
+
+def insert_contents(records: List[Record]) -> List[Tuple[int, Record]]:
+    """Insert journaled posts not in ``contents`` yet, in one transaction; returns (id, record) per row."""
+    db = SessionLocal()
+    try:
+        for wall_id in {record["wall_id"] for record in records}:
+            restore_wall(db, wall_id)
+        inserted = {
+            provisional_id
+            for (provisional_id,) in db.query(Content.provisional_id)
+            .filter(Content.provisional_id.in_([record["provisional_id"] for record in records]))
+            .execution_options(include_hidden=True)
+        }
+        contributors = {
+            contributor_id
+            for (contributor_id,) in db.query(Contributor.id)
+            .filter(Contributor.id.in_({record["contributor_id"] for record in records}))
+        }
+        fresh = []
+        for record in records:
+            if record["provisional_id"] in inserted:
+                continue
+            if record["contributor_id"] not in contributors:
+                # Removed, or its wall deleted, while the post was queued
+                logger.warning(
+                    "ingest_post_dropped provisional_id=%s wall_id=%s contributor_id=%s",
+                    record["provisional_id"], record["wall_id"], record["contributor_id"],
+                )
+                continue
+            fresh.append(record)
+        if not fresh:
+            return []
+        rows = db.execute(
+            insert(Content).returning(Content.id, Content.provisional_id),
+            [_content_row(record) for record in fresh],
+        ).all()
+        db.commit()
+        by_provisional_id = {record["provisional_id"]: record for record in fresh}
+        return [(content_id, by_provisional_id[provisional_id]) for content_id, provisional_id in rows]
+    finally:
+        db.close()
+
+def _rejected(exc: Exception) -> bool:
+    """Whether a failed insert is the post's fault rather than the database's."""
+    if isinstance(exc, StatementError) and not isinstance(exc, DBAPIError):
+        # Values refused by a column type arrive wrapped
+        exc = exc.orig
+    return isinstance(exc, (IntegrityError, DataError, KeyError, TypeError, ValueError))
+
+def _dead_letter(record: Record, exc: Exception):
+    logger.error(
+        "ingest_post_rejected provisional_id=%s wall_id=%s error=%r",
+        record.get("provisional_id"), record.get("wall_id"), exc,
+    )
+    os.makedirs(settings.INGEST_JOURNAL_DIR, exist_ok=True)
+    line = json.dumps({"record": record, "error": repr(exc)}, separators=(",", ":")).encode() + b"\n"
+    with open(os.path.join(settings.INGEST_JOURNAL_DIR, DEAD_LETTER), "ab") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+def insert_each(records: List[Record]) -> List[Tuple[int, Record]]:
+    """Insert posts one per transaction, moving those the database rejects to DEAD_LETTER."""
+    rows = []
+    for record in records:
+        try:
+            rows += insert_contents([record])
+        except Exception as exc:
+            if not _rejected(exc):
+                raise
+            _dead_letter(record, exc)
+    return rows
+
+def _open_segment() -> Segment:
+    os.makedirs(settings.INGEST_JOURNAL_DIR, exist_ok=True)
+    path = os.path.join(settings.INGEST_JOURNAL_DIR, f"{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}")
+    # Locked before it gets its final name, so recovery never mistakes it for an orphan
+    f = open(f"{path}.new", "ab")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    os.rename(f"{path}.new", path)
+    return path, f
+
+def _append(segment: Segment, data: bytes):
+    f = segment[1]
+    f.write(data)
+    f.flush()
+    os.fsync(f.fileno())
+
+def _remove_segments(segments: Iterable[Segment]):
+    for path, f in segments:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        f.close()
+
+def recover_journals() -> int:
+    """Insert the posts of segments left by dead workers, then remove them; returns posts inserted."""
+    if not os.path.isdir(settings.INGEST_JOURNAL_DIR):
+        return 0
+    segments = posts = 0
+    for name in sorted(os.listdir(settings.INGEST_JOURNAL_DIR)):
+        if name == DEAD_LETTER:
+            continue
+        path = os.path.join(settings.INGEST_JOURNAL_DIR, name)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            continue
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # A live worker's
+            if name.endswith(SEGMENT_SUFFIX):
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A torn final write; that post was never acknowledged
+                        logger.warning("ingest_journal_torn_line segment=%s", name)
+                for start in range(0, len(records), settings.INGEST_BATCH_ROWS):
+                    batch = records[start:start + settings.INGEST_BATCH_ROWS]
+                    try:
+                        posts += len(insert_contents(batch))
+                    except Exception as exc:
+                        if not _rejected(exc):
+                            raise
+                        posts += len(insert_each(batch))
+                segments += 1
+            os.remove(path)
+    if segments:
+        logger.info("ingest_recovered segments=%d posts=%d", segments, posts)
+    return posts
+
+class IngestBuffer:
+    """Per-worker journal writer and batch flusher."""
+
+    def __init__(self):
+        self._queued: Dict[int, Record] = {}  # Journaled, not inserted yet; in arrival order
+        self._appending: List[Tuple[Record, asyncio.Future]] = []
+        self._segment: Optional[Segment] = None
+        self._sealed: List[Segment] = []
+        self._tasks: List[asyncio.Task] = []
+        self._background: set = set()
+        self._failed_flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        await run_in_threadpool(recover_journals)
+        self._journal_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._append_wake = asyncio.Event()
+        self._rows_wake = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._write_loop()), asyncio.create_task(self._flush_loop())]
+
+    async def stop(self):
+        """Stop the loops and insert everything still queued."""
+        tasks, self._tasks = self._tasks, []
+        # Cancelling mid-insert would leave the insert running in its thread
+        # while the final flush inserts the same posts again
+        async with self._flush_lock, self._journal_lock:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+
+    async def enqueue(self, record: Record):
+        """Return once the post is durably journaled."""
+        future = asyncio.get_running_loop().create_future()
+        self._appending.append((record, future))
+        self._append_wake.set()
+        await future
+
+    async def _write_loop(self):
+        while True:
+            await self._append_wake.wait()
+            self._append_wake.clear()
+            batch, self._appending = self._appending, []
+            if not batch:
+                continue
+            try:
+                async with self._journal_lock:
+                    if self._segment is None:
+                        self._segment = await run_in_threadpool(_open_segment)
+                    data = b"".join(json.dumps(record, separators=(",", ":")).encode() + b"\n" for record, _ in batch)
+                    await run_in_threadpool(_append, self._segment, data)
+                    # Queued under the lock, so a flush never seals a segment holding posts it doesn't see
+                    for record, _ in batch:
+                        self._queued[record["provisional_id"]] = record
+            except Exception as exc:
+                logger.exception("ingest_journal_write_failed posts=%d", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            self._rows_wake.set()
+            if len(self._queued) >= settings.INGEST_BATCH_ROWS:
+                self._batch_full.set()
+
+    async def _flush_loop(self):
+        while True:
+            await self._rows_wake.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), settings.INGEST_BATCH_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                self._failed_flushes += 1
+                logger.exception(
+                    "ingest_flush_failed queued=%d attempt=%d", len(self._queued), self._failed_flushes
+                )
+                # Posts stay queued and journaled; try again after a pause
+                self._rows_wake.set()
+                await asyncio.sleep(settings.INGEST_BATCH_MS / 1000)
+
+    async def flush(self) -> int:
+        """Insert every queued post, INGEST_BATCH_ROWS per transaction; returns rows inserted.
+
+        After INGEST_FLUSH_ATTEMPTS failed flushes, posts go one per
+        transaction and those the database rejects to DEAD_LETTER.
+        """
+        async with self._flush_lock:
+            async with self._journal_lock:
+                self._rows_wake.clear()
+                self._batch_full.clear()
+                if self._segment is not None:
+                    self._sealed.append(self._segment)
+                    self._segment = None
+                records = list(self._queued.values())
+                sealed = list(self._sealed)
+            inserted = 0
+            started = time.perf_counter()
+            isolating = self._failed_flushes >= settings.INGEST_FLUSH_ATTEMPTS
+            if isolating and records:
+                logger.warning("ingest_isolating_posts posts=%d attempts=%d", len(records), self._failed_flushes)
+            # One post per transaction while isolating, so a rejected one fails alone
+            size = 1 if isolating else settings.INGEST_BATCH_ROWS
+            for start in range(0, len(records), size):
+                batch = records[start:start + size]
+                try:
+                    rows = await run_in_threadpool(insert_contents, batch)
+                except Exception as exc:
+                    if not (isolating and _rejected(exc)):
+                        raise
+                    await run_in_threadpool(_dead_letter, batch[0], exc)
+                    rows = []
+                for record in batch:
+                    self._queued.pop(record["provisional_id"], None)
+                self._after_insert(rows)
+                inserted += len(rows)
+            self._failed_flushes = 0
+            # Every post journaled in these segments is in the database now
+            self._sealed = [segment for segment in self._sealed if segment not in sealed]
+            await run_in_threadpool(_remove_segments, sealed)
+            if records:
+                logger.info(
+                    "ingest_flushed posts=%d inserted=%d duration_ms=%.2f",
+                    len(records), inserted, (time.perf_counter() - started) * 1000,
+                )
+            return inserted
+
+    def _after_insert(self, rows: List[Tuple[int, Record]]):
+        walls = {record["wall_id"]: record["wall_url"] for _, record in rows}
+        for wall_id, wall_url in walls.items():
+            schedule_snapshot(wall_id, wall_url)
+            schedule_preview(wall_id)
+        for content_id, record in rows:
+            uploaded = [record["image_url"]] if record["image_url"] else (record["image_urls"] or [])
+            if any(url.lower().endswith(".gif") for url in uploaded):
+                task = asyncio.create_task(transcode_content(content_id))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+
+    def is_queued(self, provisional_id: int) -> bool:
+        return provisional_id in self._queued
+
+    def queued_contents(
+        self,
+        wall_id: int,
+        contributor_id: Optional[int] = None,
+        inserted: Iterable[Optional[int]] = (),
+    ) -> List[Dict[str, Any]]:
+        """This worker's queued posts on a wall, oldest first, skipping ``inserted`` provisional ids.
+
+        A read racing a flush can see a post both in the database and in the
+        queue; pass the provisional ids of the rows it read.
+        """
+        if not self._queued:
+            return []
+        skip = set(inserted)
+        return [
+            queued_content(record)
+            for record in self._queued.values()
+            if record["wall_id"] == wall_id
+            and (contributor_id is None or record["contributor_id"] == contributor_id)
+            and record["provisional_id"] not in skip
+        ]
+
+ingest_buffer = IngestBuffer()
@@ -0,0 +1,86 @@
+"""Prometheus metrics.
+
+When several workers serve the app, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory before the workers start: each worker then writes its samples there
+and /metrics aggregates all of them.
+"""
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+import os
+
+REQUEST_LATENCY = Histogram(
+    "wishingwall_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "wishingwall_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    multiprocess_mode="livesum",
+)
+UPLOAD_BYTES = Counter(
+    "wishingwall_upload_bytes",
+    "Bytes of uploaded files stored.",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "wishingwall_db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CAPACITY = Gauge(
+    "wishingwall_db_pool_capacity_connections",
+    "Maximum connections the pool can hand out (size + overflow).",
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "wishingwall_rate_limit_rejections",
+    "Requests rejected by the rate limiter.",
+    ["route"],
+)
+EMAIL_QUEUE_DEPTH = Gauge(
+    "wishingwall_email_queue_depth",
+    "Emails accepted for delivery but not yet sent.",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "wishingwall_cache_requests",
+    "Cache lookups by cache and result (hit/miss).",
+    ["cache", "result"],
+)
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache lookup for hit-ratio reporting."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+def observe_pool(engine):
+    """Track checked-out connections and capacity of an engine's pool."""
+    pool = engine.pool
+    if hasattr(pool, "size"):
+        DB_POOL_CAPACITY.inc(pool.size() + max(getattr(pool, "_max_overflow", 0), 0))
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,114 @@
+"""Schema migrations applied by ``python -m app.core.db_init``.
+
+``Base.metadata.create_all`` creates missing tables but never changes
+existing ones. Each migration below runs once per database, in order, and is
+recorded in ``schema_migrations``. Fresh databases already get the current
+schema from create_all, so every migration must be a no-op against it.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from typing import Callable, List, Tuple
+from app.core.config import settings
+from app.core.partitioning import partition_contents
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = []
+
+def migration(name: str):
+    """Register a migration; names sort in application order."""
+    def register(func: Callable[[Connection], None]):
+        MIGRATIONS.append((name, func))
+        return func
+    return register
+
+def add_column(conn: Connection, table: str, column: str, ddl: str):
+    """Add a column unless it already exists."""
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+def cascade_foreign_key(conn: Connection, table: str, column: str, referred_table: str):
+    """Recreate the foreign key on ``table.column`` with ON DELETE CASCADE.
+
+    Only PostgreSQL can alter constraints in place; SQLite development
+    databases get cascading keys when their tables are created.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for fk in inspect(conn).get_foreign_keys(table):
+        if fk["constrained_columns"] != [column]:
+            continue
+        if (fk.get("options", {}).get("ondelete") or "").upper() == "CASCADE":
+            continue
+        name = fk["name"]
+        conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+        conn.execute(text(
+            f'ALTER TABLE {table} ADD CONSTRAINT "{name}" FOREIGN KEY ({column}) '
+            f"REFERENCES {referred_table} (id) ON DELETE CASCADE"
+        ))
+
+@migration("0001_cascade_deletes")
+def _cascade_deletes(conn: Connection):
+    cascade_foreign_key(conn, "contributors", "wall_id", "walls")
+    cascade_foreign_key(conn, "contents", "wall_id", "walls")
+    cascade_foreign_key(conn, "contents", "contributor_id", "contributors")
+    # Cascades and batched purges look children up by these columns
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contributors_wall_id ON contributors (wall_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contents_wall_id ON contents (wall_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contents_contributor_id ON contents (contributor_id)"))
+    add_column(conn, "walls", "deleted_at", "TIMESTAMP WITH TIME ZONE")
+
+@migration("0002_content_media_variants")
+def _content_media_variants(conn: Connection):
+    add_column(conn, "contents", "media_variants", "JSON")
+
+@migration("0003_consolidate_guest_contributors")
+def _consolidate_guest_contributors(conn: Connection):
+    # Anonymous posts used to create one contributor each. Fold every wall's
+    # active guests into its oldest one; guest tokens take over from here.
+    guest = "email LIKE 'guest\\_%@wishingwall.local' ESCAPE '\\' AND is_active = :active"
+    params = {"active": True}
+    conn.execute(text(
+        "UPDATE contents SET contributor_id = ("
+        f"SELECT MIN(id) FROM contributors WHERE wall_id = contents.wall_id AND {guest}"
+        f") WHERE contributor_id IN (SELECT id FROM contributors WHERE {guest})"
+    ), params)
+    conn.execute(text(
+        f"DELETE FROM contributors WHERE {guest} AND id NOT IN ("
+        f"SELECT MIN(id) FROM contributors WHERE {guest} GROUP BY wall_id)"
+    ), params)
+
+@migration("0004_content_is_hidden")
+def _content_is_hidden(conn: Connection):
+    add_column(conn, "contents", "is_hidden", "BOOLEAN NOT NULL DEFAULT FALSE")
+
+@migration("0005_wall_archives")
+def _wall_archives(conn: Connection):
+    # archived_contributors itself comes from create_all
+    add_column(conn, "walls", "archived_at", "TIMESTAMP WITH TIME ZONE")
+    add_column(conn, "walls", "archive_key", "VARCHAR")
+
+@migration("0006_partition_contents")
+def _partition_contents(conn: Connection):
+    # Opt-in; deployments that turn it on later run python -m app.core.partitioning
+    if settings.CONTENTS_PARTITIONING:
+        partition_contents(conn, settings.CONTENTS_PARTITIONING)
+
+@migration("0007_content_provisional_id")
+def _content_provisional_id(conn: Connection):
+    add_column(conn, "contents", "provisional_id", "BIGINT")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contents_provisional_id ON contents (provisional_id)"))
+
+def run_migrations(engine: Engine):
+    """Apply all migrations not yet recorded in schema_migrations."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR PRIMARY KEY, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+    for name, func in MIGRATIONS:
+        if name in applied:
+            continue
+        with engine.begin() as conn:
+            func(conn)
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+        print(f"Applied migration {name}")
@@ -0,0 +1,136 @@
+"""Optional declarative partitioning of ``contents`` on PostgreSQL.
+
+CONTENTS_PARTITIONING selects the scheme:
+
+- ``hash``: CONTENTS_HASH_PARTITIONS partitions by ``wall_id``. Every
+  per-wall query is pruned to one partition.
+- ``range``: monthly partitions by ``created_at``, created
+  CONTENTS_RANGE_MONTHS_AHEAD months ahead by the maintenance pass, plus a
+  default partition. Per-wall queries are pruned to months since the wall
+  was created (see ``wall_contents_criteria``).
+
+Migration 0006 converts the table when the setting is on during db_init.
+Convert an existing deployment later with ``python -m app.core.partitioning``;
+the table is locked while its rows are copied.
+"""
+from datetime import date
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from app.core.config import settings
+from app.core.database import engine
+from app.models.content import Content
+from app.models.wall import Wall
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = {"hash": "HASH (wall_id)", "range": "RANGE (created_at)"}
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'contents' AND pg_table_is_visible(c.oid)"
+    )).first() is not None
+
+def _month_start(day: date, months: int = 0) -> date:
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+def ensure_range_partitions(conn: Connection, since: date, months_ahead: int, parent: str = "contents") -> int:
+    """Create missing monthly partitions from ``since`` through ``months_ahead``; returns partitions created."""
+    created = 0
+    month = _month_start(since)
+    last = _month_start(date.today(), months_ahead)
+    while month <= last:
+        name = f"contents_y{month.year}m{month.month:02d}"
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {parent} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+            ))
+            created += 1
+        month = _month_start(month, 1)
+    return created
+
+def partition_contents(conn: Connection, scheme: str):
+    """Rebuild ``contents`` as a partitioned table; a no-op if it already is one."""
+    if conn.dialect.name != "postgresql" or is_partitioned(conn):
+        return
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown CONTENTS_PARTITIONING scheme: {scheme!r}")
+
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('contents', 'id')")).scalar()
+    conn.execute(text(
+        "CREATE TABLE contents_partitioned (LIKE contents INCLUDING DEFAULTS) "
+        f"PARTITION BY {SCHEMES[scheme]}"
+    ))
+    if scheme == "hash":
+        for remainder in range(settings.CONTENTS_HASH_PARTITIONS):
+            conn.execute(text(
+                f"CREATE TABLE contents_p{remainder} PARTITION OF contents_partitioned "
+                f"FOR VALUES WITH (MODULUS {settings.CONTENTS_HASH_PARTITIONS}, REMAINDER {remainder})"
+            ))
+        primary_key = "id, wall_id"
+    else:
+        # Unique constraints must include the partition key, which can't be NULL then
+        conn.execute(text("UPDATE contents SET created_at = now() WHERE created_at IS NULL"))
+        conn.execute(text("ALTER TABLE contents_partitioned ALTER COLUMN created_at SET NOT NULL"))
+        oldest = conn.execute(text("SELECT min(created_at) FROM contents")).scalar()
+        ensure_range_partitions(
+            conn,
+            oldest.date() if oldest else date.today(),
+            settings.CONTENTS_RANGE_MONTHS_AHEAD,
+            parent="contents_partitioned",
+        )
+        conn.execute(text("CREATE TABLE contents_default PARTITION OF contents_partitioned DEFAULT"))
+        primary_key = "id, created_at"
+
+    conn.execute(text("INSERT INTO contents_partitioned SELECT * FROM contents"))
+    if sequence:
+        # Keep the id sequence alive when the old table is dropped
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY contents_partitioned.id"))
+    conn.execute(text("DROP TABLE contents"))
+    conn.execute(text("ALTER TABLE contents_partitioned RENAME TO contents"))
+    conn.execute(text(f"ALTER TABLE contents ADD PRIMARY KEY ({primary_key})"))
+    conn.execute(text(
+        "ALTER TABLE contents ADD FOREIGN KEY (wall_id) REFERENCES walls (id) ON DELETE CASCADE"
+    ))
+    conn.execute(text(
+        "ALTER TABLE contents ADD FOREIGN KEY (contributor_id) REFERENCES contributors (id) ON DELETE CASCADE"
+    ))
+    conn.execute(text("CREATE INDEX ix_contents_id ON contents (id)"))
+    conn.execute(text("CREATE INDEX ix_contents_wall_id ON contents (wall_id, created_at)"))
+    conn.execute(text("CREATE INDEX ix_contents_contributor_id ON contents (contributor_id)"))
+    if "provisional_id" in {c["name"] for c in inspect(conn).get_columns("contents")}:
+        # Otherwise migration 0007 adds it later
+        conn.execute(text("CREATE INDEX ix_contents_provisional_id ON contents (provisional_id)"))
+    logger.info("contents_partitioned scheme=%s", scheme)
+
+def ensure_upcoming_partitions() -> int:
+    """Keep monthly partitions CONTENTS_RANGE_MONTHS_AHEAD ahead; returns partitions created."""
+    if settings.CONTENTS_PARTITIONING != "range" or engine.dialect.name != "postgresql":
+        return 0
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return 0
+        return ensure_range_partitions(conn, date.today(), settings.CONTENTS_RANGE_MONTHS_AHEAD)
+
+def wall_contents_criteria(wall: Wall) -> list:
+    """Filters selecting a wall's contents, with a partition key bound when partitioned by range.
+
+    The bound is the lower bound of the partition holding the wall's
+    creation, not the creation time itself: rows stamped by another clock
+    or restored from an archive may be slightly older than their wall. It
+    still lets PostgreSQL skip every earlier month.
+    """
+    criteria = [Content.wall_id == wall.id]
+    if settings.CONTENTS_PARTITIONING == "range" and engine.dialect.name == "postgresql" and wall.created_at:
+        criteria.append(Content.created_at >= _month_start(wall.created_at.date()))
+    return criteria
+
+if __name__ == "__main__":
+    if not settings.CONTENTS_PARTITIONING:
+        raise SystemExit("Set CONTENTS_PARTITIONING to 'hash' or 'range' first")
+    with engine.begin() as conn:
+        partition_contents(conn, settings.CONTENTS_PARTITIONING)
+    print(f"contents is partitioned by {settings.CONTENTS_PARTITIONING}")
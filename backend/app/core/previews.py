@@ -0,0 +1,200 @@
+"""Open Graph preview images of walls, for link unfurls.
+
+Each wall version gets one 1200x630 JPEG collage (its first PREVIEW_TILES
+images, title and post count)::
+
+    PREVIEW_DIR/<wall_id>/<version>.jpg
+
+rendered with Pillow in the threadpool, at most PREVIEW_CONCURRENCY at
+once per worker. Writes schedule a debounced re-render; a request for a
+version that isn't rendered yet renders it once, however many unfurl bots
+ask at the same time.
+"""
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from app.core.archive import archived_contents
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.partitioning import wall_contents_criteria
+from app.core.wall_cache import wall_version
+from app.models.content import Content, ContentType
+from app.models.wall import Wall
+import asyncio
+import io
+import logging
+import math
+import os
+import shutil
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (1200, 630)
+CAPTION_HEIGHT = 160
+BACKGROUND = (250, 246, 240)
+TEXT_COLOR = (40, 32, 28)
+MUTED_COLOR = (120, 108, 100)
+
+_rendering: Dict[int, asyncio.Future] = {}
+_pending: Dict[int, asyncio.Task] = {}
+_dirty: set = set()
+_render_slots: Optional[asyncio.Semaphore] = None
+
+def _slots() -> asyncio.Semaphore:
+    global _render_slots
+    if _render_slots is None:
+        _render_slots = asyncio.Semaphore(settings.PREVIEW_CONCURRENCY)
+    return _render_slots
+
+def _upload_path(url: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, os.path.basename(url))
+
+def preview_path(wall_id: int, version: str) -> str:
+    return os.path.join(settings.PREVIEW_DIR, str(wall_id), f"{version}.jpg")
+
+def _font(size: int):
+    from PIL import ImageFont
+
+    if settings.PREVIEW_FONT_PATH:
+        return ImageFont.truetype(settings.PREVIEW_FONT_PATH, size)
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, ImportError):
+        # Pillow without FreeType only has a fixed-size bitmap font
+        return ImageFont.load_default()
+
+def _fit_text(draw, text: str, font, width: int) -> str:
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(f"{text}…", font=font) > width:
+        text = text[:-1]
+    return f"{text.rstrip()}…"
+
+def render_preview(title: str, post_count: int, image_paths: List[str]) -> bytes:
+    """JPEG collage of up to len(image_paths) images above the title and post count."""
+    from PIL import Image, ImageDraw, ImageOps
+
+    width, height = PREVIEW_SIZE
+    canvas = Image.new("RGB", PREVIEW_SIZE, BACKGROUND)
+    tiles = []
+    for path in image_paths:
+        try:
+            with Image.open(path) as image:
+                # Lets JPEG decode at a fraction of full size
+                image.draft("RGB", (width // 2, height // 2))
+                tiles.append(ImageOps.exif_transpose(image).convert("RGB"))
+        except (OSError, ValueError):
+            logger.warning("preview_tile_unreadable path=%s", path)
+
+    if tiles:
+        grid_height = height - CAPTION_HEIGHT
+        columns = 3 if len(tiles) > 4 else 2 if len(tiles) > 1 else 1
+        rows = math.ceil(len(tiles) / columns)
+        tile_width, tile_height = width // columns, grid_height // rows
+        for index, tile in enumerate(tiles):
+            row, column = divmod(index, columns)
+            canvas.paste(
+                ImageOps.fit(tile, (tile_width - 4, tile_height - 4), Image.LANCZOS),
+                (column * tile_width + 2, row * tile_height + 2),
+            )
+        caption_top = grid_height
+    else:
+        caption_top = (height - CAPTION_HEIGHT) // 2
+
+    draw = ImageDraw.Draw(canvas)
+    title_font = _font(56)
+    draw.text((48, caption_top + 24), _fit_text(draw, title, title_font, width - 96), font=title_font, fill=TEXT_COLOR)
+    posts = f"{post_count} post" if post_count == 1 else f"{post_count} posts"
+    draw.text((48, caption_top + 96), posts, font=_font(32), fill=MUTED_COLOR)
+
+    out = io.BytesIO()
+    canvas.save(out, "JPEG", quality=85, optimize=True, progressive=True)
+    return out.getvalue()
+
+def _first_image(image_url: Optional[str], image_urls: Optional[List[str]]) -> Optional[str]:
+    return image_url or (image_urls or [None])[0]
+
+def _prune_versions(wall_dir: str, keep: int):
+    previews = sorted(os.scandir(wall_dir), key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in previews[keep:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+def publish_preview(wall_id: int) -> Optional[str]:
+    """Render the preview of the wall's current version unless it exists; returns the version."""
+    wall_dir = os.path.join(settings.PREVIEW_DIR, str(wall_id))
+    db = SessionLocal()
+    try:
+        wall = db.query(Wall).filter(Wall.id == wall_id).first()
+        if wall is None:
+            shutil.rmtree(wall_dir, ignore_errors=True)
+            return None
+        version = wall_version(db, wall)
+        path = preview_path(wall_id, version)
+        if os.path.exists(path):
+            return version
+        title = wall.title
+        if wall.archive_key:
+            contents = archived_contents(wall)
+            post_count = len(contents)
+            urls = [_first_image(row["image_url"], row["image_urls"]) for row in contents]
+        else:
+            post_count = db.query(func.count(Content.id)).filter(*wall_contents_criteria(wall)).scalar()
+            urls = [
+                _first_image(row.image_url, row.image_urls)
+                for row in db.query(Content.image_url, Content.image_urls)
+                .filter(*wall_contents_criteria(wall), Content.content_type != ContentType.TEXT)
+                .order_by(Content.id)
+                .limit(settings.PREVIEW_TILES)
+            ]
+    finally:
+        db.close()
+
+    image_paths = [_upload_path(url) for url in urls if url][:settings.PREVIEW_TILES]
+    data = render_preview(title, post_count, image_paths)
+    os.makedirs(wall_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    _prune_versions(wall_dir, settings.PREVIEW_KEEP_VERSIONS)
+    logger.info("preview_rendered wall_id=%s version=%s tiles=%d bytes=%d", wall_id, version, len(image_paths), len(data))
+    return version
+
+async def _render(wall_id: int) -> Optional[str]:
+    async with _slots():
+        return await run_in_threadpool(publish_preview, wall_id)
+
+async def ensure_preview(wall_id: int) -> Optional[str]:
+    """Render the wall's current preview if needed, once per worker however many callers wait."""
+    task = _rendering.get(wall_id)
+    if task is None:
+        task = _rendering[wall_id] = asyncio.ensure_future(_render(wall_id))
+        task.add_done_callback(lambda _: _rendering.pop(wall_id, None))
+    return await asyncio.shield(task)
+
+async def _debounced_render(wall_id: int):
+    try:
+        while True:
+            await asyncio.sleep(settings.PREVIEW_DEBOUNCE_SECONDS)
+            _dirty.discard(wall_id)
+            try:
+                await ensure_preview(wall_id)
+            except Exception:
+                logger.exception("preview_render_failed wall_id=%s", wall_id)
+            # Changes that arrived while rendering get one more round
+            if wall_id not in _dirty:
+                break
+    finally:
+        _pending.pop(wall_id, None)
+
+def schedule_preview(wall_id: int):
+    """Re-render a wall's preview soon; a burst of changes yields one render."""
+    if not settings.PREVIEWS_ENABLED:
+        return
+    if wall_id in _pending:
+        _dirty.add(wall_id)
+        return
+    _pending[wall_id] = asyncio.get_running_loop().create_task(_debounced_render(wall_id))
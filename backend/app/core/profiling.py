@@ -0,0 +1,158 @@
+"""Opt-in request profiling and tracemalloc snapshots for production debugging.
+
+A request is profiled when it sends ``X-Profile: <ADMIN_TOKEN>`` or is
+picked by PROFILING_SAMPLE_RATE. pyinstrument samples the request's call
+stack (including across awaits) and the profile is written to PROFILE_DIR
+as a speedscope file (open at https://www.speedscope.app). Code running in
+the threadpool isn't sampled. Without pyinstrument installed, requests run
+unprofiled.
+
+Snapshots and profiles are per worker process.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+import logging
+import os
+import random
+import re
+import secrets
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".speedscope.json"
+MAX_SNAPSHOTS = 5
+MAX_TRACE_FRAMES = 64  # Deeper tracebacks multiply tracemalloc's memory overhead
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Whether ``token`` is the configured operator token (never true when unset)."""
+    return bool(settings.ADMIN_TOKEN and token and secrets.compare_digest(token, settings.ADMIN_TOKEN))
+
+def _load_profiler():
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        return None
+    return Profiler
+
+def _write_profile(profiler, name: str):
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    store_profile(name, profiler.output(renderer=SpeedscopeRenderer()))
+
+def store_profile(name: str, profile: str):
+    """Write a rendered profile, keeping only the newest PROFILE_KEEP."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(settings.PROFILE_DIR, name), "w") as f:
+        f.write(profile)
+    profiles = sorted(list_profiles(), reverse=True)
+    for stale in profiles[settings.PROFILE_KEEP:]:
+        os.remove(os.path.join(settings.PROFILE_DIR, stale))
+
+def list_profiles() -> List[str]:
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    return [name for name in os.listdir(settings.PROFILE_DIR) if name.endswith(PROFILE_SUFFIX)]
+
+class ProfilingMiddleware:
+    """Profile requests selected by header or sampling; others pay one random() call."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.profiler_class = _load_profiler()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.profiler_class is None:
+            await self.app(scope, receive, send)
+            return
+        requested = is_admin_token(Headers(scope=scope).get("x-profile"))
+        if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        route = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")[:60] or "root"
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{scope['method']}-{route}-{secrets.token_hex(3)}{PROFILE_SUFFIX}"
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and requested:
+                MutableHeaders(scope=message)["X-Profile-Id"] = name
+            await send(message)
+
+        profiler = self.profiler_class(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            try:
+                await run_in_threadpool(_write_profile, profiler, name)
+                logger.info(
+                    "request_profiled profile=%s duration_ms=%.2f", name, (time.perf_counter() - started) * 1000
+                )
+            except Exception:
+                logger.exception("profile_write_failed profile=%s", name)
+
+_snapshots: Dict[str, tracemalloc.Snapshot] = {}
+
+def start_tracing(frames: int) -> bool:
+    """Start tracemalloc; False if it was already running."""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+def stop_tracing():
+    tracemalloc.stop()
+    _snapshots.clear()
+
+def _top(stats, limit: int) -> List[dict]:
+    return [
+        {
+            "location": str(stat.traceback[0]) if stat.traceback else "?",
+            "size_kb": round(stat.size / 1024, 1),
+            "size_diff_kb": round(getattr(stat, "size_diff", 0) / 1024, 1),
+            "count": stat.count,
+            "count_diff": getattr(stat, "count_diff", 0),
+        }
+        for stat in stats[:limit]
+    ]
+
+def take_snapshot(limit: int) -> dict:
+    """Snapshot current allocations and keep it for later diffs."""
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    snapshot_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{secrets.token_hex(3)}"
+    _snapshots[snapshot_id] = snapshot
+    while len(_snapshots) > MAX_SNAPSHOTS:
+        _snapshots.pop(next(iter(_snapshots)))
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "snapshot_id": snapshot_id,
+        "pid": os.getpid(),
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": _top(snapshot.statistics("lineno"), limit),
+    }
+
+def diff_snapshots(older_id: str, newer_id: str, limit: int) -> Optional[dict]:
+    """Largest allocation growth between two kept snapshots; None if either is unknown."""
+    older, newer = _snapshots.get(older_id), _snapshots.get(newer_id)
+    if older is None or newer is None:
+        return None
+    return {
+        "from": older_id,
+        "to": newer_id,
+        "pid": os.getpid(),
+        "top": _top(newer.compare_to(older, "lineno"), limit),
+    }
+
+def snapshot_ids() -> List[str]:
+    return list(_snapshots)
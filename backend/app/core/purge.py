@@ -0,0 +1,231 @@
+"""Background maintenance: purging deleted walls, reclaiming orphaned and expired uploads,
+archiving cold walls.
+
+Run a one-off pass with ``python -m app.core.purge``.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from app.core.archive import archive_cold_walls, collect_stale_archives, read_archive
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.idempotency import purge_expired_idempotency_keys
+from app.core.partitioning import ensure_upcoming_partitions
+from app.core.resumable import collect_expired_uploads
+from app.models.analytics import WallViewBucket
+from app.models.content import Content
+from app.models.contributor import ArchivedContributor, Contributor
+from app.models.wall import Wall
+import asyncio
+import fcntl
+import logging
+import os
+import shutil
+import time
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_DIR = ".derivatives"
+
+def content_file_urls(
+    image_url: Optional[str],
+    image_urls: Optional[List[str]],
+    media_variants: Optional[Dict[str, Dict[str, str]]] = None,
+) -> List[str]:
+    """All upload URLs referenced by a content row, including transcoded variants."""
+    urls = [image_url] if image_url else []
+    urls.extend(image_urls or [])
+    for variants in (media_variants or {}).values():
+        urls.extend(variants.values())
+    return urls
+
+def archived_file_urls(archive_key: str) -> List[str]:
+    """All upload URLs referenced by an archived wall's contents."""
+    return [
+        url
+        for row in read_archive(archive_key)["contents"]
+        for url in content_file_urls(row["image_url"], row["image_urls"], row["media_variants"])
+    ]
+
+def _upload_path(url: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, os.path.basename(url))
+
+def _has_stem(name: str, stems: Set[str]) -> bool:
+    """Whether a derivative file name starts with one of ``stems`` followed by a dot."""
+    return any(name[:index] in stems for index, char in enumerate(name) if char == ".")
+
+def remove_upload_files(urls: Iterable[str]) -> int:
+    """Delete uploaded files and their derivatives; returns bytes reclaimed."""
+    freed = 0
+    candidates = [_upload_path(url) for url in urls]
+    derivative_dir = os.path.join(settings.UPLOAD_DIR, DERIVATIVE_DIR)
+    if candidates and os.path.isdir(derivative_dir):
+        # One scan for the whole batch rather than one per file
+        stems = {os.path.basename(path).rsplit(".", 1)[0] for path in candidates}
+        candidates.extend(
+            entry.path for entry in os.scandir(derivative_dir) if _has_stem(entry.name, stems)
+        )
+    for candidate in candidates:
+        try:
+            freed += os.path.getsize(candidate)
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+    return freed
+
+def purge_wall(wall_id: int):
+    """Delete a soft-deleted wall's rows in bounded batches, then the wall itself."""
+    batch = settings.PURGE_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        while True:
+            rows = (
+                db.query(Content.id, Content.image_url, Content.image_urls, Content.media_variants)
+                .filter(Content.wall_id == wall_id)
+                .execution_options(include_hidden=True)
+                .limit(batch)
+                .all()
+            )
+            if not rows:
+                break
+            db.query(Content).filter(Content.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+            db.commit()
+            # Files go only after the rows are gone; a crash in between leaves orphans for the GC
+            remove_upload_files(
+                url for row in rows for url in content_file_urls(row.image_url, row.image_urls, row.media_variants)
+            )
+        while True:
+            ids = [row.id for row in db.query(Contributor.id).filter(Contributor.wall_id == wall_id).limit(batch)]
+            if not ids:
+                break
+            db.query(Contributor).filter(Contributor.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        archive_key = db.query(Wall.archive_key).filter(Wall.id == wall_id).execution_options(include_deleted=True).scalar()
+        db.query(ArchivedContributor).filter(ArchivedContributor.wall_id == wall_id).delete(synchronize_session=False)
+        db.query(WallViewBucket).filter(WallViewBucket.wall_id == wall_id).delete(synchronize_session=False)
+        db.query(Wall).filter(Wall.id == wall_id).delete(synchronize_session=False)
+        db.commit()
+        # The blob itself goes with collect_stale_archives
+        if archive_key:
+            remove_upload_files(archived_file_urls(archive_key))
+        shutil.rmtree(os.path.join(settings.PREVIEW_DIR, str(wall_id)), ignore_errors=True)
+    finally:
+        db.close()
+
+def purge_deleted_walls() -> int:
+    """Finish purges interrupted by a restart; returns walls purged."""
+    db = SessionLocal()
+    try:
+        wall_ids = [
+            row.id
+            for row in db.query(Wall.id)
+            .filter(Wall.deleted_at.isnot(None))
+            .execution_options(include_deleted=True)
+        ]
+    finally:
+        db.close()
+    for wall_id in wall_ids:
+        purge_wall(wall_id)
+    return len(wall_ids)
+
+def collect_orphan_files() -> tuple[int, int]:
+    """Remove uploads no content row references; returns (files, bytes) reclaimed.
+
+    Files younger than ORPHAN_GC_GRACE_SECONDS are kept: they may belong to
+    a create_content request that hasn't committed yet.
+    """
+    if not os.path.isdir(settings.UPLOAD_DIR):
+        return 0, 0
+    referenced = set()
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Content.image_url, Content.image_urls, Content.media_variants)
+            .execution_options(include_hidden=True)
+            .yield_per(1000)
+        )
+        for image_url, image_urls, media_variants in rows:
+            referenced.update(
+                os.path.basename(url) for url in content_file_urls(image_url, image_urls, media_variants)
+            )
+        archive_keys = [
+            key
+            for (key,) in db.query(Wall.archive_key)
+            .filter(Wall.archive_key.isnot(None))
+            .execution_options(include_deleted=True)
+        ]
+    finally:
+        db.close()
+    # Archived walls keep their files; a missing blob fails the pass rather than losing them
+    for key in archive_keys:
+        referenced.update(os.path.basename(url) for url in archived_file_urls(key))
+
+    cutoff = time.time() - settings.ORPHAN_GC_GRACE_SECONDS
+    files = freed = 0
+    live_stems = set()
+    for entry in os.scandir(settings.UPLOAD_DIR):
+        if entry.name.startswith(".") or not entry.is_file():
+            continue
+        if entry.name in referenced or entry.stat().st_mtime > cutoff:
+            live_stems.add(entry.name.rsplit(".", 1)[0])
+            continue
+        freed += entry.stat().st_size
+        os.remove(entry.path)
+        files += 1
+
+    derivative_dir = os.path.join(settings.UPLOAD_DIR, DERIVATIVE_DIR)
+    if os.path.isdir(derivative_dir):
+        for entry in os.scandir(derivative_dir):
+            if entry.name.split(".", 1)[0] not in live_stems:
+                freed += entry.stat().st_size
+                os.remove(entry.path)
+                files += 1
+    return files, freed
+
+def run_maintenance() -> bool:
+    """One purge + GC pass, run by at most one worker per interval; True if it ran."""
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    with open(os.path.join(settings.UPLOAD_DIR, ".maintenance.lock"), "a+") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        lock.seek(0)
+        last_run = float(lock.read() or 0)
+        if time.time() - last_run < settings.ORPHAN_GC_INTERVAL_SECONDS / 2:
+            return False
+        walls = purge_deleted_walls()
+        files, freed = collect_orphan_files()
+        partial_files, partial_freed = collect_expired_uploads()
+        keys = purge_expired_idempotency_keys()
+        archived = archive_cold_walls()
+        archive_files, archive_freed = collect_stale_archives()
+        partitions = ensure_upcoming_partitions()
+        logger.info(
+            "maintenance walls_purged=%d orphan_files=%d expired_partial_files=%d stale_archives=%d "
+            "bytes_reclaimed=%d expired_idempotency_keys=%d walls_archived=%d partitions_created=%d",
+            walls, files, partial_files, archive_files, freed + partial_freed + archive_freed, keys, archived,
+            partitions,
+        )
+        lock.seek(0)
+        lock.truncate()
+        lock.write(str(time.time()))
+    return True
+
+async def maintenance_loop():
+    """Periodically purge deleted walls, reclaim orphaned uploads and archive cold walls."""
+    while True:
+        await asyncio.sleep(settings.ORPHAN_GC_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(run_maintenance)
+        except Exception:
+            logger.exception("maintenance_failed")
+
+if __name__ == "__main__":
+    print(f"Purged {purge_deleted_walls()} deleted walls")
+    files, freed = collect_orphan_files()
+    print(f"Removed {files} orphaned files ({freed} bytes)")
+    files, freed = collect_expired_uploads()
+    print(f"Removed {files} expired partial upload files ({freed} bytes)")
+    print(f"Archived {archive_cold_walls()} cold walls")
+    files, freed = collect_stale_archives()
+    print(f"Removed {files} stale archives ({freed} bytes)")
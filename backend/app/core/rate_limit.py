@@ -3,6 +3,7 @@ from fastapi import Request, HTTPException, status
 from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, Tuple
+from app.core.metrics import RATE_LIMIT_REJECTIONS
 
 # Simple in-memory rate limiter (use Redis in production)
 _rate_limit_store: Dict[str, list] = defaultdict(list)
@@ -30,6 +31,7 @@ def check_rate_limit(
     
     # Check limit
     if len(_rate_limit_store[key]) >= max_requests:
+        RATE_LIMIT_REJECTIONS.labels(route=request.url.path).inc()
         return False
     
     # Add current request
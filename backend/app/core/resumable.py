@@ -0,0 +1,161 @@
+"""Storage for resumable (tus-style) uploads.
+
+Each upload lives under ``UPLOAD_DIR/.partial`` as ``<id>`` (bytes received
+so far) and ``<id>.json`` (declared length, type and name, the wall it may
+be posted to and the client that created it). The byte count
+of ``<id>`` is the offset a client resumes from. Uploads untouched for
+UPLOAD_PARTIAL_EXPIRY_SECONDS are dropped; finished ones are moved into
+``UPLOAD_DIR`` when a post claims them.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional, BinaryIO
+from app.core.config import settings
+import fcntl
+import json
+import mimetypes
+import os
+import re
+import secrets
+import time
+
+PARTIAL_DIR = ".partial"
+
+_UPLOAD_ID = re.compile(r"^[A-Za-z0-9_-]{22}$")
+
+def _partial_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, PARTIAL_DIR)
+
+def _paths(upload_id: str) -> Optional[tuple[str, str]]:
+    if not _UPLOAD_ID.match(upload_id):
+        return None
+    data = os.path.join(_partial_dir(), upload_id)
+    return data, f"{data}.json"
+
+def create_upload(length: int, content_type: str, filename: Optional[str], wall_id: int, client: str) -> str:
+    """Register a new upload for a post to ``wall_id`` and return its id."""
+    os.makedirs(_partial_dir(), exist_ok=True)
+    upload_id = secrets.token_urlsafe(16)
+    data, meta = _paths(upload_id)
+    if not filename:
+        filename = f"upload{mimetypes.guess_extension(content_type) or '.jpg'}"
+    with open(meta, "w") as f:
+        json.dump(
+            {"length": length, "content_type": content_type, "filename": filename, "wall_id": wall_id, "client": client},
+            f,
+        )
+    open(data, "wb").close()
+    return upload_id
+
+def get_upload(upload_id: str) -> Optional[dict]:
+    """Upload metadata with its current offset and expiry, or None if unknown or expired."""
+    paths = _paths(upload_id)
+    if paths is None:
+        return None
+    data, meta = paths
+    try:
+        stat = os.stat(data)
+        with open(meta) as f:
+            upload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    upload["offset"] = stat.st_size
+    upload["expires_at"] = stat.st_mtime + settings.UPLOAD_PARTIAL_EXPIRY_SECONDS
+    if upload["expires_at"] < time.time():
+        return None
+    return upload
+
+def reserved_bytes(client: str) -> int:
+    """Declared length of the client's unexpired uploads not yet claimed by a post."""
+    partial_dir = _partial_dir()
+    if not os.path.isdir(partial_dir):
+        return 0
+    cutoff = time.time() - settings.UPLOAD_PARTIAL_EXPIRY_SECONDS
+    total = 0
+    for entry in os.scandir(partial_dir):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if os.stat(entry.path[:-len(".json")]).st_mtime < cutoff:
+                continue
+            with open(entry.path) as f:
+                upload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if upload.get("client") == client:
+            total += upload["length"]
+    return total
+
+@contextmanager
+def open_for_append(upload_id: str) -> Iterator[BinaryIO]:
+    """Exclusively open an upload's data file for appending.
+
+    Raises BlockingIOError while another request (in any worker) is writing
+    to it, and FileNotFoundError if it no longer exists.
+    """
+    data, _ = _paths(upload_id)
+    with open(data, "r+b") as f:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        f.seek(0, os.SEEK_END)
+        yield f
+
+def claim_upload(upload_id: str, target: str) -> bool:
+    """Move a complete upload to ``target``; False if it's missing, busy or incomplete."""
+    paths = _paths(upload_id)
+    if paths is None:
+        return False
+    data, meta = paths
+    upload = get_upload(upload_id)
+    if upload is None or upload["offset"] != upload["length"]:
+        return False
+    try:
+        with open_for_append(upload_id):
+            os.replace(data, target)
+    except (BlockingIOError, FileNotFoundError):
+        return False
+    try:
+        os.remove(meta)
+    except FileNotFoundError:
+        pass
+    return True
+
+def release_upload(upload_id: str, upload: dict, source: str):
+    """Undo claim_upload: move ``source`` back and restore the metadata ``get_upload`` returned."""
+    data, meta = _paths(upload_id)
+    os.makedirs(_partial_dir(), exist_ok=True)
+    with open(meta, "w") as f:
+        json.dump({key: value for key, value in upload.items() if key not in ("offset", "expires_at")}, f)
+    os.replace(source, data)
+
+def delete_upload(upload_id: str) -> bool:
+    """Discard an upload; False if it didn't exist."""
+    paths = _paths(upload_id)
+    if paths is None:
+        return False
+    removed = False
+    for path in paths:
+        try:
+            os.remove(path)
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+def collect_expired_uploads() -> tuple[int, int]:
+    """Remove abandoned partial uploads; returns (files, bytes) reclaimed."""
+    partial_dir = _partial_dir()
+    if not os.path.isdir(partial_dir):
+        return 0, 0
+    cutoff = time.time() - settings.UPLOAD_PARTIAL_EXPIRY_SECONDS
+    files = freed = 0
+    for entry in os.scandir(partial_dir):
+        # Judge the pair by the data file, which every PATCH touches
+        data = entry.path[:-len(".json")] if entry.name.endswith(".json") else entry.path
+        try:
+            expired = os.stat(data).st_mtime < cutoff
+        except FileNotFoundError:
+            expired = entry.stat().st_mtime < cutoff
+        if expired:
+            freed += entry.stat().st_size
+            os.remove(entry.path)
+            files += 1
+    return files, freed
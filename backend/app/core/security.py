@@ -1,21 +1,30 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib/bcrypt and jose/cryptography are imported on first use to keep
+# cold starts fast; most requests never hash a password.
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Get the password hashing context, loading the bcrypt backend on first use."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    from jose import jwt
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -27,9 +36,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode and verify a JWT token."""
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
         return None
 
+def create_guest_token(contributor_id: int, wall_id: int) -> str:
+    """Create a signed, non-expiring token identifying an anonymous contributor."""
+    from jose import jwt
+    
+    claims = {"typ": "guest", "cid": contributor_id, "wid": wall_id}
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def verify_guest_token(token: str, wall_id: int) -> Optional[int]:
+    """Return the contributor id of a guest token issued for this wall, or None."""
+    payload = decode_access_token(token)
+    if not payload or payload.get("typ") != "guest" or payload.get("wid") != wall_id:
+        return None
+    return payload.get("cid")
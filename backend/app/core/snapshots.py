@@ -0,0 +1,127 @@
+"""Static snapshots of public walls for CDN/edge serving.
+
+Only walls with ``is_public`` set are published; a wall made private (or
+deleted) has its snapshots removed. Each wall is published under::
+
+    SNAPSHOT_DIR/<unique_url>/<secret>/latest.json        pointer, short-lived
+    SNAPSHOT_DIR/<unique_url>/<secret>/v/<version>.json   immutable payload
+                                                     (+ .json.gz / .json.br)
+
+The payload is the get_public_wall response body. ``secret`` is derived
+from the passcode with PBKDF2, so a client that knows the URL and passcode
+can compute the path itself (WebCrypto) while the passcode can't be brute
+forced cheaply from a path.
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.compression import compress, supported_encodings
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.wall_cache import serialize_public_wall, wall_version
+from app.models.wall import Wall
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+_pending: Dict[str, asyncio.Task] = {}
+_dirty: set = set()
+
+@lru_cache(maxsize=4096)
+def snapshot_secret(unique_url: str, passcode: str) -> str:
+    """Path secret for a wall, derivable by anyone who knows its passcode."""
+    derived = hashlib.pbkdf2_hmac(
+        "sha256",
+        passcode.encode(),
+        f"wishingwall-snapshot:{unique_url}".encode(),
+        settings.SNAPSHOT_KDF_ITERATIONS,
+    )
+    return derived.hex()[:32]
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _prune_versions(version_dir: str, keep: int):
+    """Drop all but the newest versions; recent ones stay for in-flight readers."""
+    payloads = sorted(
+        (entry for entry in os.scandir(version_dir) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in payloads[keep:]:
+        for suffix in ("", *ENCODING_SUFFIXES.values()):
+            try:
+                os.remove(entry.path + suffix)
+            except FileNotFoundError:
+                pass
+
+def publish_snapshot(wall_id: int, unique_url: str) -> Optional[str]:
+    """Write the wall's current snapshot if it changed; returns the published version.
+    
+    Walls that aren't public have any earlier snapshot removed instead.
+    """
+    wall_root = os.path.join(settings.SNAPSHOT_DIR, unique_url)
+    db = SessionLocal()
+    try:
+        wall = db.query(Wall).filter(Wall.id == wall_id).first()
+        if wall is None or not wall.is_public:
+            shutil.rmtree(wall_root, ignore_errors=True)
+            return None
+        root = os.path.join(wall_root, snapshot_secret(wall.unique_url, wall.passcode))
+        pointer_path = os.path.join(root, "latest.json")
+        version = wall_version(db, wall)
+        try:
+            with open(pointer_path) as f:
+                if json.load(f).get("version") == version:
+                    return version
+        except (OSError, ValueError):
+            pass
+        body = serialize_public_wall(wall)
+    finally:
+        db.close()
+
+    version_dir = os.path.join(root, "v")
+    os.makedirs(version_dir, exist_ok=True)
+    payload_path = os.path.join(version_dir, f"{version}.json")
+    _write_atomic(payload_path, body)
+    for encoding in supported_encodings():
+        _write_atomic(payload_path + ENCODING_SUFFIXES[encoding], compress(body, encoding))
+    pointer = {"version": version, "path": f"v/{version}.json", "published_at": int(time.time())}
+    _write_atomic(pointer_path, json.dumps(pointer).encode())
+    _prune_versions(version_dir, settings.SNAPSHOT_KEEP_VERSIONS)
+    return version
+
+async def _debounced_publish(wall_id: int, unique_url: str):
+    try:
+        while True:
+            await asyncio.sleep(settings.SNAPSHOT_DEBOUNCE_SECONDS)
+            _dirty.discard(unique_url)
+            try:
+                await run_in_threadpool(publish_snapshot, wall_id, unique_url)
+            except Exception:
+                logger.exception("snapshot_publish_failed wall_id=%s", wall_id)
+            # Changes that arrived while publishing get one more round
+            if unique_url not in _dirty:
+                break
+    finally:
+        _pending.pop(unique_url, None)
+
+def schedule_snapshot(wall_id: int, unique_url: str):
+    """Republish a wall's snapshot soon; a burst of changes yields one rebuild."""
+    if not settings.SNAPSHOTS_ENABLED:
+        return
+    if unique_url in _pending:
+        _dirty.add(unique_url)
+        return
+    _pending[unique_url] = asyncio.get_running_loop().create_task(_debounced_publish(wall_id, unique_url))
@@ -0,0 +1,151 @@
+"""Animated GIF to MP4/WebM transcoding with poster frames.
+
+Runs after create_content has responded. ffmpeg is optional: without it
+GIFs are served as uploaded.
+"""
+from typing import Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.snapshots import schedule_snapshot
+from app.models.content import Content
+import asyncio
+import logging
+import os
+import shutil
+
+logger = logging.getLogger(__name__)
+
+_slots: Optional[asyncio.Semaphore] = None
+
+# Even dimensions are required by yuv420p
+_EVEN_SCALE = "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+VIDEO_CODECS = {
+    "mp4": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "28", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart", "-vf", _EVEN_SCALE],
+    "webm": ["-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "40", "-deadline", "good", "-cpu-used", "4",
+             "-pix_fmt", "yuv420p", "-vf", _EVEN_SCALE],
+}
+
+def _upload_path(url: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, os.path.basename(url))
+
+# Caps CPU seconds ($1) and address space in KiB ($2), then execs the rest at
+# lower priority. A shell wrapper rather than preexec_fn, which can deadlock
+# the child when other threads (the threadpool) are running.
+_LIMITED = 'ulimit -t "$1" && ulimit -v "$2" && shift 2 && exec nice -n 10 "$@"'
+
+def _limited(*command: str) -> list:
+    """``command`` wrapped to run with the transcode CPU, memory and priority limits."""
+    return [
+        "sh", "-c", _LIMITED, "transcode",
+        str(settings.TRANSCODE_CPU_SECONDS), str(settings.TRANSCODE_MEMORY_MB * 1024), *command,
+    ]
+
+def is_animated_gif(path: str) -> bool:
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            return image.format == "GIF" and getattr(image, "is_animated", False)
+    except Exception:
+        return False
+
+def _write_poster(source: str, target: str):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.seek(0)
+        image.convert("RGB").save(target, format="JPEG", quality=80)
+
+async def _run_ffmpeg(ffmpeg: str, source: str, target: str, codec_args: list) -> bool:
+    tmp = f"{target}.tmp{os.path.splitext(target)[1]}"
+    process = await asyncio.create_subprocess_exec(
+        *_limited(
+            ffmpeg, "-nostdin", "-y", "-loglevel", "error", "-i", source, "-an", "-threads", "1",
+            *codec_args, tmp,
+        ),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=settings.TRANSCODE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        stderr = b"timed out"
+    if process.returncode != 0:
+        logger.warning("transcode_failed source=%s target=%s error=%r", source, target, stderr.decode()[-500:])
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, target)
+    return True
+
+async def transcode_gif(url: str) -> Optional[Dict[str, str]]:
+    """Build MP4, WebM and poster variants of an animated GIF upload."""
+    ffmpeg = shutil.which(settings.FFMPEG_PATH)
+    source = _upload_path(url)
+    if ffmpeg is None or not await run_in_threadpool(is_animated_gif, source):
+        return None
+
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.TRANSCODE_CONCURRENCY)
+    stem = os.path.basename(source).rsplit(".", 1)[0]
+    url_prefix = url.rsplit("/", 1)[0]
+    variants = {}
+    async with _slots:
+        for name, codec_args in VIDEO_CODECS.items():
+            filename = f"{stem}.{name}"
+            if await _run_ffmpeg(ffmpeg, source, _upload_path(filename), codec_args):
+                variants[name] = f"{url_prefix}/{filename}"
+    if not variants:
+        return None
+    poster = f"{stem}.poster.jpg"
+    try:
+        await run_in_threadpool(_write_poster, source, _upload_path(poster))
+        variants["poster"] = f"{url_prefix}/{poster}"
+    except Exception:
+        logger.warning("poster_failed source=%s", source)
+    return variants
+
+def _gif_urls(content_id: int) -> list:
+    db = SessionLocal()
+    try:
+        content = db.query(Content).filter(Content.id == content_id).first()
+        if content is None:
+            return []
+        urls = [content.image_url] if content.image_url else []
+        urls.extend(content.image_urls or [])
+        return [url for url in urls if url.lower().endswith(".gif")]
+    finally:
+        db.close()
+
+def _save_variants(content_id: int, variants: Dict[str, Dict[str, str]]) -> Optional[tuple[int, str]]:
+    db = SessionLocal()
+    try:
+        content = db.query(Content).filter(Content.id == content_id).first()
+        if content is None:
+            return None
+        content.media_variants = variants
+        db.commit()
+        wall = content.wall
+        return (wall.id, wall.unique_url) if wall is not None else None
+    finally:
+        db.close()
+
+async def transcode_content(content_id: int):
+    """Transcode a content row's animated GIFs and record the variant URLs."""
+    if not settings.TRANSCODE_GIFS:
+        return
+    variants = {}
+    for url in await run_in_threadpool(_gif_urls, content_id):
+        result = await transcode_gif(url)
+        if result:
+            variants[url] = result
+    if not variants:
+        return
+    wall = await run_in_threadpool(_save_variants, content_id, variants)
+    if wall is not None:
+        schedule_snapshot(*wall)
@@ -0,0 +1,148 @@
+"""Cache of serialized public wall responses, keyed by wall version."""
+from collections import OrderedDict
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, FrozenSet, Optional, Sequence
+from app.core.archive import archived_contents
+from app.core.compression import choose_encoding, compress
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.partitioning import wall_contents_criteria
+from app.models.content import Content
+from app.models.wall import Wall
+from app.schemas.content import ContentResponse
+from app.schemas.wall import WallPublicResponse
+import hashlib
+import threading
+
+def wall_version(db: Session, wall: Wall) -> str:
+    """Version token that changes whenever the wall or its contents change.
+
+    Computed from aggregates over the wall's contents, so every worker agrees
+    on it without any cross-process invalidation.
+    """
+    if wall.archive_key:
+        # Archives are immutable, so their key stands in for the aggregates
+        raw = f"{wall.id}:{wall.updated_at}:{wall.archive_key}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:16]
+    count, max_id, max_created, max_updated = (
+        db.query(
+            func.count(Content.id),
+            func.max(Content.id),
+            func.max(Content.created_at),
+            func.max(Content.updated_at),
+        )
+        .filter(*wall_contents_criteria(wall))
+        .one()
+    )
+    raw = f"{wall.id}:{wall.updated_at}:{count}:{max_id}:{max_created}:{max_updated}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def serialize_public_wall(
+    wall: Wall,
+    excluded: Optional[FrozenSet[str]] = None,
+    queued: Sequence[Dict[str, Any]] = (),
+) -> bytes:
+    """JSON body of get_public_wall for a wall, optionally without some content fields.
+    
+    ``queued`` are buffered posts not inserted yet (see app.core.ingest), appended last.
+    """
+    inserted = set()
+    if wall.archive_key:
+        contents = archived_contents(wall)
+    else:
+        # Queried rather than lazy-loaded so the partition key bound applies
+        rows = object_session(wall).query(Content).filter(*wall_contents_criteria(wall)).order_by(Content.id).all()
+        inserted = {row.provisional_id for row in rows}
+        contents = [ContentResponse.model_validate(row) for row in rows]
+    contents.extend(content for content in queued if content["id"] not in inserted)
+    response = WallPublicResponse(
+        id=wall.id,
+        title=wall.title,
+        description=wall.description,
+        unique_url=wall.unique_url,
+        is_public=wall.is_public,
+        contents=contents,
+    )
+    return response.model_dump_json(exclude={"contents": {"__all__": set(excluded)}} if excluded else None).encode()
+
+class CachedBody:
+    """A serialized JSON body plus lazily built compressed variants."""
+
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.body = body
+        # Weak: the same version is served with different content-codings
+        self.etag = f'W/"{version}"'
+        self.variants: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def encoded(self, encoding: str) -> bytes:
+        """Compressed body for an encoding; compressed once per wall version."""
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding)
+            self.variants[encoding] = variant
+        return variant
+
+    async def to_response(self, request: Request) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Vary": "Accept-Encoding",
+            # Passcode-protected: browsers may keep it but must revalidate
+            "Cache-Control": "private, no-cache",
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        body = self.body
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+        if encoding and len(body) >= settings.COMPRESSION_MIN_SIZE:
+            if encoding not in self.variants:
+                await run_in_threadpool(self.encoded, encoding)
+            body = self.variants[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+class WallCache:
+    """LRU of CachedBody per wall and field selection, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple[int, Optional[FrozenSet[str]]], CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, wall_id: int, version: str, excluded: Optional[FrozenSet[str]] = None) -> Optional[CachedBody]:
+        key = (wall_id, excluded)
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry.version == version
+            if hit:
+                self._entries.move_to_end(key)
+        record_cache_lookup("public_wall", hit)
+        return entry if hit else None
+
+    def put(
+        self, wall_id: int, version: str, body: bytes, excluded: Optional[FrozenSet[str]] = None
+    ) -> CachedBody:
+        key = (wall_id, excluded)
+        entry = CachedBody(version, body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            # Variants grow entries after insertion, so re-measure on every put
+            while len(self._entries) > 1 and sum(e.size for e in self._entries.values()) > self.max_bytes:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, wall_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == wall_id]:
+                del self._entries[key]
+
+public_wall_cache = WallCache(settings.WALL_CACHE_MAX_BYTES)
@@ -0,0 +1,23 @@
+"""Per-wall counts as correlated subqueries, so they load with the wall in one statement.
+
+Queries selecting them must set ``include_hidden``; hidden contents are
+counted separately rather than filtered out.
+"""
+from sqlalchemy import func, select
+from app.models.content import Content
+from app.models.contributor import Contributor
+from app.models.wall import Wall
+
+def content_count(hidden: bool = False):
+    return (
+        select(func.count(Content.id))
+        .where(Content.wall_id == Wall.id, Content.is_hidden.is_(hidden))
+        .correlate(Wall)
+        .scalar_subquery()
+    )
+
+def contributor_count(active_only: bool = False):
+    criteria = [Contributor.wall_id == Wall.id]
+    if active_only:
+        criteria.append(Contributor.is_active.is_(True))
+    return select(func.count(Contributor.id)).where(*criteria).correlate(Wall).scalar_subquery()
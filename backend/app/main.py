@@ -1,17 +1,71 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer
+from starlette.concurrency import run_in_threadpool
+from app.core.analytics import analytics_flush_loop, flush_views
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.database import pin_to_primary, replicas, start_query_stats, warm_pool
+from app.core.health import readiness_report
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.ingest import ingest_buffer
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.purge import maintenance_loop
+from app.api import media
 from app.api.v1.api import api_router
+import asyncio
+import logging
 import os
+import time
+
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("app.request")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Deferred startup work, kept out of import time for fast cold starts."""
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    await run_in_threadpool(warm_pool, settings.DB_POOL_WARM_CONNECTIONS)
+    maintenance = asyncio.create_task(maintenance_loop()) if settings.ORPHAN_GC_INTERVAL_SECONDS else None
+    analytics = asyncio.create_task(analytics_flush_loop()) if settings.ANALYTICS_ENABLED else None
+    if settings.INGEST_BUFFER_ENABLED:
+        # Replays posts journaled by workers that died before inserting them
+        await ingest_buffer.start()
+    yield
+    if ingest_buffer.running:
+        await ingest_buffer.stop()
+    if maintenance is not None:
+        maintenance.cancel()
+    if analytics is not None:
+        analytics.cancel()
+        # Write out what this worker buffered since the last flush
+        try:
+            await run_in_threadpool(flush_views)
+        except Exception:
+            logger.exception("analytics_flush_failed")
 
 app = FastAPI(
     title="WishingWall API",
     description="API for WishingWall platform",
     version="1.0.0",
+    lifespan=lifespan,
+    # Endpoints return ORM objects; response_model validates them once and
+    # orjson encodes the result, instead of validating twice and using stdlib json
+    default_response_class=ORJSONResponse,
+)
+
+# Replays responses to retried writes; inside compression so stored bodies stay plain
+app.add_middleware(
+    IdempotencyMiddleware,
+    routes=[("POST", "/api/v1/content"), ("POST", "/api/v1/contributors/invite")],
 )
 
+# Compression middleware (cached walls arrive pre-compressed and pass through)
+app.add_middleware(CompressionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -19,15 +73,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Resumable upload clients read these
+    expose_headers=[
+        "Location", "Tus-Resumable", "Upload-Offset", "Upload-Length", "Upload-Expires", "Idempotent-Replayed",
+        "X-Primary-Until",
+    ],
 )
 
+# Opt-in profiling: requests carrying X-Profile: <ADMIN_TOKEN>, or a sampled fraction
+if settings.ADMIN_TOKEN or settings.PROFILING_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware)
+
+@app.middleware("http")
+async def instrumentation_middleware(request: Request, call_next):
+    """Record request metrics, attribute DB queries and expose them via Server-Timing."""
+    stats = start_query_stats(request.scope)
+    started = time.perf_counter()
+    status_code = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            method=request.method,
+            # Label by route template so path parameters don't explode cardinality
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        ).observe(time.perf_counter() - started)
+    total_ms = (time.perf_counter() - started) * 1000
+    response.headers.append(
+        "Server-Timing",
+        f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries", '
+        f'db-slowest;dur={stats.slowest_ms:.2f}, app;dur={total_ms:.2f}',
+    )
+    logger.info(
+        "request route=%r status=%d duration_ms=%.2f db_queries=%d db_ms=%.2f db_slowest_ms=%.2f",
+        stats.route,
+        response.status_code,
+        total_ms,
+        stats.count,
+        stats.total_ms,
+        stats.slowest_ms,
+    )
+    return response
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Pin clients to the primary briefly after a successful write."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        pin_to_primary(response)
+    return response
+
+if replicas:
+    app.middleware("http")(read_your_writes_middleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
-# Serve static files (uploaded images)
-upload_dir = settings.UPLOAD_DIR
-os.makedirs(upload_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
+# Serve uploaded images with immutable caching, ranges and derivatives
+app.include_router(media.router, prefix="/uploads")
 
 security = HTTPBearer()
 
@@ -35,7 +142,23 @@ security = HTTPBearer()
 async def root():
     return {"message": "WishingWall API", "version": "1.0.0"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    """Liveness: the process is up and serving requests."""
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: dependencies are usable, with per-dependency latency."""
+    report = await readiness_report()
+    status_code = (
+        status.HTTP_503_SERVICE_UNAVAILABLE if report["status"] == "unavailable" else status.HTTP_200_OK
+    )
+    return JSONResponse(report, status_code=status_code)
+
@@ -1,7 +1,9 @@
 from app.models.user import User
 from app.models.wall import Wall
-from app.models.contributor import Contributor
+from app.models.contributor import ArchivedContributor, Contributor
 from app.models.content import Content
+from app.models.idempotency import IdempotencyKey
+from app.models.analytics import WallViewBucket
 
-__all__ = ["User", "Wall", "Contributor", "Content"]
+__all__ = ["User", "Wall", "Contributor", "ArchivedContributor", "Content", "IdempotencyKey", "WallViewBucket"]
 
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime, LargeBinary, ForeignKey
+from app.core.database import Base
+
+class WallViewBucket(Base):
+    """Public wall views in one ANALYTICS_BUCKET_SECONDS window."""
+    __tablename__ = "wall_view_buckets"
+    
+    wall_id = Column(Integer, ForeignKey("walls.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    visitors = Column(LargeBinary, nullable=True)  # zlib-compressed HyperLogLog registers
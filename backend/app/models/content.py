@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, ForeignKey, Enum, JSON, event, false
+from sqlalchemy.orm import Session, relationship, with_loader_criteria
 from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
@@ -15,13 +15,16 @@ class Content(Base):
     __tablename__ = "contents"
     
     id = Column(Integer, primary_key=True, index=True)
-    wall_id = Column(Integer, ForeignKey("walls.id"), nullable=False)
-    contributor_id = Column(Integer, ForeignKey("contributors.id"), nullable=False)
+    wall_id = Column(Integer, ForeignKey("walls.id", ondelete="CASCADE"), nullable=False, index=True)
+    contributor_id = Column(Integer, ForeignKey("contributors.id", ondelete="CASCADE"), nullable=False, index=True)
     content_type = Column(Enum(ContentType), nullable=False)
     text = Column(Text, nullable=True)
     image_url = Column(String, nullable=True)  # For backward compatibility (single image)
     image_urls = Column(JSON, nullable=True)  # Array of image URLs for multiple images
+    media_variants = Column(JSON, nullable=True)  # Image URL -> {"mp4", "webm", "poster"} URLs for animated GIFs
     author_name = Column(String, nullable=True)  # Optional name override
+    provisional_id = Column(BigInteger, nullable=True, index=True)  # Id acknowledged by buffered ingestion
+    is_hidden = Column(Boolean, nullable=False, default=False, server_default=false())  # Hidden by the wall admin
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -29,3 +32,10 @@ class Content(Base):
     wall = relationship("Wall", back_populates="contents")
     contributor = relationship("Contributor", back_populates="contents")
 
+@event.listens_for(Session, "do_orm_execute")
+def _hide_hidden_contents(execute_state):
+    """Moderated-away contents are invisible to ORM queries unless include_hidden is set."""
+    if execute_state.is_select and not execute_state.execution_options.get("include_hidden", False):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Content, Content.is_hidden.is_(False), include_aliases=True)
+        )
@@ -8,7 +8,7 @@ class Contributor(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, nullable=False, index=True)
-    wall_id = Column(Integer, ForeignKey("walls.id"), nullable=False)
+    wall_id = Column(Integer, ForeignKey("walls.id", ondelete="CASCADE"), nullable=False, index=True)
     is_active = Column(Boolean, default=True)
     invite_token = Column(String, unique=True, index=True, nullable=False)
     invited_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -16,5 +16,14 @@ class Contributor(Base):
     
     # Relationships
     wall = relationship("Wall", back_populates="contributors")
-    contents = relationship("Content", back_populates="contributor", cascade="all, delete-orphan")
+    contents = relationship("Content", back_populates="contributor", cascade="all, delete-orphan", passive_deletes=True)
 
+
+class ArchivedContributor(Base):
+    """What's left of a contributor while its wall is archived: enough to resolve invite tokens."""
+    __tablename__ = "archived_contributors"
+    
+    id = Column(Integer, primary_key=True)  # The archived Contributor.id, reused on restore
+    wall_id = Column(Integer, ForeignKey("walls.id", ondelete="CASCADE"), nullable=False, index=True)
+    invite_token = Column(String, unique=True, index=True, nullable=False)
+    is_active = Column(Boolean, default=True)
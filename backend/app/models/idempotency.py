@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, JSON
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    # sha256 of method, path, credentials and the client's Idempotency-Key
+    key = Column(String(64), primary_key=True)
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is in flight
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
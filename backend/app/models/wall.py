@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, event
+from sqlalchemy.orm import Session, relationship, with_loader_criteria
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -15,9 +15,20 @@ class Wall(Base):
     admin_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Set while a background purge removes the wall
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    archive_key = Column(String, nullable=True)  # Set while contents and contributors live in an archive blob
     
-    # Relationships
+    # Relationships (children are removed by ON DELETE CASCADE, never loaded to be deleted)
     admin = relationship("User", back_populates="walls")
-    contributors = relationship("Contributor", back_populates="wall", cascade="all, delete-orphan")
-    contents = relationship("Content", back_populates="wall", cascade="all, delete-orphan")
+    contributors = relationship("Contributor", back_populates="wall", cascade="all, delete-orphan", passive_deletes=True)
+    contents = relationship("Content", back_populates="wall", cascade="all, delete-orphan", passive_deletes=True)
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted_walls(execute_state):
+    """Walls pending purge are invisible to ORM queries unless include_deleted is set."""
+    if execute_state.is_select and not execute_state.execution_options.get("include_deleted", False):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Wall, Wall.deleted_at.is_(None), include_aliases=True)
+        )
 
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
 from app.models.content import ContentType
 
 class ContentCreate(BaseModel):
@@ -19,9 +19,26 @@ class ContentResponse(BaseModel):
     text: Optional[str]
     image_url: Optional[str]
     image_urls: Optional[List[str]]
+    media_variants: Optional[Dict[str, Dict[str, str]]] = None
     author_name: Optional[str]
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ContentCreateResponse(ContentResponse):
+    # Set when the post came from an anonymous guest; send it back as
+    # guest_token on later posts to keep the same contributor
+    guest_token: Optional[str] = None
+
+class ContentModeration(BaseModel):
+    """Select a wall's contents by any combination of ids, contributor and creation time."""
+    action: Literal["delete", "hide", "unhide"]
+    content_ids: Optional[List[int]] = None
+    contributor_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class ModerationResult(BaseModel):
+    action: str
+    affected: int
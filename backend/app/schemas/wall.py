@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List
 from app.schemas.content import ContentResponse
+from app.schemas.contributor import ContributorResponse
 
 class WallCreate(BaseModel):
     title: str
@@ -37,3 +38,45 @@ class WallPublicResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class WallSummary(BaseModel):
+    id: int
+    title: str
+    description: Optional[str]
+    unique_url: str
+    is_public: bool
+    
+    class Config:
+        from_attributes = True
+
+class WallCounts(BaseModel):
+    contents: int
+    contributors: int
+
+class AdminWallCounts(WallCounts):
+    hidden_contents: int
+    active_contributors: int
+
+class AdminWallBootstrap(BaseModel):
+    """Everything the admin wall page loads."""
+    wall: WallResponse
+    contributors: List[ContributorResponse]
+    counts: AdminWallCounts
+
+class ContributeBootstrap(BaseModel):
+    """Everything the contribute page loads; contributor is None for a new guest."""
+    wall: WallSummary
+    contributor: Optional[ContributorResponse] = None
+    counts: WallCounts
+    own_posts: List[ContentResponse] = []
+
+class ViewBucket(BaseModel):
+    start: datetime
+    views: int
+    unique_visitors: int
+
+class WallAnalytics(BaseModel):
+    """Public views of a wall; unique visitor counts are estimates (~2% error)."""
+    views: int
+    unique_visitors: int
+    buckets: List[ViewBucket]
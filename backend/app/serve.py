@@ -0,0 +1,110 @@
+"""Production server: gunicorn managing uvicorn workers.
+
+Run with ``python -m app.serve``. Every knob comes from ``Settings``.
+"""
+from importlib.util import find_spec
+from typing import Optional
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+from app.core.config import settings
+import glob
+import os
+import tempfile
+
+class TunedUvicornWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools when they are installed."""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if find_spec("uvloop") else "auto",
+        "http": "httptools" if find_spec("httptools") else "auto",
+    }
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota from cgroup v2, if the container is limited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return int(quota) / int(period)
+
+def available_cpus() -> int:
+    """Number of CPUs this process may actually use."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(int(limit), 1))
+    return cpus
+
+def worker_count() -> int:
+    """Configured worker count, or one sized from the available CPUs."""
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    return max(available_cpus() * settings.WORKERS_PER_CPU, 2)
+
+def _prepare_metrics_dir():
+    """Give prometheus_client a shared directory free of stale samples before workers fork."""
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        # Only prometheus_client's own files: the directory may hold anything else
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="wishingwall-metrics-")
+
+def _child_exit(server, worker):
+    """Drop the metrics of a dead worker from the live gauges."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+class Server(BaseApplication):
+    """Gunicorn application configured from Settings instead of a config file."""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        return app
+
+def server_options() -> dict:
+    """Gunicorn settings derived from Settings."""
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": "app.serve.TunedUvicornWorker",
+        "backlog": settings.BACKLOG,
+        # Client addresses (rate limits, upload quotas, unique visitors) come from these proxies' headers
+        "forwarded_allow_ips": settings.FORWARDED_ALLOW_IPS,
+        "keepalive": settings.KEEPALIVE_SECONDS,
+        "timeout": settings.WORKER_TIMEOUT_SECONDS,
+        # SIGTERM stops accepting connections and drains in-flight requests for this long
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT_SECONDS,
+        # Recycle workers to bound memory growth; jitter keeps them from restarting together
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "child_exit": _child_exit,
+        "accesslog": "-",
+        "errorlog": "-",
+        "loglevel": settings.LOG_LEVEL.lower(),
+    }
+
+def main():
+    _prepare_metrics_dir()
+    Server(server_options()).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Shared fixtures: a throwaway SQLite database and storage directories per run.
+
+Settings are read when app modules are imported, so the environment is set
+before anything from ``app`` is imported.
+"""
+import os
+import tempfile
+import uuid
+
+_root = tempfile.mkdtemp(prefix="wishingwall-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_root}/primary.db",
+    # The primary doubles as its replica, so replica routing and read-your-writes
+    # pinning are active in every test; test_replicas swaps in a separate database
+    "DATABASE_REPLICA_URLS": f'["sqlite:///{_root}/primary.db"]',
+    "SECRET_KEY": "test-secret",
+    "UPLOAD_DIR": os.path.join(_root, "uploads"),
+    "SNAPSHOT_DIR": os.path.join(_root, "snapshots"),
+    "PREVIEW_DIR": os.path.join(_root, "previews"),
+    "ARCHIVE_DIR": os.path.join(_root, "archives"),
+    "INGEST_JOURNAL_DIR": os.path.join(_root, "ingest"),
+    "PROFILE_DIR": os.path.join(_root, "profiles"),
+    "SNAPSHOTS_ENABLED": "false",
+    "PREVIEWS_ENABLED": "false",
+    "ANALYTICS_ENABLED": "false",
+    "ORPHAN_GC_INTERVAL_SECONDS": "0",
+    "DB_POOL_WARM_CONNECTIONS": "0",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.database import SessionLocal
+from app.core.db_init import init_db
+from app.core.security import create_access_token
+from app.main import app
+from app.models.user import User
+
+init_db()
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def admin():
+    """A wall admin's id and Authorization header."""
+    return make_admin()
+
+def make_admin() -> dict:
+    """Create a user; returns its id and Authorization header."""
+    db = SessionLocal()
+    try:
+        user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-", full_name="Admin")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+    return {"id": user_id, "headers": {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}}
+
+@pytest.fixture
+def wall(client, admin):
+    """A wall owned by ``admin``, as returned by POST /api/v1/walls."""
+    response = client.post("/api/v1/walls", json={"title": "Farewell"}, headers=admin["headers"])
+    assert response.status_code == 201
+    return response.json()
+
+def post_text(client, wall, text="Congratulations!", **form):
+    """Post a text message to ``wall`` with its passcode; returns the response."""
+    data = {
+        "wall_id": wall["id"],
+        "content_type": "text",
+        "text": text,
+        "wall_url": wall["unique_url"],
+        "wall_passcode": wall["passcode"],
+        **form,
+    }
+    return client.post("/api/v1/content", data=data)
@@ -0,0 +1,30 @@
+import time
+from app.core import analytics
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.analytics import WallViewBucket
+from app.serve import Server, server_options
+
+def test_flushes_merge_into_one_bucket_per_wall(client, wall, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_ENABLED", True)
+    hour = analytics.bucket_start(time.time())
+    monkeypatch.setattr(analytics, "bucket_start", lambda ts: hour)
+    for visitor in ["a", "b", "a"]:
+        analytics.record_view(wall["id"], visitor)
+    analytics.flush_views()
+    analytics.record_view(wall["id"], "c")
+    analytics.flush_views()
+
+    db = SessionLocal()
+    try:
+        report = analytics.wall_analytics(db, wall["id"], hour, 3600)
+        assert db.query(WallViewBucket).filter(WallViewBucket.wall_id == wall["id"]).count() == 1
+    finally:
+        db.close()
+    assert report["views"] == 4
+    assert report["unique_visitors"] == 3
+
+def test_gunicorn_trusts_configured_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "10.0.0.1,10.0.0.2")
+
+    assert Server(server_options()).cfg.forwarded_allow_ips == ["10.0.0.1", "10.0.0.2"]
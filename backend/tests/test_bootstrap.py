@@ -0,0 +1,127 @@
+from app.core.database import SessionLocal
+from app.models.contributor import Contributor
+from tests.conftest import make_admin, post_text
+
+def _invite(client, admin, wall, email="guest@example.com") -> dict:
+    """Invite a contributor; returns its id and invite token."""
+    invited = client.post(
+        "/api/v1/contributors/invite",
+        json={"wall_id": wall["id"], "email": email},
+        headers=admin["headers"],
+    )
+    assert invited.status_code == 201
+    db = SessionLocal()
+    try:
+        return {"id": invited.json()["id"], "token": db.get(Contributor, invited.json()["id"]).invite_token}
+    finally:
+        db.close()
+
+def test_admin_bootstrap_returns_wall_contributors_and_counts(client, admin, wall):
+    invited = _invite(client, admin, wall)
+    post_text(client, wall, text="From the invitee", invite_token=invited["token"])
+    hidden = post_text(client, wall, text="Hide me").json()
+    post_text(client, wall, text="Visible", guest_token=hidden["guest_token"])
+    client.post(
+        f"/api/v1/walls/{wall['id']}/moderation",
+        json={"action": "hide", "content_ids": [hidden["id"]]},
+        headers=admin["headers"],
+    )
+
+    response = client.get(f"/api/v1/walls/{wall['id']}/bootstrap", headers=admin["headers"])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["wall"]["id"] == wall["id"]
+    assert body["wall"]["passcode"] == wall["passcode"]
+    assert [c["id"] for c in body["contributors"]] == [invited["id"], hidden["contributor_id"]]
+    assert body["counts"] == {"contents": 2, "contributors": 2, "hidden_contents": 1, "active_contributors": 2}
+
+def test_admin_bootstrap_is_for_the_walls_admin_only(client, wall):
+    assert client.get(f"/api/v1/walls/{wall['id']}/bootstrap").status_code == 403
+    stranger = make_admin()
+    response = client.get(f"/api/v1/walls/{wall['id']}/bootstrap", headers=stranger["headers"])
+    assert response.status_code == 403
+    assert client.get("/api/v1/walls/999999/bootstrap", headers=stranger["headers"]).status_code == 404
+
+def test_contribute_bootstrap_with_invite_token(client, admin, wall):
+    invited = _invite(client, admin, wall)
+    older = post_text(client, wall, text="Older", invite_token=invited["token"]).json()
+    newer = post_text(client, wall, text="Newer", invite_token=invited["token"]).json()
+    post_text(client, wall, text="Someone else's")
+
+    response = client.get("/api/v1/contributors/bootstrap", params={"invite_token": invited["token"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["wall"]["id"] == wall["id"]
+    assert "passcode" not in body["wall"]
+    assert body["contributor"]["id"] == invited["id"]
+    assert body["counts"] == {"contents": 3, "contributors": 2}
+    assert [post["id"] for post in body["own_posts"]] == [newer["id"], older["id"]]
+
+def test_contribute_bootstrap_with_passcode_and_guest_token(client, wall):
+    first = post_text(client, wall, text="Mine").json()
+    credentials = {"wall_url": wall["unique_url"], "passcode": wall["passcode"]}
+
+    returning = client.get(
+        "/api/v1/contributors/bootstrap", params={**credentials, "guest_token": first["guest_token"]}
+    ).json()
+    new_guest = client.get("/api/v1/contributors/bootstrap", params=credentials).json()
+
+    assert returning["contributor"]["id"] == first["contributor_id"]
+    assert [post["text"] for post in returning["own_posts"]] == ["Mine"]
+    assert new_guest["contributor"] is None
+    assert new_guest["own_posts"] == []
+    assert new_guest["counts"] == {"contents": 1, "contributors": 1}
+
+def test_contribute_bootstrap_rejects_bad_credentials(client, wall):
+    bootstrap = "/api/v1/contributors/bootstrap"
+    assert client.get(bootstrap).status_code == 400
+    assert client.get(bootstrap, params={"invite_token": "nope"}).status_code == 404
+    assert client.get(bootstrap, params={"wall_url": "nope", "passcode": wall["passcode"]}).status_code == 404
+    assert client.get(bootstrap, params={"wall_url": wall["unique_url"], "passcode": "wrong"}).status_code == 401
+
+def test_contribute_bootstrap_fields_limit_own_posts(client, wall):
+    first = post_text(client, wall, text="Mine").json()
+
+    response = client.get("/api/v1/contributors/bootstrap", params={
+        "wall_url": wall["unique_url"],
+        "passcode": wall["passcode"],
+        "guest_token": first["guest_token"],
+        "fields": "text",
+    })
+
+    assert response.status_code == 200
+    assert response.json()["own_posts"] == [{"id": first["id"], "text": "Mine"}]
+    assert response.json()["contributor"]["id"] == first["contributor_id"]
+
+def test_fields_limit_wall_contents(client, wall):
+    posted = post_text(client, wall, text="Hello").json()
+
+    response = client.get(f"/api/v1/content/wall/{wall['id']}", params={"fields": "text, author_name"})
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": posted["id"], "text": "Hello", "author_name": posted["author_name"]}]
+
+def test_fields_limit_public_wall_contents(client, wall):
+    posted = post_text(client, wall, text="Hello").json()
+    public = f"/api/v1/walls/public/{wall['unique_url']}"
+
+    sparse = client.get(public, params={"passcode": wall["passcode"], "fields": "text"})
+    full = client.get(public, params={"passcode": wall["passcode"]})
+
+    assert sparse.status_code == 200
+    assert sparse.json()["contents"] == [{"id": posted["id"], "text": "Hello"}]
+    assert sparse.json()["title"] == wall["title"]
+    # Each selection is cached separately
+    assert full.json()["contents"][0]["created_at"] == posted["created_at"]
+
+def test_unknown_fields_are_rejected(client, wall):
+    response = client.get(f"/api/v1/content/wall/{wall['id']}", params={"fields": "text,passcode"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: passcode"
+    public = client.get(
+        f"/api/v1/walls/public/{wall['unique_url']}", params={"passcode": wall["passcode"], "fields": "secret"}
+    )
+    assert public.status_code == 400
@@ -0,0 +1,45 @@
+from app.core.database import SessionLocal
+from app.models.contributor import Contributor
+from tests.conftest import post_text
+
+def test_remove_contributor_deletes_their_posts(client, admin, wall):
+    invited = client.post(
+        "/api/v1/contributors/invite",
+        json={"wall_id": wall["id"], "email": "guest@example.com"},
+        headers=admin["headers"],
+    )
+    assert invited.status_code == 201
+    contributor_id = invited.json()["id"]
+    db = SessionLocal()
+    try:
+        invite_token = db.get(Contributor, contributor_id).invite_token
+    finally:
+        db.close()
+    assert post_text(client, wall, invite_token=invite_token).status_code == 201
+
+    response = client.delete(f"/api/v1/contributors/{contributor_id}", headers=admin["headers"])
+
+    assert response.status_code == 204
+    assert client.get(f"/api/v1/content/wall/{wall['id']}").json() == []
+    # The cached invite is dropped along with the row
+    assert client.get(f"/api/v1/contributors/verify/{invite_token}").status_code == 404
+
+def test_remove_contributor_republishes_wall(client, admin, wall, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.contributors.schedule_snapshot",
+        lambda wall_id, unique_url: scheduled.append(("snapshot", wall_id, unique_url)),
+    )
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.contributors.schedule_preview",
+        lambda wall_id: scheduled.append(("preview", wall_id)),
+    )
+    invited = client.post(
+        "/api/v1/contributors/invite",
+        json={"wall_id": wall["id"], "email": "guest@example.com"},
+        headers=admin["headers"],
+    )
+
+    client.delete(f"/api/v1/contributors/{invited.json()['id']}", headers=admin["headers"])
+
+    assert scheduled == [("snapshot", wall["id"], wall["unique_url"]), ("preview", wall["id"])]
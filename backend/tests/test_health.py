@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+from app.core import health
+from app.core.config import settings
+
+def _engine(tmp_path, max_overflow: int):
+    return create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=1, max_overflow=max_overflow
+    )
+
+def test_pool_capacity(tmp_path):
+    assert health.pool_capacity(_engine(tmp_path, 4).pool) == 5
+    assert health.pool_capacity(_engine(tmp_path, -1).pool) is None
+
+def test_unbounded_pool_is_never_exhausted(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, -1)
+    monkeypatch.setattr(health, "engine", engine)
+    held = [engine.connect() for _ in range(3)]
+    try:
+        assert health._check_database() == {"pool_checked_out": 3, "pool_capacity": None}
+    finally:
+        for conn in held:
+            conn.close()
+
+def test_exhausted_pool_fails(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, 1)
+    monkeypatch.setattr(health, "engine", engine)
+    held = [engine.connect() for _ in range(2)]
+    try:
+        result = asyncio.run(health._run_check("database", lambda: run_in_threadpool(health._check_database)))
+    finally:
+        for conn in held:
+            conn.close()
+
+    assert (result["status"], result["error"]) == ("fail", "connection pool exhausted")
+
+def test_hung_check_holds_one_thread_across_probes(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.05)
+    release = threading.Event()
+    calls = []
+
+    def hung() -> dict:
+        calls.append(1)
+        release.wait(5)
+        return {}
+
+    async def probes():
+        check = lambda: run_in_threadpool(hung)
+        first = await health._run_check("hung", check)
+        second = await health._run_check("hung", check)
+        release.set()
+        await asyncio.sleep(0.05)
+        third = await health._run_check("hung", check)
+        return first, second, third
+
+    first, second, third = asyncio.run(probes())
+
+    assert first["error"] == second["error"] == "timed out"
+    assert third["status"] == "ok"
+    assert len(calls) == 2
+    assert "hung" not in health._in_flight
@@ -0,0 +1,86 @@
+import uuid
+from tests.conftest import post_text
+
+def _key() -> dict:
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+def _post(client, wall, headers, **form):
+    data = {
+        "wall_id": wall["id"],
+        "content_type": "text",
+        "text": "Congratulations!",
+        "wall_url": wall["unique_url"],
+        "wall_passcode": wall["passcode"],
+        **form,
+    }
+    return client.post("/api/v1/content", data=data, headers=headers)
+
+def _texts(client, wall) -> list:
+    return [item["text"] for item in client.get(f"/api/v1/content/wall/{wall['id']}").json()]
+
+def test_retry_is_replayed(client, wall):
+    guest_token = post_text(client, wall).json()["guest_token"]
+    key = _key()
+
+    first = _post(client, wall, key, guest_token=guest_token, text="Once")
+    retry = _post(client, wall, key, guest_token=guest_token, text="Once")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    assert _texts(client, wall).count("Once") == 1
+
+def test_fresh_guest_token_is_never_replayed(client, wall):
+    key = _key()
+
+    first = _post(client, wall, key)
+    second = _post(client, wall, key)
+
+    assert first.headers["cache-control"] == "no-store"
+    assert "idempotent-replayed" not in second.headers
+    assert first.json()["guest_token"] != second.json()["guest_token"]
+
+def test_key_is_scoped_by_credentials(client, admin, wall):
+    other = client.post("/api/v1/walls", json={"title": "Other"}, headers=admin["headers"]).json()
+    mine, theirs, elsewhere_token = [post_text(client, target).json()["guest_token"] for target in (wall, wall, other)]
+    key = _key()
+
+    first = _post(client, wall, key, guest_token=mine, text="Mine")
+    # Same key, another guest on the same wall
+    stranger = _post(client, wall, key, guest_token=theirs, text="Theirs")
+    # Same key on another wall
+    elsewhere = _post(client, other, key, guest_token=elsewhere_token, text="Elsewhere")
+
+    assert first.status_code == stranger.status_code == elsewhere.status_code == 201
+    assert "idempotent-replayed" not in stranger.headers
+    assert "idempotent-replayed" not in elsewhere.headers
+    assert (stranger.json()["text"], elsewhere.json()["text"]) == ("Theirs", "Elsewhere")
+
+def test_multipart_body_reaches_the_endpoint(client, wall):
+    guest_token = post_text(client, wall).json()["guest_token"]
+    data = {
+        "wall_id": str(wall["id"]),
+        "content_type": "text",
+        "text": "Multipart",
+        "wall_url": wall["unique_url"],
+        "wall_passcode": wall["passcode"],
+        "guest_token": guest_token,
+    }
+
+    response = client.post(
+        "/api/v1/content", data=data, files={"unused": ("a.txt", b"x" * 200_000)}, headers=_key()
+    )
+
+    assert response.status_code == 201
+    assert response.json()["text"] == "Multipart"
+
+def test_invites_replay_for_the_same_admin(client, admin, wall):
+    key = _key()
+    body = {"wall_id": wall["id"], "email": "friend@example.com"}
+
+    first = client.post("/api/v1/contributors/invite", json=body, headers={**admin["headers"], **key})
+    retry = client.post("/api/v1/contributors/invite", json=body, headers={**admin["headers"], **key})
+
+    assert first.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
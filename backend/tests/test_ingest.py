@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.ingest import DEAD_LETTER, IngestBuffer, ingest_buffer, insert_contents, post_record, recover_journals
+from app.models.content import Content, ContentType
+from app.models.contributor import Contributor
+from app.models.wall import Wall
+from tests.conftest import post_text
+
+def _record(wall_id: int, text: str = "Cheers") -> dict:
+    db = SessionLocal()
+    try:
+        wall = db.get(Wall, wall_id)
+        contributor_id = db.query(Contributor.id).filter(Contributor.wall_id == wall_id).scalar()
+        return post_record(wall, contributor_id, ContentType.TEXT, text, None, None, None)
+    finally:
+        db.close()
+
+def _inserted(record: dict):
+    db = SessionLocal()
+    try:
+        return db.query(Content).filter(Content.provisional_id == record["provisional_id"]).first()
+    finally:
+        db.close()
+
+def test_rejected_post_is_set_aside_after_failed_flushes(client, wall, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "INGEST_BATCH_MS", 5)
+    monkeypatch.setattr(settings, "INGEST_FLUSH_ATTEMPTS", 2)
+    post_text(client, wall)  # Creates the guest contributor
+    good, bad = _record(wall["id"]), _record(wall["id"])
+    bad["content_type"] = "hologram"
+
+    async def run():
+        buffer = IngestBuffer()
+        await buffer.start()
+        await asyncio.gather(buffer.enqueue(bad), buffer.enqueue(good))
+        for _ in range(200):
+            if not buffer.is_queued(good["provisional_id"]) and not buffer.is_queued(bad["provisional_id"]):
+                break
+            await asyncio.sleep(0.01)
+        await buffer.stop()
+
+    asyncio.run(run())
+
+    assert _inserted(good) is not None
+    assert _inserted(bad) is None
+    with open(tmp_path / DEAD_LETTER) as f:
+        (rejected,) = [json.loads(line) for line in f]
+    assert rejected["record"]["provisional_id"] == bad["provisional_id"]
+    # Only the dead-letter file is left; the journal segments are gone
+    assert os.listdir(tmp_path) == [DEAD_LETTER]
+
+def test_recovery_keeps_dead_letter_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_JOURNAL_DIR", str(tmp_path))
+    (tmp_path / DEAD_LETTER).write_text('{"record":{},"error":"ValueError()"}\n')
+
+    assert recover_journals() == 0
+    assert os.listdir(tmp_path) == [DEAD_LETTER]
+
+def test_inserted_posts_take_database_clock(client, wall):
+    post_text(client, wall)
+    record = _record(wall["id"])
+    record["created_at"] = "2001-01-01T00:00:00+00:00"
+
+    insert_contents([record])
+
+    assert _inserted(record).created_at.year > 2001
+
+def test_sparse_read_racing_a_flush_lists_post_once(client, wall, monkeypatch):
+    post_text(client, wall)
+    record = _record(wall["id"], "Mid-flush")
+    # Inserted by the flusher but not yet dropped from the queue
+    insert_contents([record])
+    monkeypatch.setattr(ingest_buffer, "_queued", {record["provisional_id"]: record})
+
+    response = client.get(f"/api/v1/content/wall/{wall['id']}", params={"fields": "text"})
+
+    assert response.status_code == 200
+    assert [item["text"] for item in response.json()].count("Mid-flush") == 1
+    assert all(set(item) == {"id", "text"} for item in response.json())
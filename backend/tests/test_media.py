@@ -0,0 +1,164 @@
+import asyncio
+import io
+import os
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from app.api import media
+from app.api.media import IMMUTABLE_CACHE_CONTROL, _pillow_can_save
+from app.core.config import settings
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def gif(upload_dir):
+    data = bytes(range(256)) * 40
+    (upload_dir / "party.gif").write_bytes(data)
+    return data
+
+@pytest.fixture
+def png(upload_dir):
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (800, 400), (200, 40, 40)).save(out, "PNG")
+    (upload_dir / "cake.png").write_bytes(out.getvalue())
+    return out.getvalue()
+
+def _image(response):
+    from PIL import Image
+
+    return Image.open(io.BytesIO(response.content))
+
+def test_full_response_is_cacheable_forever(client, gif):
+    response = client.get("/uploads/party.gif")
+
+    assert response.status_code == 200
+    assert response.content == gif
+    assert response.headers["content-type"] == "image/gif"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"].startswith('"')
+
+def test_matching_etag_is_not_modified(client, gif):
+    etag = client.get("/uploads/party.gif").headers["etag"]
+
+    response = client.get("/uploads/party.gif", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+def test_byte_ranges(client, gif):
+    response = client.get("/uploads/party.gif", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == gif[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(gif)}"
+
+    suffix = client.get("/uploads/party.gif", headers={"Range": "bytes=-5"})
+    assert suffix.status_code == 206
+    assert suffix.content == gif[-5:]
+
+    unsatisfiable = client.get("/uploads/party.gif", headers={"Range": f"bytes={len(gif)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(gif)}"
+
+def test_stale_if_range_gets_the_whole_file(client, gif):
+    response = client.get("/uploads/party.gif", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == gif
+
+def test_head_has_length_without_body(client, gif):
+    response = client.head("/uploads/party.gif")
+
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(gif))
+    assert response.content == b""
+
+def test_width_picks_a_resized_derivative(client, png, upload_dir):
+    response = client.get("/uploads/cake.png", params={"w": 300})
+
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept"
+    assert _image(response).size == (320, 160)
+    assert os.listdir(upload_dir / ".derivatives") == ["cake.w320.png"]
+
+@pytest.mark.skipif(not _pillow_can_save("WEBP"), reason="Pillow built without WebP")
+def test_accept_negotiates_webp(client, png):
+    response = client.get("/uploads/cake.png", headers={"Accept": "image/webp,image/*"})
+
+    assert response.headers["content-type"] == "image/webp"
+    assert _image(response).format == "WEBP"
+    assert client.get("/uploads/cake.png").content == png
+
+@pytest.mark.skipif(not _pillow_can_save("WEBP"), reason="Pillow built without WebP")
+def test_accept_honours_q_values(client, png):
+    refused = client.get("/uploads/cake.png", headers={"Accept": "image/webp;q=0, image/*"})
+    weighted = client.get("/uploads/cake.png", headers={"Accept": "image/webp;q=0.8, image/png"})
+    wildcard = client.get("/uploads/cake.png", headers={"Accept": "*/*"})
+
+    assert refused.headers["content-type"] == "image/png"
+    assert weighted.headers["content-type"] == "image/webp"
+    assert wildcard.headers["content-type"] == "image/png"
+
+def test_concurrent_requests_build_a_derivative_once(png, upload_dir, monkeypatch):
+    builds = []
+    build = media._build_derivative
+
+    def counted(*args):
+        builds.append(args)
+        time.sleep(0.05)
+        build(*args)
+
+    monkeypatch.setattr(media, "_build_derivative", counted)
+    source = str(upload_dir / "cake.png")
+
+    async def run():
+        return await asyncio.gather(*(media._variant(source, "image/png", None, 320) for _ in range(4)))
+
+    results = asyncio.run(run())
+
+    assert len(builds) == 1
+    assert {path for path, _ in results} == {str(upload_dir / ".derivatives" / "cake.w320.png")}
+    assert os.listdir(upload_dir / ".derivatives") == ["cake.w320.png"]
+
+def test_hidden_and_missing_files_are_not_served(client, gif, upload_dir):
+    (upload_dir / ".partial").mkdir()
+    (upload_dir / ".partial" / "secret").write_bytes(b"partial")
+
+    assert client.get("/uploads/.partial").status_code == 404
+    assert client.get("/uploads/missing.gif").status_code == 404
+
+def _static_client(directory) -> TestClient:
+    static = FastAPI()
+    static.mount("/uploads", StaticFiles(directory=str(directory)))
+    return TestClient(static)
+
+def test_bodies_match_static_files(client, gif, upload_dir):
+    theirs = _static_client(upload_dir).get("/uploads/party.gif")
+
+    assert client.get("/uploads/party.gif").content == theirs.content
+    # StaticFiles in this Starlette version ignores Range
+    assert client.get("/uploads/party.gif", headers={"Range": "bytes=100-1099"}).content == theirs.content[100:1100]
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run")
+def test_benchmark_against_static_files(client, upload_dir):
+    (upload_dir / "big.gif").write_bytes(os.urandom(8 * 1024 * 1024))
+    static = _static_client(upload_dir)
+
+    def timed(target: TestClient, headers: dict) -> float:
+        started = time.perf_counter()
+        for _ in range(20):
+            assert target.get("/uploads/big.gif", headers=headers).status_code in (200, 206)
+        return (time.perf_counter() - started) / 20 * 1000
+
+    for label, headers in (("full", {}), ("range", {"Range": "bytes=0-1048575"})):
+        ours, theirs = timed(client, headers), timed(static, headers)
+        print(f"{label}: media route {ours:.2f}ms, StaticFiles {theirs:.2f}ms")
+        assert ours <= theirs * 2
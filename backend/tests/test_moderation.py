@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+import os
+from app.core.config import settings
+from tests.conftest import make_admin, post_text
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 56
+
+def _moderate(client, admin, wall, **body):
+    return client.post(f"/api/v1/walls/{wall['id']}/moderation", json=body, headers=admin["headers"])
+
+def _texts(client, wall) -> list:
+    return sorted(item["text"] for item in client.get(f"/api/v1/content/wall/{wall['id']}").json())
+
+def _hidden(client, admin, wall) -> list:
+    response = client.get(f"/api/v1/walls/{wall['id']}/hidden-contents", headers=admin["headers"])
+    return sorted(item["text"] for item in response.json())
+
+def test_hide_and_unhide_by_ids(client, admin, wall):
+    ids = [post_text(client, wall, text=text).json()["id"] for text in ("a", "b", "c")]
+
+    hidden = _moderate(client, admin, wall, action="hide", content_ids=ids[:2])
+
+    assert hidden.json() == {"action": "hide", "affected": 2}
+    assert _texts(client, wall) == ["c"]
+    assert _hidden(client, admin, wall) == ["a", "b"]
+
+    assert _moderate(client, admin, wall, action="unhide", content_ids=ids).json()["affected"] == 3
+    assert _texts(client, wall) == ["a", "b", "c"]
+    assert _hidden(client, admin, wall) == []
+
+def test_delete_a_contributors_posts_and_files(client, admin, wall, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    spammer = post_text(client, wall, text="spam 1").json()
+    post_text(client, wall, text="spam 2", guest_token=spammer["guest_token"])
+    image = client.post("/api/v1/content", data={
+        "wall_id": wall["id"],
+        "content_type": "text_image",
+        "text": "spam 3",
+        "wall_url": wall["unique_url"],
+        "wall_passcode": wall["passcode"],
+        "guest_token": spammer["guest_token"],
+    }, files={"image": ("spam.png", PNG, "image/png")}).json()
+    post_text(client, wall, text="kind words")
+    assert os.listdir(tmp_path) == [os.path.basename(image["image_url"])]
+
+    response = _moderate(client, admin, wall, action="delete", contributor_id=spammer["contributor_id"])
+
+    assert response.json() == {"action": "delete", "affected": 3}
+    assert _texts(client, wall) == ["kind words"]
+    assert os.listdir(tmp_path) == []
+
+def test_filters_combine(client, admin, wall):
+    early = post_text(client, wall, text="early").json()
+    post_text(client, wall, text="late", guest_token=early["guest_token"])
+    created = datetime.fromisoformat(early["created_at"])
+    day = timedelta(days=1)
+
+    before_all = _moderate(client, admin, wall, action="hide", created_before=(created - day).isoformat())
+    one = _moderate(
+        client, admin, wall,
+        action="hide",
+        contributor_id=early["contributor_id"],
+        created_after=(created - day).isoformat(),
+        created_before=(created + day).isoformat(),
+        content_ids=[early["id"]],
+    )
+
+    assert before_all.json()["affected"] == 0
+    assert one.json()["affected"] == 1
+    assert _texts(client, wall) == ["late"]
+
+def test_other_walls_are_untouched(client, admin, wall):
+    other = client.post("/api/v1/walls", json={"title": "Other"}, headers=admin["headers"]).json()
+    foreign = post_text(client, other, text="elsewhere").json()
+    post_text(client, wall, text="here")
+
+    assert _moderate(client, admin, wall, action="delete", content_ids=[foreign["id"]]).json()["affected"] == 0
+    assert _texts(client, other) == ["elsewhere"]
+
+def test_selection_is_required(client, admin, wall):
+    assert _moderate(client, admin, wall, action="hide").status_code == 400
+    assert _moderate(client, admin, wall, action="archive", content_ids=[1]).status_code == 422
+
+def test_only_the_wall_admin_can_moderate(client, admin, wall):
+    headers = make_admin()["headers"]
+    post_text(client, wall, text="mine")
+
+    response = client.post(
+        f"/api/v1/walls/{wall['id']}/moderation", json={"action": "delete", "content_ids": [1]}, headers=headers
+    )
+
+    assert response.status_code == 403
+    assert _texts(client, wall) == ["mine"]
@@ -0,0 +1,111 @@
+"""Rebuilding ``contents`` as a partitioned table on a real PostgreSQL.
+
+Runs when TEST_POSTGRES_URL points at a PostgreSQL database; each test
+works in a schema of its own and drops it afterwards.
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import os
+import uuid
+import pytest
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import Session
+from app.core import partitioning
+from app.core.config import settings
+from app.core.database import Base
+from app.models.content import Content, ContentType
+from app.models.contributor import Contributor
+from app.models.user import User
+from app.models.wall import Wall
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+SEED_WALLS = 8
+SEED_POSTS_PER_WALL = int(os.environ.get("TEST_POSTGRES_POSTS_PER_WALL", "250"))
+
+@pytest.fixture
+def pg_engine():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    schema = f"ww_test_{uuid.uuid4().hex[:12]}"
+    admin_engine = create_engine(POSTGRES_URL)
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin_engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin_engine.dispose()
+
+def _seed(engine):
+    """Walls created months apart, each with posts spread from its creation until now."""
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(email="admin@example.com", hashed_password="-", full_name="Admin").returning(User.id)
+        ).scalar()
+        for n in range(SEED_WALLS):
+            created = now - timedelta(days=30 * n + 3)
+            wall_id = conn.execute(insert(Wall).values(
+                title=f"Wall {n}", unique_url=f"wall-{n}", passcode="secret", admin_id=user_id, created_at=created,
+            ).returning(Wall.id)).scalar()
+            contributor_id = conn.execute(insert(Contributor).values(
+                email=f"guest{n}@example.com", wall_id=wall_id, invite_token=f"token-{n}",
+            ).returning(Contributor.id)).scalar()
+            span = (now - created) / SEED_POSTS_PER_WALL
+            conn.execute(insert(Content), [
+                {
+                    "wall_id": wall_id,
+                    "contributor_id": contributor_id,
+                    "content_type": ContentType.TEXT,
+                    "text": f"Post {i}",
+                    "created_at": created + span * i,
+                }
+                for i in range(SEED_POSTS_PER_WALL)
+            ])
+
+def _wall_reads(engine) -> dict:
+    with Session(engine) as db:
+        return {
+            wall.id: [
+                content_id
+                for (content_id,) in db.query(Content.id)
+                .filter(*partitioning.wall_contents_criteria(wall))
+                .order_by(Content.created_at.desc(), Content.id.desc())
+            ]
+            for wall in db.query(Wall)
+        }
+
+@pytest.mark.parametrize("scheme", ["hash", "range"])
+def test_partition_rebuild_keeps_rows_and_reads(pg_engine, scheme, monkeypatch):
+    _seed(pg_engine)
+    before = _wall_reads(pg_engine)
+
+    with pg_engine.begin() as conn:
+        partitioning.partition_contents(conn, scheme)
+        assert partitioning.is_partitioned(conn)
+    monkeypatch.setattr(settings, "CONTENTS_PARTITIONING", scheme)
+    monkeypatch.setattr(partitioning, "engine", pg_engine)
+
+    with pg_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM contents")).scalar() == SEED_WALLS * SEED_POSTS_PER_WALL
+    assert _wall_reads(pg_engine) == before
+    # The id sequence survived the table swap
+    with Session(pg_engine) as db:
+        wall = db.query(Wall).first()
+        contributor_id = db.query(Contributor.id).filter(Contributor.wall_id == wall.id).scalar()
+        db.add(Content(wall_id=wall.id, contributor_id=contributor_id, content_type=ContentType.TEXT, text="New"))
+        db.commit()
+        assert db.query(func.max(Content.id)).scalar() > max(max(ids) for ids in before.values())
+
+def test_range_bound_is_the_partition_of_the_wall_month(monkeypatch):
+    monkeypatch.setattr(settings, "CONTENTS_PARTITIONING", "range")
+    monkeypatch.setattr(partitioning, "engine", SimpleNamespace(dialect=SimpleNamespace(name="postgresql")))
+    wall = SimpleNamespace(id=1, created_at=datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc))
+
+    _, bound = partitioning.wall_contents_criteria(wall)
+
+    assert bound.right.value == datetime(2026, 10, 1).date()
@@ -0,0 +1,63 @@
+import os
+import pytest
+from app.api.media import IMMUTABLE_CACHE_CONTROL
+from app.core.config import settings
+from tests.conftest import post_text
+
+@pytest.fixture
+def preview_dir(tmp_path, monkeypatch):
+    """Previews on, rendered into a fresh directory."""
+    monkeypatch.setattr(settings, "PREVIEWS_ENABLED", True)
+    monkeypatch.setattr(settings, "PREVIEW_DIR", str(tmp_path))
+    return tmp_path
+
+def _preview(client, wall, passcode=None):
+    return client.get(
+        f"/api/v1/walls/public/{wall['unique_url']}/preview.jpg",
+        params={"passcode": passcode or wall["passcode"]},
+        follow_redirects=False,
+    )
+
+def test_preview_redirects_to_an_immutable_versioned_image(client, wall, preview_dir):
+    redirect = _preview(client, wall)
+
+    assert redirect.status_code == 302
+    assert redirect.headers["cache-control"] == "public, max-age=60"
+    location = redirect.headers["location"]
+    assert location.startswith("preview/") and location.endswith(f".jpg?passcode={wall['passcode']}")
+    version = location[len("preview/"):].split(".jpg")[0]
+    assert os.listdir(preview_dir / str(wall["id"])) == [f"{version}.jpg"]
+
+    image = client.get(f"/api/v1/walls/public/{wall['unique_url']}/{location}")
+
+    assert image.status_code == 200
+    assert image.headers["content-type"] == "image/jpeg"
+    assert image.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert image.content.startswith(b"\xff\xd8")
+
+def test_new_posts_move_the_preview_to_a_new_version(client, wall, preview_dir, monkeypatch):
+    before = _preview(client, wall).headers["location"]
+    # Rendered on demand below rather than by the debounced task
+    monkeypatch.setattr("app.api.v1.endpoints.content.schedule_preview", lambda wall_id: None)
+    post_text(client, wall)
+
+    after = _preview(client, wall).headers["location"]
+
+    assert after != before
+    # The old version's image is still served for links that were unfurled earlier
+    assert client.get(f"/api/v1/walls/public/{wall['unique_url']}/{before}").status_code == 200
+
+def test_preview_requires_the_passcode(client, wall, preview_dir):
+    assert _preview(client, wall, passcode="wrong").status_code == 401
+    location = _preview(client, wall).headers["location"].split("?")[0]
+    image = client.get(f"/api/v1/walls/public/{wall['unique_url']}/{location}", params={"passcode": "wrong"})
+    assert image.status_code == 401
+
+def test_unknown_versions_are_not_found(client, wall, preview_dir):
+    image = f"/api/v1/walls/public/{wall['unique_url']}/preview"
+    params = {"passcode": wall["passcode"]}
+    assert client.get(f"{image}/0123456789abcdef.jpg", params=params).status_code == 404
+    assert client.get(f"{image}/..%2F..%2Fprimary.jpg", params=params).status_code == 404
+
+def test_previews_disabled(client, wall):
+    assert _preview(client, wall).status_code == 404
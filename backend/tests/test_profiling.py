@@ -0,0 +1,118 @@
+import os
+import pytest
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+from app.core import profiling
+from app.core.config import settings
+from app.core.profiling import PROFILE_SUFFIX, ProfilingMiddleware, store_profile
+
+TOKEN = "operator-secret"
+
+class FakeProfiler:
+    """Stands in for pyinstrument.Profiler."""
+
+    def __init__(self, interval, async_mode):
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", TOKEN)
+    return tmp_path
+
+@pytest.fixture
+def profiled(monkeypatch) -> TestClient:
+    monkeypatch.setattr(profiling, "_write_profile", lambda profiler, name: store_profile(name, "{}"))
+    middleware = ProfilingMiddleware(PlainTextResponse("ok"))
+    middleware.profiler_class = FakeProfiler
+    return TestClient(middleware)
+
+def test_x_profile_needs_the_admin_token(profiled, profile_dir):
+    assert "x-profile-id" not in profiled.get("/", headers={"X-Profile": "guess"}).headers
+    assert "x-profile-id" not in profiled.get("/").headers
+    assert os.listdir(profile_dir) == []
+
+    response = profiled.get("/walls/1", headers={"X-Profile": TOKEN})
+
+    name = response.headers["x-profile-id"]
+    assert name.endswith(PROFILE_SUFFIX) and "-GET-walls_1-" in name
+    assert os.listdir(profile_dir) == [name]
+
+def test_sampled_requests_are_profiled_quietly(profiled, profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+
+    response = profiled.get("/")
+
+    assert "x-profile-id" not in response.headers
+    assert len(os.listdir(profile_dir)) == 1
+
+def test_only_the_newest_profiles_are_kept(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_KEEP", 2)
+    for stamp in ("20240101T000001", "20240101T000003", "20240101T000002"):
+        store_profile(f"{stamp}-GET-root-abc{PROFILE_SUFFIX}", "{}")
+    (profile_dir / "notes.txt").write_text("unrelated")
+
+    assert sorted(os.listdir(profile_dir)) == [
+        f"20240101T000002-GET-root-abc{PROFILE_SUFFIX}",
+        f"20240101T000003-GET-root-abc{PROFILE_SUFFIX}",
+        "notes.txt",
+    ]
+
+def test_admin_endpoints_are_hidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+
+    assert client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": ""}).status_code == 404
+
+def test_admin_endpoints_need_the_token(client):
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+    assert client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": "guess"}).status_code == 403
+    assert client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": TOKEN}).json() == {"profiles": []}
+
+def test_stored_profiles_can_be_downloaded(client):
+    name = f"20240101T000001-GET-root-abc{PROFILE_SUFFIX}"
+    store_profile(name, '{"shared": {}}')
+    headers = {"X-Admin-Token": TOKEN}
+
+    assert client.get("/api/v1/admin/profiles", headers=headers).json() == {"profiles": [name]}
+    assert client.get(f"/api/v1/admin/profiles/{name}", headers=headers).json() == {"shared": {}}
+    assert client.get("/api/v1/admin/profiles/missing.json", headers=headers).status_code == 404
+
+def test_tracemalloc_frames_are_bounded(client):
+    headers = {"X-Admin-Token": TOKEN}
+
+    for frames in (0, profiling.MAX_TRACE_FRAMES + 1):
+        response = client.post("/api/v1/admin/tracemalloc/start", params={"frames": frames}, headers=headers)
+        assert response.status_code == 422
+
+def test_tracemalloc_snapshot_diff_round_trip(client):
+    headers = {"X-Admin-Token": TOKEN}
+    assert client.post("/api/v1/admin/tracemalloc/snapshots", headers=headers).status_code == 409
+    assert client.post("/api/v1/admin/tracemalloc/start", params={"frames": 2}, headers=headers).json()["started"]
+    try:
+        older = client.post("/api/v1/admin/tracemalloc/snapshots", headers=headers).json()["snapshot_id"]
+        retained = [bytearray(1024) for _ in range(1000)]
+        newer = client.post("/api/v1/admin/tracemalloc/snapshots", headers=headers).json()["snapshot_id"]
+
+        listed = client.get("/api/v1/admin/tracemalloc/snapshots", headers=headers).json()["snapshots"]
+        diff = client.get(
+            "/api/v1/admin/tracemalloc/diff", params={"older": older, "newer": newer, "limit": 5}, headers=headers
+        )
+        missing = client.get(
+            "/api/v1/admin/tracemalloc/diff", params={"older": "nope", "newer": newer}, headers=headers
+        )
+    finally:
+        assert client.post("/api/v1/admin/tracemalloc/stop", headers=headers).status_code == 204
+
+    assert listed[-2:] == [older, newer]
+    assert diff.status_code == 200
+    assert len(diff.json()["top"]) <= 5
+    assert any("test_profiling.py" in stat["location"] and stat["size_diff_kb"] >= 900 for stat in diff.json()["top"])
+    assert missing.status_code == 404
+    assert client.get("/api/v1/admin/tracemalloc/snapshots", headers=headers).json()["snapshots"] == []
+    del retained
@@ -0,0 +1,35 @@
+import os
+import pytest
+from app.core import purge
+from app.core.config import settings
+from app.core.purge import DERIVATIVE_DIR, remove_upload_files
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    (tmp_path / DERIVATIVE_DIR).mkdir()
+    return tmp_path
+
+def _touch(path, size=10):
+    path.write_bytes(b"x" * size)
+
+def test_removes_files_and_their_derivatives(upload_dir):
+    for stem in ("a", "b", "ab"):
+        _touch(upload_dir / f"{stem}.png")
+        _touch(upload_dir / DERIVATIVE_DIR / f"{stem}.w320.webp")
+    _touch(upload_dir / DERIVATIVE_DIR / "a.w640.png.1234.tmp")
+
+    freed = remove_upload_files(["/uploads/a.png", "/uploads/b.png", "/uploads/missing.png"])
+
+    assert freed == 50
+    assert sorted(os.listdir(upload_dir)) == [DERIVATIVE_DIR, "ab.png"]
+    assert os.listdir(upload_dir / DERIVATIVE_DIR) == ["ab.w320.webp"]
+
+def test_scans_derivatives_once_per_batch(upload_dir, monkeypatch):
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(purge.os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+    remove_upload_files(f"/uploads/{index}.png" for index in range(50))
+
+    assert scans == [str(upload_dir / DERIVATIVE_DIR)]
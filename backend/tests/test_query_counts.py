@@ -0,0 +1,76 @@
+"""List endpoints issue a fixed number of queries however many rows they return.
+
+Counts come from the ``db`` entry of the Server-Timing header.
+"""
+import re
+from tests.conftest import post_text
+
+def _queries(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+def _invite(client, admin, wall, n: int):
+    response = client.post(
+        "/api/v1/contributors/invite",
+        json={"wall_id": wall["id"], "email": f"guest{n}@example.com"},
+        headers=admin["headers"],
+    )
+    assert response.status_code == 201
+
+def test_wall_contents_queries_dont_grow_with_posts(client, wall):
+    url = f"/api/v1/content/wall/{wall['id']}"
+    post_text(client, wall)
+    client.get(url)  # Warms the credential caches
+    few = _queries(client.get(url))
+    for n in range(10):
+        post_text(client, wall, text=f"Post {n}")
+
+    response = client.get(url)
+
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()) == 11
+    assert _queries(response) == few
+
+def test_my_walls_queries_dont_grow_with_walls(client, admin, wall):
+    few = _queries(client.get("/api/v1/walls", headers=admin["headers"]))
+    for n in range(5):
+        client.post("/api/v1/walls", json={"title": f"Wall {n}"}, headers=admin["headers"])
+
+    response = client.get("/api/v1/walls", headers=admin["headers"])
+
+    assert len(response.json()) == 6
+    assert _queries(response) == few
+
+def test_wall_contributors_queries_dont_grow_with_contributors(client, admin, wall):
+    url = f"/api/v1/contributors/wall/{wall['id']}"
+    _invite(client, admin, wall, 0)
+    few = _queries(client.get(url, headers=admin["headers"]))
+    for n in range(1, 8):
+        _invite(client, admin, wall, n)
+
+    response = client.get(url, headers=admin["headers"])
+
+    assert len(response.json()) == 8
+    assert _queries(response) == few
+
+def test_public_wall_queries_dont_grow_with_posts(client, wall):
+    url = f"/api/v1/walls/public/{wall['unique_url']}"
+    post_text(client, wall)
+    client.get(url, params={"passcode": wall["passcode"]})  # Warms the credential cache
+    post_text(client, wall)
+    # Both reads miss the wall cache, since posts changed the wall
+    few = _queries(client.get(url, params={"passcode": wall["passcode"]}))
+    for n in range(10):
+        post_text(client, wall, text=f"Post {n}")
+
+    response = client.get(url, params={"passcode": wall["passcode"]})
+
+    assert len(response.json()["contents"]) == 12
+    assert _queries(response) == few
+
+def test_openapi_keeps_response_models():
+    from app.main import app
+
+    schema = app.openapi()
+    ok = schema["paths"]["/api/v1/content/wall/{wall_id}"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert ok["schema"]["items"]["$ref"].endswith("/ContentResponse")
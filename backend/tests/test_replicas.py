@@ -0,0 +1,67 @@
+"""Read routing between the primary and a replica, as two local SQLite databases.
+
+The replica never receives the primary's writes, so a read that finds
+what was just written must have gone to the primary.
+"""
+import time
+import pytest
+from app.core import database
+from app.core.config import settings
+from app.core.database import PRIMARY_UNTIL_COOKIE, PRIMARY_UNTIL_HEADER, Base, Replica
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    replica = Replica(f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(replica.engine)
+    monkeypatch.setattr(database, "replicas", [replica])
+    yield replica
+    replica.engine.dispose()
+
+def _contents(client, wall, **kwargs):
+    return client.get(f"/api/v1/content/wall/{wall['id']}", **kwargs)
+
+def test_reads_go_to_the_replica(client, wall, replica):
+    client.cookies.clear()
+
+    assert _contents(client, wall).status_code == 404
+
+def test_writes_pin_the_client_to_the_primary(client, wall, replica):
+    client.cookies.clear()
+    response = client.post("/api/v1/content", data={
+        "wall_id": wall["id"],
+        "content_type": "text",
+        "text": "Happy birthday",
+        "wall_url": wall["unique_url"],
+        "wall_passcode": wall["passcode"],
+    })
+
+    assert response.status_code == 201
+    assert float(response.headers[PRIMARY_UNTIL_HEADER]) > time.time()
+    assert PRIMARY_UNTIL_COOKIE in client.cookies
+    assert [post["text"] for post in _contents(client, wall).json()] == ["Happy birthday"]
+
+def test_pin_header_routes_to_the_primary(client, wall, replica):
+    client.cookies.clear()
+    until = str(int(time.time()) + 60)
+
+    assert _contents(client, wall, headers={PRIMARY_UNTIL_HEADER: until}).status_code == 200
+
+def test_expired_pin_reads_from_the_replica_again(client, wall, replica):
+    client.cookies.clear()
+    client.cookies.set(PRIMARY_UNTIL_COOKIE, str(int(time.time()) - 1))
+
+    assert _contents(client, wall).status_code == 404
+
+def test_lagging_replica_falls_back_to_the_primary(client, wall, replica, monkeypatch):
+    client.cookies.clear()
+    monkeypatch.setattr(replica, "measure_lag", lambda: settings.REPLICA_MAX_LAG_SECONDS + 1)
+    replica.checked_at = float("-inf")
+
+    assert _contents(client, wall).status_code == 200
+
+def test_unreachable_replica_falls_back_to_the_primary(client, wall, replica, monkeypatch):
+    client.cookies.clear()
+    monkeypatch.setattr(replica, "measure_lag", lambda: None)
+    replica.checked_at = float("-inf")
+
+    assert _contents(client, wall).status_code == 200
@@ -0,0 +1,100 @@
+"""Opt-in benchmark of the list endpoints' response paths.
+
+The old path validated every row with ``model_validate`` in the handler,
+let FastAPI validate the result again against ``response_model`` and
+encoded it with stdlib json. The current one returns ORM rows, validates
+them once and encodes them with orjson. Both apps below run the same
+query, so the difference is serialization alone.
+"""
+import os
+import secrets
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+from app.core.database import SessionLocal
+from app.models.content import Content, ContentType
+from app.models.contributor import Contributor
+from app.models.wall import Wall
+from app.schemas.content import ContentResponse
+from app.schemas.contributor import ContributorResponse
+from app.schemas.wall import WallResponse
+
+ENDPOINTS = {
+    # Endpoint: (query, response schema)
+    "get_wall_contents": (
+        lambda db, ids: db.query(Content).filter(Content.wall_id == ids["wall"]).order_by(Content.created_at.desc()),
+        ContentResponse,
+    ),
+    "get_my_walls": (lambda db, ids: db.query(Wall).filter(Wall.admin_id == ids["admin"]), WallResponse),
+    "get_wall_contributors": (
+        lambda db, ids: db.query(Contributor).filter(Contributor.wall_id == ids["wall"]),
+        ContributorResponse,
+    ),
+}
+
+def _seed(admin_id: int, wall_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        contributors = [
+            Contributor(email=f"guest{n}@example.com", wall_id=wall_id, invite_token=secrets.token_urlsafe(16))
+            for n in range(500)
+        ]
+        db.add_all(contributors)
+        db.flush()
+        db.add_all(
+            Content(
+                wall_id=wall_id,
+                contributor_id=contributors[n % len(contributors)].id,
+                content_type=ContentType.TEXT_IMAGE,
+                text=f"Congratulations and all the best, number {n}!",
+                image_url=f"/uploads/{n}.jpg",
+                author_name="Guest",
+            )
+            for n in range(3000)
+        )
+        db.add_all(
+            Wall(title=f"Wall {n}", unique_url=secrets.token_urlsafe(8), passcode="000000", admin_id=admin_id)
+            for n in range(200)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return {"admin": admin_id, "wall": wall_id}
+
+def _endpoint(query, schema, ids: dict, validate_in_handler: bool):
+    def endpoint():
+        db = SessionLocal()
+        try:
+            rows = query(db, ids).all()
+            if validate_in_handler:
+                return [schema.model_validate(row) for row in rows]
+            return rows
+        finally:
+            db.close()
+    return endpoint
+
+def _app(ids: dict, validate_in_handler: bool) -> TestClient:
+    app = FastAPI(default_response_class=JSONResponse if validate_in_handler else ORJSONResponse)
+    for name, (query, schema) in ENDPOINTS.items():
+        app.add_api_route(f"/{name}", _endpoint(query, schema, ids, validate_in_handler), response_model=list[schema])
+    return TestClient(app)
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run")
+def test_benchmark_response_paths(admin, wall):
+    ids = _seed(admin["id"], wall["id"])
+    old, new = _app(ids, validate_in_handler=True), _app(ids, validate_in_handler=False)
+
+    def timed(client: TestClient, name: str) -> float:
+        client.get(f"/{name}")  # Warm-up
+        started = time.perf_counter()
+        for _ in range(20):
+            assert client.get(f"/{name}").status_code == 200
+        return (time.perf_counter() - started) / 20 * 1000
+
+    for name in ENDPOINTS:
+        assert old.get(f"/{name}").json() == new.get(f"/{name}").json()
+        before, after = timed(old, name), timed(new, name)
+        print(f"{name}: validate twice + json {before:.2f}ms, validate once + orjson {after:.2f}ms")
+        assert after <= before * 1.5
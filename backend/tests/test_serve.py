@@ -0,0 +1,20 @@
+import os
+from app.serve import _prepare_metrics_dir
+
+def test_metrics_dir_keeps_foreign_files(tmp_path, monkeypatch):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    (tmp_path / "notes.txt").write_text("keep me")
+    (tmp_path / "nested").mkdir()
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    _prepare_metrics_dir()
+
+    assert sorted(os.listdir(tmp_path)) == ["nested", "notes.txt"]
+
+def test_metrics_dir_is_created(tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "metrics"
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(metrics_dir))
+
+    _prepare_metrics_dir()
+
+    assert metrics_dir.is_dir()
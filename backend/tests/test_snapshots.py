@@ -0,0 +1,40 @@
+import json
+import os
+import pytest
+from app.core.config import settings
+from app.core.snapshots import publish_snapshot, snapshot_secret
+from tests.conftest import post_text
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "SNAPSHOT_KDF_ITERATIONS", 1)
+    return tmp_path
+
+def _set_public(client, admin, wall, public: bool):
+    response = client.put(f"/api/v1/walls/{wall['id']}", json={"is_public": public}, headers=admin["headers"])
+    assert response.status_code == 200
+
+def test_snapshots_are_off_by_default():
+    assert type(settings).model_fields["SNAPSHOTS_ENABLED"].default is False
+
+def test_private_walls_are_not_published(client, wall, snapshot_dir):
+    post_text(client, wall)
+
+    assert publish_snapshot(wall["id"], wall["unique_url"]) is None
+    assert os.listdir(snapshot_dir) == []
+
+def test_public_wall_is_published_and_removed_when_made_private(client, admin, wall, snapshot_dir):
+    post_text(client, wall, text="Hello")
+    _set_public(client, admin, wall, True)
+
+    version = publish_snapshot(wall["id"], wall["unique_url"])
+
+    root = snapshot_dir / wall["unique_url"] / snapshot_secret(wall["unique_url"], wall["passcode"])
+    assert json.loads((root / "latest.json").read_text())["version"] == version
+    payload = json.loads((root / "v" / f"{version}.json").read_text())
+    assert [content["text"] for content in payload["contents"]] == ["Hello"]
+
+    _set_public(client, admin, wall, False)
+    assert publish_snapshot(wall["id"], wall["unique_url"]) is None
+    assert not (snapshot_dir / wall["unique_url"]).exists()
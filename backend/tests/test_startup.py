@@ -0,0 +1,44 @@
+"""Cold-start budget: importing app.main must stay fast and leave heavy dependencies unloaded.
+
+STARTUP_IMPORT_BUDGET_SECONDS overrides the budget on slower machines.
+"""
+import os
+import subprocess
+import sys
+
+BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET_SECONDS", "2.0"))
+RUNS = 3
+
+# Loaded on first use (email sends, hashing, tokens, previews, profiling)
+LAZY_MODULES = {"PIL", "jinja2", "aiosmtplib", "passlib", "jose", "pyinstrument"}
+
+def _import_app() -> tuple[float, set]:
+    """Seconds spent importing app.main in a fresh interpreter, and every module it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds, modules = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if name.strip() == "app.main":
+            seconds = int(cumulative) / 1_000_000
+    assert seconds is not None, result.stderr[-2000:]
+    return seconds, modules
+
+def test_app_import_stays_within_budget():
+    seconds, _ = min(_import_app() for _ in range(RUNS))
+
+    assert seconds <= BUDGET_SECONDS, f"importing app.main took {seconds:.2f}s (budget {BUDGET_SECONDS}s)"
+
+def test_heavy_dependencies_load_lazily():
+    _, modules = _import_app()
+
+    eager = {name for name in modules if name.split(".")[0] in LAZY_MODULES}
+    assert not eager, f"imported by app.main: {sorted(eager)}"
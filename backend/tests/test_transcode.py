@@ -0,0 +1,66 @@
+import asyncio
+import os
+import pytest
+from app.core.config import settings
+from app.core.transcode import transcode_gif
+
+# Stands in for ffmpeg: writes the limits it runs under to the output file
+FAKE_FFMPEG = """#!/bin/sh
+for last; do :; done
+echo "$(ulimit -t) $(ulimit -v) $(nice)" > "$last"
+"""
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def ffmpeg(tmp_path, monkeypatch):
+    path = tmp_path / "bin" / "ffmpeg"
+    path.parent.mkdir()
+    path.write_text(FAKE_FFMPEG)
+    path.chmod(0o755)
+    monkeypatch.setattr(settings, "FFMPEG_PATH", str(path))
+    monkeypatch.setattr(settings, "TRANSCODE_CPU_SECONDS", 42)
+    monkeypatch.setattr(settings, "TRANSCODE_MEMORY_MB", 256)
+    return path
+
+def _gif(upload_dir, name: str, frames: int) -> str:
+    from PIL import Image
+
+    images = [Image.new("RGB", (40, 20), (60 * n, 0, 0)) for n in range(frames)]
+    images[0].save(upload_dir / name, save_all=frames > 1, append_images=images[1:], duration=100)
+    return f"/uploads/{name}"
+
+def test_without_ffmpeg_gifs_are_served_as_uploaded(upload_dir, monkeypatch):
+    monkeypatch.setattr(settings, "FFMPEG_PATH", "no-such-ffmpeg")
+    url = _gif(upload_dir, "party.gif", frames=3)
+
+    assert asyncio.run(transcode_gif(url)) is None
+    assert os.listdir(upload_dir) == ["party.gif"]
+
+def test_still_gifs_are_not_transcoded(ffmpeg, upload_dir):
+    url = _gif(upload_dir, "still.gif", frames=1)
+
+    assert asyncio.run(transcode_gif(url)) is None
+    assert sorted(os.listdir(upload_dir)) == ["bin", "still.gif"]
+
+def test_animated_gif_gets_videos_and_poster(ffmpeg, upload_dir):
+    from PIL import Image
+
+    url = _gif(upload_dir, "party.gif", frames=3)
+
+    variants = asyncio.run(transcode_gif(url))
+
+    assert variants == {
+        "mp4": "/uploads/party.mp4",
+        "webm": "/uploads/party.webm",
+        "poster": "/uploads/party.poster.jpg",
+    }
+    # ffmpeg ran under the CPU and memory caps at lower priority
+    assert (upload_dir / "party.mp4").read_text().split() == ["42", str(256 * 1024), "10"]
+    with Image.open(upload_dir / "party.poster.jpg") as poster:
+        assert (poster.format, poster.size) == ("JPEG", (40, 20))
+        # The first frame
+        assert poster.getpixel((0, 0))[0] < 30
@@ -0,0 +1,111 @@
+import base64
+import os
+import pytest
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.content import Content
+from tests.conftest import post_text
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 56
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    # Per-client quotas count every partial upload in the directory
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+
+def _metadata(**fields) -> str:
+    return ",".join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in fields.items())
+
+def _create(client, wall, length=len(PNG), **credentials):
+    if not credentials:
+        credentials = {"wall_url": wall["unique_url"], "wall_passcode": wall["passcode"]}
+    return client.post(
+        "/api/v1/uploads",
+        headers={"Upload-Length": str(length), "Upload-Metadata": _metadata(filetype="image/png", **credentials)},
+    )
+
+def _upload(client, wall, **credentials) -> str:
+    upload_id = _create(client, wall, **credentials).json()["upload_id"]
+    response = client.patch(
+        f"/api/v1/uploads/{upload_id}",
+        content=PNG,
+        headers={"Content-Type": "application/offset+octet-stream", "Upload-Offset": "0"},
+    )
+    assert response.status_code == 204
+    return upload_id
+
+def _post_image(client, wall, upload_ids, content_type="image"):
+    return client.post("/api/v1/content", data={
+        "wall_id": wall["id"],
+        "content_type": content_type,
+        "upload_ids": upload_ids,
+        "wall_url": wall["unique_url"],
+        "wall_passcode": wall["passcode"],
+    })
+
+def test_create_upload_requires_wall_credentials(client, wall):
+    assert _create(client, wall, wall_url=wall["unique_url"]).status_code == 401
+    assert _create(client, wall, wall_url=wall["unique_url"], wall_passcode="wrong").status_code == 401
+    assert _create(client, wall, invite_token="unknown").status_code == 401
+
+def test_guest_token_authorizes_upload(client, wall):
+    guest_token = post_text(client, wall).json()["guest_token"]
+
+    assert _create(client, wall, wall_url=wall["unique_url"], guest_token=guest_token).status_code == 201
+
+def test_finished_upload_attaches_to_post(client, wall):
+    upload_id = _upload(client, wall)
+
+    response = _post_image(client, wall, [upload_id])
+
+    assert response.status_code == 201
+    assert response.json()["image_url"].startswith("/uploads/")
+
+def test_upload_only_attaches_to_its_wall(client, admin, wall):
+    other = client.post("/api/v1/walls", json={"title": "Other"}, headers=admin["headers"]).json()
+    upload_id = _upload(client, other, wall_url=other["unique_url"], wall_passcode=other["passcode"])
+
+    assert _post_image(client, wall, [upload_id]).status_code == 400
+
+def test_single_image_post_rejects_several_uploads(client, wall):
+    upload_ids = [_upload(client, wall), _upload(client, wall)]
+
+    assert _post_image(client, wall, upload_ids).status_code == 400
+    for upload_id in upload_ids:
+        assert client.head(f"/api/v1/uploads/{upload_id}").status_code == 200
+
+def test_unfinished_uploads_are_capped_per_client(client, wall, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_PARTIAL_MAX_BYTES_PER_CLIENT", 3 * len(PNG))
+    for _ in range(3):
+        assert _create(client, wall).status_code == 201
+
+    assert _create(client, wall).status_code == 429
+
+def test_rejected_post_leaves_uploads_claimable(client, wall):
+    upload_id = _upload(client, wall)
+
+    # Text is required for text_image posts
+    assert _post_image(client, wall, [upload_id], content_type="text_image").status_code == 400
+    # The second id is unknown
+    assert _post_image(client, wall, [upload_id, "x" * 22], content_type="images").status_code == 400
+    assert client.head(f"/api/v1/uploads/{upload_id}").status_code == 200
+
+    assert _post_image(client, wall, [upload_id]).status_code == 201
+    assert client.head(f"/api/v1/uploads/{upload_id}").status_code == 404
+
+def test_failed_insert_releases_claimed_uploads(client, wall, monkeypatch):
+    upload_id = _upload(client, wall)
+    monkeypatch.setattr(Session, "commit", _failing_commit(Session.commit))
+
+    with pytest.raises(RuntimeError):
+        _post_image(client, wall, [upload_id])
+
+    assert client.head(f"/api/v1/uploads/{upload_id}").status_code == 200
+    assert os.listdir(settings.UPLOAD_DIR) == [".partial"]
+
+def _failing_commit(commit):
+    def failing(session):
+        if any(isinstance(obj, Content) for obj in session.new):
+            raise RuntimeError("database went away")
+        return commit(session)
+    return failing
@@ -3,7 +3,7 @@
 import { useEffect, useState } from 'react'
 import { useRouter, useParams } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
-import api from '@/lib/api'
+import api, { postIdempotent } from '@/lib/api'
 
 interface Wall {
   id: number
@@ -40,14 +40,15 @@ export default function AdminWallPage() {
       return
     }
     fetchWall()
-    fetchContributors()
   }, [isAuthenticated, router, wallId])
 
   const fetchWall = async () => {
     try {
-      const response = await api.get(`/api/v1/walls/${wallId}`)
-      setWall(response.data)
-      setIsPublic(response.data.is_public)
+      // Wall and contributors in one round trip
+      const response = await api.get(`/api/v1/walls/${wallId}/bootstrap`)
+      setWall(response.data.wall)
+      setIsPublic(response.data.wall.is_public)
+      setContributors(response.data.contributors)
     } catch (error) {
       console.error('Failed to fetch wall:', error)
       router.push('/dashboard')
@@ -68,7 +69,7 @@ export default function AdminWallPage() {
   const handleInviteContributor = async (e: React.FormEvent) => {
     e.preventDefault()
     try {
-      await api.post('/api/v1/contributors/invite', {
+      await postIdempotent('/api/v1/contributors/invite', {
         email: inviteEmail,
         wall_id: parseInt(wallId),
       })
@@ -4,8 +4,33 @@ import { useEffect, useState } from 'react'
 import { useParams, useRouter } from 'next/navigation'
 import api from '@/lib/api'
 
+type MediaVariants = Record<string, { mp4?: string; webm?: string; poster?: string }>
+
+// Plays transcoded video in place of an animated GIF once it's available
+function ContributionMedia({ src, variants, alt, className, apiUrl }: { src: string; variants: MediaVariants | null; alt: string; className: string; apiUrl: string }) {
+  const video = variants?.[src]
+  if (!video || (!video.webm && !video.mp4)) {
+    return <img src={`${apiUrl}${src}`} alt={alt} className={className} />
+  }
+
+  return (
+    <video
+      autoPlay
+      loop
+      muted
+      playsInline
+      poster={video.poster ? `${apiUrl}${video.poster}` : undefined}
+      aria-label={alt}
+      className={className}
+    >
+      {video.webm && <source src={`${apiUrl}${video.webm}`} type="video/webm" />}
+      {video.mp4 && <source src={`${apiUrl}${video.mp4}`} type="video/mp4" />}
+    </video>
+  )
+}
+
 // Image Carousel Component
-function ImageCarousel({ images, alt, apiUrl }: { images: string[]; alt: string; apiUrl: string }) {
+function ImageCarousel({ images, variants, alt, apiUrl }: { images: string[]; variants: MediaVariants | null; alt: string; apiUrl: string }) {
   const [currentIndex, setCurrentIndex] = useState(0)
 
   const nextImage = () => {
@@ -18,10 +43,12 @@ function ImageCarousel({ images, alt, apiUrl }: { images: string[]; alt: string;
 
   return (
     <div className="relative">
-      <img
-        src={`${apiUrl}${images[currentIndex]}`}
+      <ContributionMedia
+        src={images[currentIndex]}
+        variants={variants}
         alt={`${alt} ${currentIndex + 1}`}
         className="w-full h-auto rounded-md mb-2"
+        apiUrl={apiUrl}
       />
       {images.length > 1 && (
         <>
@@ -77,6 +104,7 @@ interface Content {
   text: string | null
   image_url: string | null
   image_urls: string[] | null
+  media_variants: MediaVariants | null
   author_name: string | null
   created_at: string
 }
@@ -218,10 +246,12 @@ export default function WallPage() {
 
                   {content.content_type === 'image' && content.image_url && (
                     <div>
-                      <img
-                        src={`${apiUrl}${content.image_url}`}
+                      <ContributionMedia
+                        src={content.image_url}
+                        variants={content.media_variants}
                         alt="Contribution"
                         className="w-full h-auto rounded-md mb-4"
+                        apiUrl={apiUrl}
                       />
                       {content.author_name && (
                         <p className="text-sm text-gray-500 italic">— {content.author_name}</p>
@@ -232,10 +262,12 @@ export default function WallPage() {
                   {content.content_type === 'text_image' && (
                     <div>
                       {content.image_url && (
-                        <img
-                          src={`${apiUrl}${content.image_url}`}
+                        <ContributionMedia
+                          src={content.image_url}
+                          variants={content.media_variants}
                           alt="Contribution"
                           className="w-full h-auto rounded-md mb-4"
+                          apiUrl={apiUrl}
                         />
                       )}
                       {content.text && (
@@ -249,7 +281,7 @@ export default function WallPage() {
 
                   {content.content_type === 'images' && content.image_urls && content.image_urls.length > 0 && (
                     <div>
-                      <ImageCarousel images={content.image_urls} alt="Contribution" apiUrl={apiUrl} />
+                      <ImageCarousel images={content.image_urls} variants={content.media_variants} alt="Contribution" apiUrl={apiUrl} />
                       {content.author_name && (
                         <p className="text-sm text-gray-500 italic mt-2">— {content.author_name}</p>
                       )}
@@ -258,7 +290,7 @@ export default function WallPage() {
 
                   {content.content_type === 'images_text' && content.image_urls && content.image_urls.length > 0 && (
                     <div>
-                      <ImageCarousel images={content.image_urls} alt="Contribution" apiUrl={apiUrl} />
+                      <ImageCarousel images={content.image_urls} variants={content.media_variants} alt="Contribution" apiUrl={apiUrl} />
                       {content.text && (
                         <div className="mt-4">
                           <TruncatedText text={content.text} maxLength={200} />
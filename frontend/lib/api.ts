@@ -15,12 +15,21 @@ api.interceptors.request.use((config) => {
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  // Read our own writes: the API routes reads to the primary until this time
+  const primaryUntil = sessionStorage.getItem('primary_until')
+  if (primaryUntil && parseInt(primaryUntil, 10) > Date.now() / 1000) {
+    config.headers['X-Primary-Until'] = primaryUntil
+  }
   return config
 })
 
 // Handle 401 errors
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const primaryUntil = response.headers['x-primary-until']
+    if (primaryUntil) sessionStorage.setItem('primary_until', primaryUntil)
+    return response
+  },
   (error) => {
     if (error.response?.status === 401) {
       localStorage.removeItem('token')
@@ -31,5 +40,19 @@ api.interceptors.response.use(
   }
 )
 
+// POST with an Idempotency-Key, retrying when the connection drops before a
+// response arrives. Retries reuse the key, so the server runs it only once.
+export async function postIdempotent(url: string, data?: any, config: any = {}, retries = 3) {
+  const key = crypto.randomUUID()
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await api.post(url, data, { ...config, headers: { ...config.headers, 'Idempotency-Key': key } })
+    } catch (error: any) {
+      if (error.response || attempt >= retries) throw error
+      await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt))
+    }
+  }
+}
+
 export default api
 
@@ -0,0 +1,73 @@
+import api from '@/lib/api'
+
+const CHUNK_SIZE = 1024 * 1024
+const MAX_RETRIES = 5
+
+const storageKey = (file: File) => `upload_${file.name}_${file.size}_${file.lastModified}`
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+const encode = (value: string) => btoa(unescape(encodeURIComponent(value)))
+
+// The same credentials create_content takes: invite_token, or wall_url with
+// wall_passcode or guest_token. An upload can only be posted to that wall.
+export type UploadCredentials = Record<string, string>
+
+async function createUpload(file: File, credentials: UploadCredentials): Promise<string> {
+  const metadata = Object.entries({ ...credentials, filename: file.name, filetype: file.type })
+    .map(([key, value]) => `${key} ${encode(value)}`)
+    .join(',')
+  const response = await api.post('/api/v1/uploads', null, {
+    headers: { 'Upload-Length': file.size.toString(), 'Upload-Metadata': metadata },
+  })
+  return response.data.upload_id
+}
+
+async function currentOffset(uploadId: string): Promise<number | null> {
+  try {
+    const response = await api.head(`/api/v1/uploads/${uploadId}`)
+    return parseInt(response.headers['upload-offset'], 10)
+  } catch (error: any) {
+    if (error.response?.status === 404) return null
+    throw error
+  }
+}
+
+// Upload a file in chunks, resuming after dropped connections (and page
+// reloads) from the last byte the server has. Resolves to the upload id to
+// pass to create_content as upload_ids.
+export async function uploadResumable(
+  file: File,
+  credentials: UploadCredentials,
+  onProgress?: (fraction: number) => void,
+): Promise<string> {
+  let uploadId = localStorage.getItem(storageKey(file))
+  let offset = uploadId ? await currentOffset(uploadId) : null
+  if (uploadId === null || offset === null) {
+    uploadId = await createUpload(file, credentials)
+    localStorage.setItem(storageKey(file), uploadId)
+    offset = 0
+  }
+
+  let retries = 0
+  while (offset < file.size) {
+    try {
+      const response = await api.patch(`/api/v1/uploads/${uploadId}`, file.slice(offset, offset + CHUNK_SIZE), {
+        headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': offset.toString() },
+      })
+      offset = parseInt(response.headers['upload-offset'], 10)
+      retries = 0
+      onProgress?.(offset / file.size)
+    } catch (error: any) {
+      const status = error.response?.status
+      if ((status && status < 500 && status !== 409) || retries >= MAX_RETRIES) throw error
+      retries += 1
+      await sleep(1000 * 2 ** retries)
+      const resumeAt = await currentOffset(uploadId)
+      if (resumeAt === null) throw error
+      offset = resumeAt
+    }
+  }
+  localStorage.removeItem(storageKey(file))
+  return uploadId
+}